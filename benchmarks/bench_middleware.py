@@ -0,0 +1,140 @@
+"""Benchmark: per-request latency of the API with both middleware stacks.
+
+``stock`` is ``settings.MIDDLEWARE`` with every ``ticket_system.middleware``
+class replaced by the Django class it extends, i.e. the stack before the
+API started skipping session, CSRF, auth and messages; ``lean`` is
+``settings.MIDDLEWARE`` as configured. Each URL is requested ``--requests``
+times per stack through Django's test client (full handler, no network)
+with a token, on a throwaway ``test_<NAME>`` database, alternating the
+stacks in rounds so drift affects both equally.
+
+    python benchmarks/bench_middleware.py --requests 2000 \\
+        --output benchmarks/results/middleware.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tickets.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from django.utils.module_loading import import_string  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from bench_reports import version_git  # noqa: E402
+from ticket_system.middleware import SoloWebMixin  # noqa: E402
+from ticket_system.models import Usuario  # noqa: E402
+
+
+def pila_original():
+    pila = []
+    for ruta in settings.MIDDLEWARE:
+        clase = import_string(ruta)
+        if issubclass(clase, SoloWebMixin):
+            base = clase.__mro__[2]  # (clase, SoloWebMixin, django class, ...)
+            ruta = f"{base.__module__}.{base.__qualname__}"
+        pila.append(ruta)
+    return pila
+
+
+def cliente(pila, token):
+    # the handler loads the middleware on its first request, so each client
+    # is created and warmed up while its stack is the active setting
+    with override_settings(MIDDLEWARE=pila):
+        c = Client(HTTP_AUTHORIZATION=f'Token {token}')
+        c.get('/api/')
+    return c
+
+
+def medir(c, pila, url, n):
+    tiempos = []
+    with override_settings(MIDDLEWARE=pila):
+        for _ in range(n):
+            inicio = time.perf_counter()
+            resp = c.get(url)
+            tiempos.append(time.perf_counter() - inicio)
+    if resp.status_code != 200:
+        raise SystemExit(f"{url} respondió {resp.status_code}")
+    return tiempos
+
+
+def resumen(tiempos):
+    tiempos = sorted(tiempos)
+    return {
+        'median_us': round(statistics.median(tiempos) * 1e6, 1),
+        'p95_us': round(tiempos[int(len(tiempos) * 0.95) - 1] * 1e6, 1),
+        'mean_us': round(statistics.fmean(tiempos) * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--urls', nargs='+', default=['/api/estado/cache-tokens/', '/api/departamentos/'])
+    parser.add_argument('--requests', type=int, default=2000, help='requests per URL and stack')
+    parser.add_argument('--rounds', type=int, default=4)
+    parser.add_argument('--output', '-o', default='bench_middleware.json')
+    args = parser.parse_args()
+
+    pilas = {'stock': pila_original(), 'lean': list(settings.MIDDLEWARE)}
+    resultados = []
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        usuario = Usuario.objects.create_user(username='bench_mw', password='x', rol='superuser')
+        token = Token.objects.create(user=usuario).key
+        clientes = {nombre: cliente(pila, token) for nombre, pila in pilas.items()}
+
+        por_ronda = max(1, args.requests // args.rounds)
+        for url in args.urls:
+            tiempos = {nombre: [] for nombre in pilas}
+            for _ in range(args.rounds):
+                for nombre, pila in pilas.items():
+                    tiempos[nombre] += medir(clientes[nombre], pila, url, por_ronda)
+            fila = {'url': url, **{nombre: resumen(t) for nombre, t in tiempos.items()}}
+            fila['ahorro_median_us'] = round(fila['stock']['median_us'] - fila['lean']['median_us'], 1)
+            resultados.append(fila)
+            print(
+                f"{url:<32}{fila['stock']['median_us']:>10.0f} us{fila['lean']['median_us']:>10.0f} us"
+                f"{fila['ahorro_median_us']:>10.0f} us"
+            )
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+    salida = {
+        'benchmark': 'middleware',
+        'fecha': timezone.now().isoformat(),
+        'commit': version_git(),
+        'entorno': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'db': connection.vendor,
+        },
+        'pilas': pilas,
+        'requests': por_ronda * args.rounds,
+        'resultados': resultados,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(salida, f, indent=2)
+    print(f"Resultados escritos en {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Microbenchmark: per-document render time before and after pdf_toolkit.
+
+"before" clears the styles and logo caches before every document and
+turns ASCII85 stream encoding back on, which is what each request paid
+before ``pdf_toolkit`` existed. "cold" only clears the caches, and "cached"
+reuses them the way a long-lived worker does now. No database is needed:
+the reports are rendered from synthetic plain data.
+
+    python benchmarks/bench_pdf_toolkit.py [--docs 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tickets.settings')
+
+from django.conf import settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from reportlab import rl_config  # noqa: E402
+
+from ticket_system import pdf_toolkit  # noqa: E402
+from ticket_system.pdf_reports import render_estadisticas_pdf, render_ticket_pdf  # noqa: E402
+
+
+def datos_estadisticas(lang):
+    now = timezone.now()
+    return {
+        'lang': lang,
+        'fecha_inicio': now - timedelta(days=7),
+        'fecha_fin': now,
+        'departamentos': [(f'Departamento {i}', 100 - i * 10) for i in range(5)],
+        'usuarios': [(f'Usuario {i}', 50 - i * 5) for i in range(5)],
+        'motivos': [(f'Motivo {i}', 30 - i) for i in range(8)],
+        'prioridades': [('media', 'Media', 40), ('alta', 'Alta', 25), ('baja', 'Baja', 20), ('urgente', 'Urgente', 5)],
+    }
+
+
+def datos_ticket(lang):
+    now = timezone.localtime()
+    return {
+        'lang': lang,
+        'id': 1,
+        'asunto': 'La impresora del almacén no imprime',
+        'estado': 'resuelto',
+        'estado_display': 'Resuelto',
+        'prioridad': 'alta',
+        'prioridad_display': 'Alta',
+        'creado_por': 'Ana López',
+        'departamento': 'Logistica',
+        'motivo': 'Equipo',
+        'fecha_creacion': now - timedelta(days=2, hours=3),
+        'fecha_cierre': now,
+        'tiempo_resolucion': timedelta(days=2, hours=3),
+        'contenido': 'Descripción del problema.\n' * 20,
+        'generado': now,
+    }
+
+
+def medir(render, datos, docs, cold, a85):
+    rl_config.useA85 = a85
+    tiempos = []
+    for _ in range(docs):
+        if cold:
+            pdf_toolkit.clear_caches()
+        inicio = time.perf_counter()
+        render(datos)
+        tiempos.append(time.perf_counter() - inicio)
+    rl_config.useA85 = 0
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--docs', type=int, default=50, help='documents per measurement')
+    args = parser.parse_args()
+
+    settings.BASE_DIR  # configure settings before rendering
+
+    casos = [
+        ('estadisticas', render_estadisticas_pdf, datos_estadisticas('es')),
+        ('ticket', render_ticket_pdf, datos_ticket('es')),
+    ]
+    print(f"{'reporte':<14}{'modo':<8}{'media ms':>10}{'p95 ms':>10}")
+    for nombre, render, datos in casos:
+        render(datos)  # import and font warm-up outside the measurement
+        for modo, cold, a85 in (('before', True, 1), ('cold', True, 0), ('cached', False, 0)):
+            tiempos = sorted(medir(render, datos, args.docs, cold, a85))
+            p95 = tiempos[int(len(tiempos) * 0.95) - 1]
+            print(f"{nombre:<14}{modo:<8}{statistics.mean(tiempos) * 1000:>10.2f}{p95 * 1000:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
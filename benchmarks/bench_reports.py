@@ -0,0 +1,202 @@
+"""Benchmark suite: how the PDF reports scale with the number of tickets.
+
+A throwaway database is created with the configured backend (the same
+``test_<NAME>`` database ``manage.py test`` uses), filled with synthetic
+tickets up to each requested size, and every report is measured in each
+language:
+
+* ``query_ms``: gathering the report data (``report_data``)
+* ``build_ms``: the ReportLab build (``pdf_reports``)
+* ``size_bytes``: size of the resulting PDF
+* ``peak_kib``: peak Python memory of query + build, from ``tracemalloc``
+
+Times are the median of ``--repeat`` runs without tracing; memory comes
+from one extra traced run. Results are written as JSON so releases can be
+compared with a plain diff or a notebook.
+
+    python benchmarks/bench_reports.py --sizes 1000 100000 1000000 \\
+        --output benchmarks/results/reports.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tickets.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import reportlab  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from ticket_system import synthetic_data  # noqa: E402
+from ticket_system.models import Cerrador, Departamento, Motivo, Ticket, Usuario  # noqa: E402
+from ticket_system.pdf_reports import render_estadisticas_pdf, render_libro_pdf, render_ticket_pdf  # noqa: E402
+from ticket_system.report_data import (  # noqa: E402
+    iter_filas_libro,
+    obtener_datos_estadisticas,
+    obtener_datos_ticket,
+    obtener_encabezado_libro,
+)
+
+
+LOTE = 5000
+
+
+def sembrar(total, rng):
+    """Add synthetic tickets until the table holds ``total`` rows."""
+    # migrations may already seed departments and motivos; only fill gaps
+    synthetic_data.generar(
+        departamentos=0 if Departamento.objects.exists() else 10,
+        motivos=0 if Motivo.objects.exists() else 20,
+        usuarios=0 if Usuario.objects.filter(username__startswith=synthetic_data.PREFIJO_USUARIO).exists() else 200,
+        cerradores=0 if Cerrador.objects.exists() else 10,
+        tickets=total - Ticket.objects.count(),
+        semilla=rng.randrange(2 ** 32),
+        lote=LOTE,
+        dias=60,
+        # the benchmarked reports cover the days before today
+        ahora=timezone.now(),
+    )
+
+
+def caso_estadisticas(lang):
+    return lambda: obtener_datos_estadisticas(lang), render_estadisticas_pdf
+
+
+def caso_ticket(lang):
+    ticket_id = Ticket.objects.order_by('-id').values_list('id', flat=True).first()
+
+    def consulta():
+        ticket = Ticket.objects.select_related('usuario__departamento', 'motivo').get(id=ticket_id)
+        return obtener_datos_ticket(ticket, lang)
+    return consulta, render_ticket_pdf
+
+
+def caso_libro(lang, dias=7):
+    hasta = timezone.localdate()
+    desde = hasta - timedelta(days=dias)
+
+    # rows are streamed into the build, so the query cost is mostly inside
+    # build_ms here; query_ms only covers the header count
+    def consulta():
+        return obtener_encabezado_libro(desde, hasta, lang)
+
+    def render(datos):
+        return render_libro_pdf(datos, iter_filas_libro(desde, hasta, lang))[0]
+    return consulta, render
+
+
+CASOS = {
+    'estadisticas': caso_estadisticas,
+    'ticket': caso_ticket,
+    'libro': caso_libro,
+}
+
+
+def medir(consulta, render, repeat):
+    consultas, builds = [], []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        datos = consulta()
+        medio = time.perf_counter()
+        pdf = render(datos)
+        fin = time.perf_counter()
+        consultas.append(medio - inicio)
+        builds.append(fin - medio)
+
+    tracemalloc.start()
+    render(consulta())
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'query_ms': round(statistics.median(consultas) * 1000, 2),
+        'build_ms': round(statistics.median(builds) * 1000, 2),
+        'size_bytes': len(pdf),
+        'peak_kib': round(pico / 1024, 1),
+    }
+
+
+def version_git():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--reports', nargs='+', choices=sorted(CASOS), default=['estadisticas', 'ticket'])
+    parser.add_argument('--langs', nargs='+', choices=['es', 'en'], default=['es', 'en'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', '-o', default='bench_reports.json')
+    parser.add_argument('--keepdb', action='store_true', help='reuse the benchmark database between runs')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    resultados = []
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=args.keepdb)
+    try:
+        for total in sorted(args.sizes):
+            inicio = time.perf_counter()
+            sembrar(total, rng)
+            print(f"{total} tickets sembrados en {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+
+            for reporte in args.reports:
+                for lang in args.langs:
+                    consulta, render = CASOS[reporte](lang)
+                    render(consulta())  # import and font warm-up outside the measurement
+                    fila = {'tickets': total, 'report': reporte, 'lang': lang, **medir(consulta, render, args.repeat)}
+                    resultados.append(fila)
+                    print(
+                        f"{total:>9} {reporte:<13}{lang:<4}"
+                        f"{fila['query_ms']:>10.1f} ms{fila['build_ms']:>10.1f} ms"
+                        f"{fila['size_bytes']:>10} B{fila['peak_kib']:>10.0f} KiB"
+                    )
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0, keepdb=args.keepdb)
+        teardown_test_environment()
+
+    salida = {
+        'benchmark': 'reports',
+        'fecha': timezone.now().isoformat(),
+        'commit': version_git(),
+        'entorno': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'reportlab': reportlab.Version,
+            'db': connection.vendor,
+        },
+        'repeat': args.repeat,
+        'resultados': resultados,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(salida, f, indent=2)
+    print(f"Resultados escritos en {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
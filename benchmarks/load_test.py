@@ -0,0 +1,309 @@
+"""Load test: simulated browser tabs against a locally started server.
+
+Every virtual user behaves like ``TicketsList.jsx``: it logs in through
+``/api/login/``, loads departamentos and motivos once, then polls
+``/api/tickets/`` every ``--poll`` seconds until the run ends. On top of
+polling, users create tickets and admins move open tickets forward
+(``update_estado``), change their priority (``update_prioridad``) and now
+and then download ``pdf-estadisticas``; each action happens at random
+(exponential) intervals around the configured mean, so tabs do not fire
+in lockstep.
+
+Unless ``--url`` points at a running server, ``manage.py runserver`` is
+started on a free port with the file email backend, so notifications are
+written to a temporary directory instead of being sent. The server uses
+the configured database; the ``carga_*`` users are created there if
+missing, and the tickets they create stay.
+
+Per endpoint the report gives requests, throughput, p50/p95/p99 latency
+and error rate (HTTP >= 400 or connection errors), printed and written as
+JSON like the other benchmarks.
+
+    python benchmarks/load_test.py --users 50 --admins 5 --duration 120 \\
+        --output benchmarks/results/load.json
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tickets.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.utils import timezone  # noqa: E402
+
+from bench_reports import version_git  # noqa: E402
+from ticket_system.models import Departamento, Usuario  # noqa: E402
+
+
+CLAVE = 'carga12345'
+_ID = re.compile(r'/\d+/')
+
+
+def crear_usuarios(usuarios, admins):
+    departamento = Departamento.objects.filter(activo=True).first()
+    cuentas = [(f'carga_user_{i}', 'user') for i in range(usuarios)]
+    cuentas += [(f'carga_admin_{i}', 'superuser') for i in range(admins)]
+    for username, rol in cuentas:
+        if not Usuario.objects.filter(username=username).exists():
+            Usuario.objects.create_user(
+                username=username, email=f'{username}@carga.local', password=CLAVE,
+                rol=rol, departamento=departamento,
+            )
+    return cuentas
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar_servidor(correo_dir):
+    puerto = puerto_libre()
+    entorno = dict(
+        os.environ,
+        EMAIL_BACKEND='django.core.mail.backends.filebased.EmailBackend',
+        EMAIL_FILE_PATH=str(correo_dir),
+    )
+    proceso = subprocess.Popen(
+        [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{puerto}'],
+        cwd=BASE_DIR, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{puerto}'
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(('127.0.0.1', puerto), timeout=1).close()
+            return proceso, url
+        except OSError:
+            if proceso.poll() is not None:
+                raise SystemExit('El servidor no arrancó')
+            time.sleep(0.2)
+    proceso.terminate()
+    raise SystemExit('El servidor no respondió en 30 s')
+
+
+class Estadisticas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+
+    def registrar(self, endpoint, segundos, ok):
+        with self._lock:
+            self.latencias[endpoint].append(segundos)
+            if not ok:
+                self.errores[endpoint] += 1
+
+
+class Cliente:
+    """One keep-alive connection, like a browser tab."""
+
+    def __init__(self, url, estadisticas):
+        partes = urlsplit(url)
+        self.host, self.puerto = partes.hostname, partes.port or 80
+        self.estadisticas = estadisticas
+        self.token = None
+        self.conexion = None
+
+    def pedir(self, metodo, ruta, datos=None):
+        cabeceras = {'Accept': 'application/json'}
+        cuerpo = None
+        if datos is not None:
+            cuerpo = json.dumps(datos)
+            cabeceras['Content-Type'] = 'application/json'
+        if self.token:
+            cabeceras['Authorization'] = f'Token {self.token}'
+        endpoint = f"{metodo} {_ID.sub('/{id}/', ruta.split('?')[0])}"
+
+        inicio = time.perf_counter()
+        try:
+            if self.conexion is None:
+                self.conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=60)
+            self.conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+            respuesta = self.conexion.getresponse()
+            contenido = respuesta.read()
+            estado = respuesta.status
+        except (OSError, http.client.HTTPException):
+            self.conexion = None
+            self.estadisticas.registrar(endpoint, time.perf_counter() - inicio, False)
+            return None, None
+        self.estadisticas.registrar(endpoint, time.perf_counter() - inicio, estado < 400)
+        if respuesta.getheader('Content-Type', '').startswith('application/json') and contenido:
+            return estado, json.loads(contenido)
+        return estado, contenido
+
+
+def usuario_virtual(url, username, rol, args, estadisticas, fin, rng):
+    cliente = Cliente(url, estadisticas)
+    estado, datos = cliente.pedir('POST', '/api/login/', {'email': f'{username}@carga.local', 'password': CLAVE})
+    if estado != 200:
+        return
+    cliente.token = datos['token']
+    _, departamentos = cliente.pedir('GET', '/api/departamentos/')
+    _, motivos = cliente.pedir('GET', '/api/motivos/')
+    departamentos = [d['id'] for d in departamentos or []]
+    motivos = motivos or []
+
+    def proxima(media):
+        return time.monotonic() + rng.expovariate(1 / media) if media > 0 else float('inf')
+
+    crear_en = proxima(args.create_every)
+    estado_en = proxima(args.estado_every)
+    prioridad_en = proxima(args.prioridad_every)
+    pdf_en = proxima(args.pdf_every)
+    tickets = []
+
+    while time.monotonic() < fin:
+        ciclo = time.monotonic()
+        _, lista = cliente.pedir('GET', '/api/tickets/')
+        if isinstance(lista, list):
+            tickets = lista
+        ahora = time.monotonic()
+
+        if rol == 'user' and ahora >= crear_en and departamentos:
+            departamento = rng.choice(departamentos)
+            propios = [m['id'] for m in motivos if m['departamento'] == departamento]
+            cliente.pedir('POST', '/api/tickets/', {
+                'departamento': departamento,
+                'motivo': rng.choice(propios) if propios else None,
+                'asunto': f'Carga {rng.randrange(10 ** 6)}',
+                'contenido': 'Ticket generado por la prueba de carga.\n' * rng.randint(1, 5),
+            })
+            crear_en = proxima(args.create_every)
+
+        if rol == 'superuser':
+            abiertos = [t for t in tickets if t['estado'] != 'resuelto']
+            if ahora >= estado_en and abiertos:
+                ticket = rng.choice(abiertos)
+                siguiente = 'en_proceso' if ticket['estado'] == 'abierto' else 'resuelto'
+                cliente.pedir('POST', f"/api/tickets/{ticket['id']}/update_estado/",
+                              {'estado': siguiente, 'solucion_texto': 'Resuelto en prueba de carga'})
+                estado_en = proxima(args.estado_every)
+            if ahora >= prioridad_en and abiertos:
+                ticket = rng.choice(abiertos)
+                cliente.pedir('POST', f"/api/tickets/{ticket['id']}/update_prioridad/",
+                              {'prioridad': rng.choice(['baja', 'media', 'alta', 'urgente'])})
+                prioridad_en = proxima(args.prioridad_every)
+            if ahora >= pdf_en:
+                cliente.pedir('GET', '/api/reportes/pdf-estadisticas/?lang=es')
+                pdf_en = proxima(args.pdf_every)
+
+        time.sleep(max(0.0, args.poll - (time.monotonic() - ciclo)))
+
+
+def percentil(ordenados, p):
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--admins', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=60, help='seconds of load after the ramp-up')
+    parser.add_argument('--ramp', type=float, default=5, help='seconds over which tabs are opened')
+    parser.add_argument('--poll', type=float, default=2, help='seconds between polls, as in TicketsList.jsx')
+    parser.add_argument('--create-every', type=float, default=60, help='mean seconds between tickets per user')
+    parser.add_argument('--estado-every', type=float, default=20, help='mean seconds between estado changes per admin')
+    parser.add_argument('--prioridad-every', type=float, default=40)
+    parser.add_argument('--pdf-every', type=float, default=120, help='mean seconds between PDF downloads per admin')
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', '-o', default='load_test.json')
+    args = parser.parse_args()
+
+    cuentas = crear_usuarios(args.users, args.admins)
+    estadisticas = Estadisticas()
+    correo_dir = Path(tempfile.mkdtemp(prefix='carga_correo_'))
+    proceso = None
+    url = args.url
+    if url is None:
+        proceso, url = iniciar_servidor(correo_dir)
+    print(f"{len(cuentas)} pestañas contra {url}", file=sys.stderr)
+
+    try:
+        inicio = time.monotonic()
+        fin = inicio + args.ramp + args.duration
+        hilos = []
+        for i, (username, rol) in enumerate(cuentas):
+            rng = random.Random(args.seed * 100003 + i)
+            hilo = threading.Thread(
+                target=usuario_virtual, args=(url, username, rol, args, estadisticas, fin, rng), daemon=True,
+            )
+            hilos.append(hilo)
+        for i, hilo in enumerate(hilos):
+            time.sleep(max(0.0, inicio + args.ramp * i / len(hilos) - time.monotonic()))
+            hilo.start()
+        for hilo in hilos:
+            hilo.join(timeout=max(0.0, fin - time.monotonic()) + 60)
+        transcurrido = time.monotonic() - inicio
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait(timeout=10)
+
+    resultados = []
+    print(f"{'endpoint':<48}{'n':>7}{'req/s':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>7}")
+    for endpoint, latencias in sorted(estadisticas.latencias.items()):
+        ordenadas = sorted(latencias)
+        fila = {
+            'endpoint': endpoint,
+            'requests': len(ordenadas),
+            'throughput_rps': round(len(ordenadas) / transcurrido, 2),
+            'p50_ms': round(percentil(ordenadas, 50) * 1000, 1),
+            'p95_ms': round(percentil(ordenadas, 95) * 1000, 1),
+            'p99_ms': round(percentil(ordenadas, 99) * 1000, 1),
+            'error_rate': round(estadisticas.errores[endpoint] / len(ordenadas), 4),
+        }
+        resultados.append(fila)
+        print(
+            f"{endpoint:<48}{fila['requests']:>7}{fila['throughput_rps']:>8.1f}"
+            f"{fila['p50_ms']:>9.1f}{fila['p95_ms']:>9.1f}{fila['p99_ms']:>9.1f}"
+            f"{fila['error_rate'] * 100:>7.2f}"
+        )
+    correos = len(list(correo_dir.iterdir())) if proceso is not None else None
+    if correos is not None:
+        print(f"{correos} emails capturados en {correo_dir}", file=sys.stderr)
+
+    salida = {
+        'benchmark': 'load',
+        'fecha': timezone.now().isoformat(),
+        'commit': version_git(),
+        'entorno': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'cpus': os.cpu_count(),
+            'servidor': url if args.url else 'runserver',
+        },
+        'parametros': {k: v for k, v in vars(args).items() if k != 'output'},
+        'duracion_s': round(transcurrido, 1),
+        'emails_capturados': correos,
+        'resultados': resultados,
+    }
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(salida, f, indent=2)
+    print(f"Resultados escritos en {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
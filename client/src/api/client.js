@@ -110,8 +110,26 @@ class ApiClient {
     });
   }
 
-  async getTickets() {
-    return this.request('/tickets/');
+  // filters: { estado: 'abierto,en_proceso', prioridad, departamento }
+  // lists filtered on open states are served from the server's in-memory
+  // model; anything else comes from the database
+  async getTickets(filters = {}) {
+    const params = new URLSearchParams(
+      Object.entries(filters).filter(([, value]) => value)
+    ).toString();
+    return this.request(`/tickets/${params ? `?${params}` : ''}`);
+  }
+
+  async getTicketStats() {
+    return this.request('/tickets/estadisticas/');
+  }
+
+  // filters: { por: 'departamento,prioridad', desde: 'AAAA-MM-DD', hasta, lang }
+  async getTicketSla(filters = {}) {
+    const params = new URLSearchParams(
+      Object.entries(filters).filter(([, value]) => value)
+    ).toString();
+    return this.request(`/tickets/sla/${params ? `?${params}` : ''}`);
   }
 
   async getTicket(id) {
@@ -180,6 +198,54 @@ class ApiClient {
       throw error;
     }
   }
+
+  // Resumable upload: the file is sent in chunks and, when a chunk fails
+  // (e.g. the Wi-Fi drops), the upload continues from the last byte the
+  // server confirmed instead of starting over.
+  async uploadImageChunked(file, { chunkSize = 1024 * 1024, retries = 5 } = {}) {
+    const session = await this.request('/subidas/', {
+      method: 'POST',
+      body: JSON.stringify({ nombre: file.name, tamano: file.size }),
+    });
+    const sessionUrl = `${this.baseURL}/subidas/${session.id}/`;
+
+    let offset = session.recibido;
+    let failures = 0;
+    while (offset < file.size) {
+      const end = Math.min(offset + chunkSize, file.size) - 1;
+      try {
+        const response = await fetch(sessionUrl, {
+          method: 'PUT',
+          headers: {
+            'Authorization': `Token ${this.getToken()}`,
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': `bytes ${offset}-${end}/${file.size}`,
+          },
+          body: file.slice(offset, end + 1),
+        });
+        const data = await response.json().catch(() => ({}));
+        if (response.ok || response.status === 409) {
+          offset = data.recibido;
+          failures = 0;
+          continue;
+        }
+        throw new Error(data.error || `Error ${response.status}`);
+      } catch (error) {
+        failures += 1;
+        if (failures > retries) {
+          throw error;
+        }
+        await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** failures));
+        // ask the server where to resume; the chunk may have arrived
+        const state = await this.request(`/subidas/${session.id}/`).catch(() => null);
+        if (state) {
+          offset = state.recibido;
+        }
+      }
+    }
+
+    return this.request(`/subidas/${session.id}/finalizar/`, { method: 'POST' });
+  }
 }
 
 export default new ApiClient();
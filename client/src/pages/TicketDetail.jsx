@@ -65,6 +65,13 @@ const TicketDetail = () => {
                     getAbsoluteImageUrl(url),
                 );
             }
+            if (data.solucion_imagenes_variantes) {
+                data.solucion_imagenes_variantes =
+                    data.solucion_imagenes_variantes.map((variantes) => ({
+                        ...variantes,
+                        miniatura: getAbsoluteImageUrl(variantes.miniatura),
+                    }));
+            }
             setTicket(data);
             setSelectedCloser(data.cerrado_por || null);
             setError(null);
@@ -140,10 +147,8 @@ const TicketDetail = () => {
                 };
                 reader.readAsDataURL(file);
 
-                // Subir a servidor
-                const formData = new FormData();
-                formData.append("imagen", file);
-                const response = await apiClient.uploadImage(formData);
+                // Subir a servidor por fragmentos (se reanuda si la conexión falla)
+                const response = await apiClient.uploadImageChunked(file);
 
                 // Reemplazar previsualización con URL del servidor
                 setResolutionImages((prev) => {
@@ -381,7 +386,15 @@ const TicketDetail = () => {
                                                             }
                                                         >
                                                             <img
-                                                                src={url}
+                                                                src={
+                                                                    ticket
+                                                                        .solucion_imagenes_variantes?.[
+                                                                        index
+                                                                    ]
+                                                                        ?.miniatura ||
+                                                                    url
+                                                                }
+                                                                loading="lazy"
                                                                 alt={`Imagen de solución ${index + 1}`}
                                                                 title={t(
                                                                     "ticketDetail.clickToEnlarge",
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { Link } from "react-router-dom";
 import { FiDownload, FiSearch, FiFilter, FiX } from "react-icons/fi";
 import { useLanguage } from "../hooks/useLanguage";
@@ -29,6 +29,9 @@ const TicketsList = () => {
         tickets,
         isSuperuser(),
     );
+    // resolved tickets and the stats they were loaded for
+    const resolvedRef = useRef([]);
+    const resolvedKeyRef = useRef(null);
 
     useEffect(() => {
         loadTickets();
@@ -42,12 +45,12 @@ const TicketsList = () => {
 
         const handleVisibilityChange = () => {
             if (!document.hidden) {
-                loadTickets();
+                loadTickets(true);
             }
         };
 
         const handleFocus = () => {
-            loadTickets();
+            loadTickets(true);
         };
 
         document.addEventListener("visibilitychange", handleVisibilityChange);
@@ -63,9 +66,36 @@ const TicketsList = () => {
         };
     }, []);
 
-    const loadTickets = async () => {
+    const loadSuperuserTickets = async (refreshResolved) => {
+        // open tickets are served from the server's in-memory model; the
+        // resolved ones are only read again when their count or latest
+        // closing date changes (or the window regains focus)
+        const [open, stats] = await Promise.all([
+            apiClient.getTickets({ estado: "abierto,en_proceso" }),
+            apiClient.getTicketStats(),
+        ]);
+        const resolvedKey = JSON.stringify(stats.resueltos);
+        if (refreshResolved || resolvedKey !== resolvedKeyRef.current) {
+            resolvedRef.current = await apiClient.getTickets({
+                estado: "resuelto",
+            });
+            resolvedKeyRef.current = resolvedKey;
+        }
+        // a ticket resolved between both requests keeps its newer copy
+        const byId = new Map();
+        [...open, ...resolvedRef.current].forEach((ticket) =>
+            byId.set(ticket.id, ticket),
+        );
+        return [...byId.values()].sort(
+            (a, b) => new Date(b.fecha_creacion) - new Date(a.fecha_creacion),
+        );
+    };
+
+    const loadTickets = async (refreshResolved = false) => {
         try {
-            const data = await apiClient.getTickets();
+            const data = isSuperuser()
+                ? await loadSuperuserTickets(refreshResolved)
+                : await apiClient.getTickets();
             setTickets(data);
             setError(null);
         } catch (err) {
@@ -3,14 +3,14 @@ from django.contrib import admin
 # Register your models here.
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import Usuario, Departamento, Motivo, Cerrador, Ticket
+from .models import Usuario, Departamento, Motivo, Cerrador, Ticket, TrabajoReporte, ImagenSolucion
 
 
 @admin.register(Departamento)
 class DepartamentoAdmin(admin.ModelAdmin):
-    list_display = ['nombre', 'gerente', 'email', 'activo']
+    list_display = ['nombre', 'nombre_en', 'gerente', 'email', 'activo']
     list_filter = ['activo']
-    search_fields = ['nombre', 'gerente', 'email']
+    search_fields = ['nombre', 'nombre_en', 'gerente', 'email']
     ordering = ['nombre']
 
 
@@ -66,3 +66,20 @@ class TicketAdmin(admin.ModelAdmin):
             'fields': ('fecha_creacion', 'fecha_cierre', 'cerrado_por')
         }),
     )
+
+
+@admin.register(TrabajoReporte)
+class TrabajoReporteAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tipo', 'estado', 'usuario', 'fecha_creacion', 'fecha_inicio', 'fecha_fin']
+    list_filter = ['tipo', 'estado']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['id', 'tipo', 'parametros', 'estado', 'usuario', 'archivo', 'nombre_descarga',
+                       'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin']
+
+
+@admin.register(ImagenSolucion)
+class ImagenSolucionAdmin(admin.ModelAdmin):
+    list_display = ['hash', 'archivo', 'tamano', 'referencias', 'fecha_creacion']
+    list_filter = ['referencias']
+    ordering = ['-fecha_creacion']
+    readonly_fields = ['hash', 'archivo', 'tamano', 'referencias', 'fecha_creacion']
@@ -5,10 +5,21 @@ from .api_views import (
     logout_view,
     registro_view,
     verificar_usuario,
+    estado_cache_tokens,
+    estado_listo,
+    perfil_peticion,
     cambiar_password,
     generar_pdf_estadisticas,
+    generar_pdf_libro,
     generar_pdf_ticket,
+    exportar_pdfs_tickets,
+    trabajos_reporte,
+    detalle_trabajo_reporte,
+    descargar_trabajo_reporte,
     upload_image,
+    crear_subida,
+    sesion_subida,
+    finalizar_subida,
     DepartamentoViewSet,
     MotivoViewSet,
     CerradorViewSet,
@@ -27,8 +38,19 @@ urlpatterns = [
     path('registro/', registro_view, name='api_registro'),
     path('verificar-usuario/', verificar_usuario, name='verificar_usuario'),
     path('cambiar-password/', cambiar_password, name='cambiar_password'),
+    path('estado/cache-tokens/', estado_cache_tokens, name='estado_cache_tokens'),
+    path('estado/listo/', estado_listo, name='estado_listo'),
+    path('perfiles/<str:perfil_id>/', perfil_peticion, name='perfil_peticion'),
     path('upload-image/', upload_image, name='upload_image'),
+    path('subidas/', crear_subida, name='crear_subida'),
+    path('subidas/<uuid:sesion_id>/', sesion_subida, name='sesion_subida'),
+    path('subidas/<uuid:sesion_id>/finalizar/', finalizar_subida, name='finalizar_subida'),
     path('reportes/pdf-estadisticas/', generar_pdf_estadisticas, name='pdf_estadisticas'),
+    path('reportes/pdf-libro/', generar_pdf_libro, name='pdf_libro'),
     path('reportes/pdf-ticket/<int:ticket_id>/', generar_pdf_ticket, name='pdf_ticket'),
+    path('reportes/pdf-tickets-zip/', exportar_pdfs_tickets, name='pdf_tickets_zip'),
+    path('reportes/trabajos/', trabajos_reporte, name='trabajos_reporte'),
+    path('reportes/trabajos/<uuid:trabajo_id>/', detalle_trabajo_reporte, name='detalle_trabajo_reporte'),
+    path('reportes/trabajos/<uuid:trabajo_id>/descargar/', descargar_trabajo_reporte, name='descargar_trabajo_reporte'),
     path('', include(router.urls)),
 ]
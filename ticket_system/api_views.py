@@ -2,27 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
 from django.contrib.auth import authenticate
-from django.utils import timezone
-from django.http import HttpResponse
-from django.db.models import Count, Q
-from datetime import timedelta
+from django.utils import timezone, translation
+from django.utils.dateparse import parse_date
+from django.core.files import File
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+import logging
 import os
-from io import BytesIO
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
-from reportlab.platypus.flowables import Flowable
-from reportlab.graphics.shapes import Drawing
-from reportlab.graphics.charts.barcharts import VerticalBarChart, HorizontalBarChart
-from reportlab.graphics.charts.piecharts import Pie
-from reportlab.graphics.charts.legends import Legend
+import time
+from datetime import timedelta
 from django.conf import settings
-from .models import Usuario, Departamento, Motivo, Cerrador, Ticket
+from django.db.models import Count, Max
+from .models import Usuario, Departamento, Motivo, Cerrador, Ticket, TrabajoReporte, ImagenSolucion, SesionSubida
 from .serializers import (
     UsuarioSerializer,
     UsuarioRegistroSerializer,
@@ -30,7 +22,22 @@ from .serializers import (
     MotivoSerializer,
     CerradorSerializer,
     TicketSerializer,
-    TicketCreateSerializer
+    TicketCreateSerializer,
+    TrabajoReporteSerializer
+)
+from . import (
+    authentication, chunked_upload, image_pipeline, metrics, profiling, read_model, report_jobs, report_store,
+    sla, warmup,
+)
+from .cache_utils import ListaVersionadaMixin, get_version
+from .single_flight import Coalescedor
+from .token_activity import obtener_token
+from .report_batch import filtrar_tickets, iter_pdfs, iter_zip
+from .report_data import (
+    obtener_datos_estadisticas,
+    obtener_datos_ticket,
+    obtener_encabezado_libro,
+    iter_filas_libro,
 )
 from .email_utils import (
     send_ticket_created_email_to_user,
@@ -39,43 +46,7 @@ from .email_utils import (
     send_ticket_priority_updated_email
 )
 
-
-class LogoHeader(Flowable):
-    def __init__(self, width, height, logo_path=None):
-        Flowable.__init__(self)
-        self.width = width
-        self.height = height
-        self.logo_path = logo_path
-
-    def draw(self):
-        canvas = self.canv
-
-        if self.logo_path and os.path.exists(self.logo_path):
-            logo_width = 2.5 * inch
-            logo_height = 0.7 * inch
-            x_position = 0.5 * inch
-            y_position = self.height - logo_height - 0.2 * inch
-
-            canvas.drawImage(
-                self.logo_path,
-                x_position,
-                y_position,
-                width=logo_width,
-                height=logo_height,
-                preserveAspectRatio=True,
-                mask='auto'
-            )
-
-            # canvas.setFillColor(colors.HexColor('#6b7280'))
-            # canvas.setFont('Helvetica', 9)
-            # canvas.drawString(x_position, y_position - 0.25 * inch, 'Sistema de Gestión de Tickets')
-        else:
-            canvas.setFillColor(colors.HexColor('#2563eb'))
-            canvas.setFont('Helvetica-Bold', 24)
-            canvas.drawString(0.5 * inch, self.height - 0.5 * inch, 'COFATECH')
-            # canvas.setFont('Helvetica', 9)
-            # canvas.setFillColor(colors.HexColor('#6b7280'))
-            # canvas.drawString(0.5 * inch, self.height - 0.7 * inch, 'Sistema de Gestión de Tickets')
+logger = logging.getLogger(__name__)
 
 
 @api_view(['POST'])
@@ -99,10 +70,11 @@ def login_view(request):
             user.rol = 'superuser'
             user.save()
 
-        token, created = Token.objects.get_or_create(user=user)
+        token = obtener_token(user)
         try:
             serialized_data = UsuarioSerializer(user).data
         except Exception as e:
+            logger.exception("Error serializando el usuario %s", user.pk)
             return Response({'error': f'Error al procesar datos del usuario: {str(e)}'},
                             status=status.HTTP_400_BAD_REQUEST)
 
@@ -130,7 +102,7 @@ def registro_view(request):
 
     if serializer.is_valid():
         usuario = serializer.save()
-        token, created = Token.objects.get_or_create(user=usuario)
+        token = obtener_token(usuario)
 
         return Response({
             'token': token.key,
@@ -141,9 +113,10 @@ def registro_view(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class DepartamentoViewSet(viewsets.ReadOnlyModelViewSet):
+class DepartamentoViewSet(ListaVersionadaMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Departamento.objects.filter(activo=True)
     serializer_class = DepartamentoSerializer
+    cache_publica = True
 
     def get_permissions(self):
         if self.action == 'list':
@@ -151,10 +124,11 @@ class DepartamentoViewSet(viewsets.ReadOnlyModelViewSet):
         return [IsAuthenticated()]
 
 
-class MotivoViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Motivo.objects.all()
+class MotivoViewSet(ListaVersionadaMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Motivo.objects.select_related('departamento')
     serializer_class = MotivoSerializer
     permission_classes = [IsAuthenticated]
+    parametros_cache = ('departamento',)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -164,12 +138,16 @@ class MotivoViewSet(viewsets.ReadOnlyModelViewSet):
         return queryset
 
 
-class CerradorViewSet(viewsets.ReadOnlyModelViewSet):
+class CerradorViewSet(ListaVersionadaMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Cerrador.objects.filter(activo=True)
     serializer_class = CerradorSerializer
     permission_classes = [IsAuthenticated]
 
 
+# identical ticket lists requested at the same time are computed once
+listas_tickets = Coalescedor()
+
+
 class TicketViewSet(viewsets.ModelViewSet):
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
@@ -177,8 +155,98 @@ class TicketViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.rol == 'superuser':
-            return Ticket.objects.all()
-        return Ticket.objects.filter(usuario=user)
+            queryset = Ticket.objects.all()
+        else:
+            queryset = Ticket.objects.filter(usuario=user)
+        if self.action == 'list':
+            estados, prioridad, departamento_id = self._filtros()
+            if estados:
+                queryset = queryset.filter(estado__in=estados)
+            if prioridad:
+                queryset = queryset.filter(prioridad=prioridad)
+            if departamento_id is not None:
+                queryset = queryset.filter(departamento_id=departamento_id)
+        return queryset
+
+    def _filtros(self):
+        """``?estado=abierto,en_proceso&prioridad=alta&departamento=3``"""
+        params = self.request.query_params
+        estados = [e for e in params.get('estado', '').split(',') if e]
+        departamento = params.get('departamento')
+        try:
+            departamento_id = int(departamento) if departamento else None
+        except ValueError:
+            departamento_id = 0  # matches nothing, like an unknown id
+        return estados, params.get('prioridad') or None, departamento_id
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == 'json' and request.user.rol == 'superuser':
+            # open tickets are answered from memory when the model is current
+            contenido = read_model.modelo.listar(*self._filtros())
+            if contenido is not None:
+                return HttpResponse(contenido, content_type='application/json')
+
+        ttl = settings.TICKET_LIST_COALESCE_SECONDS
+        if not ttl or request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+
+        # every superuser sees the same set, so they all share one key
+        visibles = 'todos' if request.user.rol == 'superuser' else request.user.pk
+        clave = (get_version('tickets'), visibles, translation.get_language(),
+                 tuple(sorted((nombre, tuple(valores)) for nombre, valores in request.query_params.lists())))
+
+        def calcular():
+            return JSONRenderer().render(super(TicketViewSet, self).list(request, *args, **kwargs).data)
+
+        return HttpResponse(listas_tickets.hacer(clave, calcular, ttl), content_type='application/json')
+
+    @action(detail=False, methods=['get'])
+    def estadisticas(self, request):
+        if request.user.rol != 'superuser':
+            return Response({'error': 'No tienes permisos para ver las estadísticas'},
+                            status=status.HTTP_403_FORBIDDEN)
+        datos = read_model.modelo.estadisticas()
+        if datos is None:
+            filas = Ticket.objects.exclude(estado='resuelto').values_list(
+                'estado', 'prioridad', 'departamento_id', 'fecha_creacion'
+            )
+            datos = read_model.resumir(filas.iterator())
+        # resolved tickets never live in the model; the admin page reloads
+        # them only when this changes
+        resueltos = Ticket.objects.filter(estado='resuelto').aggregate(
+            total=Count('id'), ultimo_cierre=Max('fecha_cierre'))
+        datos['resueltos'] = {
+            'total': resueltos['total'],
+            'ultimo_cierre': resueltos['ultimo_cierre'].isoformat() if resueltos['ultimo_cierre'] else None,
+        }
+        return Response(datos)
+
+    @action(detail=False, methods=['get'], url_path='sla', url_name='sla')
+    def percentiles_sla(self, request):
+        """p50/p90/p99 resolution time in seconds by department, motivo and priority.
+
+        ``?por=departamento,prioridad`` limits the dimensions; ``desde`` and
+        ``hasta`` (``AAAA-MM-DD``) filter on the closing date.
+        """
+        if request.user.rol != 'superuser':
+            return Response({'error': 'No tienes permisos para ver las estadísticas'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        fechas = {}
+        for campo in ('desde', 'hasta'):
+            valor = request.query_params.get(campo)
+            fechas[campo] = parse_date(valor) if valor else None
+            if valor and fechas[campo] is None:
+                return Response({'error': f'Fecha inválida: {valor}'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        por = [d for d in request.query_params.get('por', '').split(',') if d] or list(sla.DIMENSIONES)
+        invalidas = [d for d in por if d not in sla.DIMENSIONES]
+        if invalidas:
+            return Response({'error': f"Dimensión inválida: {', '.join(invalidas)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(sla.obtener_sla(_idioma_reporte(request), dimensiones=por, **fechas))
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -272,15 +340,11 @@ class TicketViewSet(viewsets.ModelViewSet):
         return Response(TicketSerializer(ticket).data)
 
 
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def generar_pdf_estadisticas(request):
-    if request.user.rol != 'superuser':
-        return Response({'error': 'No tienes permisos para generar reportes'},
-                        status=status.HTTP_403_FORBIDDEN)
-
-    # determine language by query parameter first, then Accept-Language header
+def _idioma_reporte(request):
+    """Report language: ``lang`` parameter first, then Accept-Language."""
     lang = request.GET.get('lang')
+    if not lang and request.method == 'POST':
+        lang = request.data.get('lang')
     if not lang:
         header = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
         if header:
@@ -288,272 +352,70 @@ def generar_pdf_estadisticas(request):
             lang = header.split(',')[0].split('-')[0]
     if lang not in ('es', 'en'):
         lang = 'es'
-    # simple translations for static text used in the report
-    translations = {
-        'es': {
-            'title': 'Reporte Semanal de Tickets',
-            'period': 'Periodo:',
-            'tickets_by_reason': 'Tickets por Motivo',
-            'tickets_by_dept': 'Tickets por Departamento',
-            'users_most_tickets': 'Usuarios con Más Tickets',
-            'tickets_by_priority': 'Tickets por Prioridad',
-            'no_dept': 'Sin dept.',
-            'priority_names': {
-                'baja': 'Baja',
-                'media': 'Media',
-                'alta': 'Alta',
-                'urgente': 'Urgente'
-            },
-            # departments only really needed for english but include empty dict
-            'department_names': {}
-        },
-        'en': {
-            'title': 'Weekly Ticket Report',
-            'period': 'Period:',
-            'tickets_by_reason': 'Tickets by Reason',
-            'tickets_by_dept': 'Tickets by Department',
-            'users_most_tickets': 'Users with Most Tickets',
-            'tickets_by_priority': 'Tickets by Priority',
-            'no_dept': 'No dept.',
-            'priority_names': {
-                'baja': 'Low',
-                'media': 'Medium',
-                'alta': 'High',
-                'urgente': 'Urgent'
-            },
-            'department_names': {
-                'Calidad': 'Quality',
-                'Finanzas': 'Finance',
-                'Compras': 'Purchasing',
-                'Ventas': 'Sales',
-                'Ingenieria': 'Engineering',
-                'Logistica': 'Logistics',
-                'Recursos Humanos': 'Human Resources',
-                'Tecnologias de la Informacion': 'Information Technology',
-                'Mantenimiento': 'Maintenance',
-                'Produccion': 'Production'
-            }
-        }
-    }
-    txt = translations.get(lang, translations['es'])
+    return lang
 
-    pdf_dir = os.path.join(settings.BASE_DIR, 'reportes_pdf', 'semanales')
-    os.makedirs(pdf_dir, exist_ok=True)
 
-    filename = f"reporte_tickets_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    pdf_path = os.path.join(pdf_dir, filename)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def generar_pdf_estadisticas(request):
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para generar reportes'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    lang = _idioma_reporte(request)
 
-    elements = []
-    styles = getSampleStyleSheet()
+    # ReportLab is imported on the first report, not when the worker starts
+    from .pdf_reports import render_estadisticas_pdf
 
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#2563eb'),
-        spaceAfter=6,
-        alignment=TA_CENTER
-    )
+    filename = f"reporte_tickets_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    with metrics.medir(metrics.duracion_pdf, reporte='estadisticas'):
+        pdf_content = render_estadisticas_pdf(obtener_datos_estadisticas(lang))
+    pdf_path = report_store.guardar(pdf_content, 'semanales')
+    return report_store.respuesta(pdf_path, filename)
 
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=12,
-        textColor=colors.HexColor('#1e40af'),
-        spaceAfter=10,
-        spaceBefore=12,
-        alignment=TA_CENTER
-    )
 
-    fecha_inicio = timezone.now() - timedelta(days=7)
-    tickets_semana = Ticket.objects.filter(fecha_creacion__gte=fecha_inicio)
-    todos_tickets = Ticket.objects.all()
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def generar_pdf_libro(request):
+    """Ledger with every ticket created between ``desde`` and ``hasta``.
 
-    logo_path = os.path.join(settings.BASE_DIR, 'client', 'public', 'image.png')
-    logo_header = LogoHeader(7.5 * inch, 60, logo_path)
-    elements.append(logo_header)
-    elements.append(Spacer(1, 0.15 * inch))
+    Both dates are ``AAAA-MM-DD`` and default to the last 30 days. The
+    render time and throughput are returned in ``X-Render-*`` headers.
+    """
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para generar reportes'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-    title = Paragraph(txt['title'], title_style)
-    elements.append(title)
+    hoy = timezone.localdate()
+    fechas = {}
+    for campo, defecto in (('desde', hoy - timedelta(days=30)), ('hasta', hoy)):
+        valor = request.GET.get(campo)
+        fechas[campo] = parse_date(valor) if valor else defecto
+        if fechas[campo] is None:
+            return Response({'error': f'Fecha inválida: {valor}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+    if fechas['desde'] > fechas['hasta']:
+        return Response({'error': 'La fecha inicial es posterior a la final'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=9,
-        alignment=TA_CENTER
-    )
-    subtitle = Paragraph(
-        f"{txt['period']} {fecha_inicio.strftime('%d/%m/%Y')} - {timezone.now().strftime('%d/%m/%Y')}",
-        subtitle_style
+    lang = _idioma_reporte(request)
+
+    from .pdf_reports import render_libro_pdf
+
+    inicio = time.perf_counter()
+    pdf_content, paginas = render_libro_pdf(
+        obtener_encabezado_libro(fechas['desde'], fechas['hasta'], lang),
+        iter_filas_libro(fechas['desde'], fechas['hasta'], lang),
     )
-    elements.append(subtitle)
-    elements.append(Spacer(1, 0.2 * inch))
-
-    dept_stats = todos_tickets.values('usuario__departamento__nombre').annotate(
-        total=Count('id')
-    ).order_by('-total')[:5]
-
-    user_stats = todos_tickets.values('usuario__username', 'usuario__first_name', 'usuario__last_name').annotate(
-        total=Count('id')
-    ).order_by('-total')[:5]
-
-    # include the motivo id so we can look up the object later and
-    # obtain a translated name instead of the raw Spanish field value.
-    motivo_stats = todos_tickets.filter(motivo__isnull=False).values('motivo__id', 'motivo__nombre').annotate(
-        total=Count('id')
-    ).order_by('-total')
-
-    prioridad_stats = todos_tickets.values('prioridad').annotate(total=Count('id')).order_by('-total')
-    # use translated priority names
-    prioridad_nombres = txt.get('priority_names', {
-        'baja': 'Baja',
-        'media': 'Media',
-        'alta': 'Alta',
-        'urgente': 'Urgente'
-    })
-
-    drawing_dept = Drawing(310, 210)
-    if dept_stats:
-        bc_dept = HorizontalBarChart()
-        bc_dept.x = 100
-        bc_dept.y = 30
-        bc_dept.height = 150
-        bc_dept.width = 190
-        dept_names = [stat['usuario__departamento__nombre'] or txt['no_dept'] for stat in dept_stats]
-        # translate department names when running English report
-        if lang.startswith('en'):
-            dept_names = [txt['department_names'].get(name, name) for name in dept_names]
-        dept_values = [[stat['total'] for stat in dept_stats]]
-        bc_dept.data = dept_values
-        bc_dept.categoryAxis.categoryNames = dept_names
-        bc_dept.categoryAxis.labels.fontSize = 8
-        bc_dept.valueAxis.valueMin = 0
-        bc_dept.valueAxis.valueMax = max(dept_values[0]) * 1.2
-        bc_dept.valueAxis.labels.fontSize = 8
-        bc_dept.bars[0].fillColor = colors.HexColor('#3b82f6')
-        bc_dept.barWidth = 15
-        drawing_dept.add(bc_dept)
-
-    drawing_users = Drawing(310, 210)
-    if user_stats:
-        bc_users = HorizontalBarChart()
-        bc_users.x = 100
-        bc_users.y = 30
-        bc_users.height = 150
-        bc_users.width = 190
-        user_names = []
-        for stat in user_stats:
-            nombre = f"{stat['usuario__first_name']} {stat['usuario__last_name']}".strip()
-            if not nombre:
-                nombre = stat['usuario__username']
-            if len(nombre) > 15:
-                nombre = nombre[:12] + '...'
-            user_names.append(nombre)
-        user_values = [[stat['total'] for stat in user_stats]]
-        bc_users.data = user_values
-        bc_users.categoryAxis.categoryNames = user_names
-        bc_users.categoryAxis.labels.fontSize = 8
-        bc_users.valueAxis.valueMin = 0
-        bc_users.valueAxis.valueMax = max(user_values[0]) * 1.2
-        bc_users.valueAxis.labels.fontSize = 8
-        bc_users.bars[0].fillColor = colors.HexColor('#10b981')
-        bc_users.barWidth = 15
-        drawing_users.add(bc_users)
-
-    drawing_motivos = Drawing(310, 210)
-    if motivo_stats.count() > 0:
-        pie_motivo = Pie()
-        pie_motivo.x = 90
-        pie_motivo.y = 45
-        pie_motivo.width = 130
-        pie_motivo.height = 130
-        # compute a translated label list by looking up motive objects
-        motivo_labels = []
-        for stat in motivo_stats:
-            label = stat['motivo__nombre']
-            if lang.startswith('en'):
-                try:
-                    motivo_obj = Motivo.objects.get(id=stat['motivo__id'])
-                    label = motivo_obj.get_nombre_por_idioma()
-                except Motivo.DoesNotExist:
-                    pass
-            motivo_labels.append(label)
-        motivo_values = [stat['total'] for stat in motivo_stats]
-        pie_motivo.data = motivo_values
-        pie_motivo.labels = motivo_labels
-        pie_motivo.slices.strokeWidth = 0.5
-        pie_motivo.slices.fontSize = 9
-        colores = [
-            colors.HexColor('#3b82f6'),
-            colors.HexColor('#10b981'),
-            colors.HexColor('#f59e0b'),
-            colors.HexColor('#ef4444'),
-            colors.HexColor('#8b5cf6'),
-            colors.HexColor('#ec4899'),
-        ]
-        for i in range(len(motivo_values)):
-            pie_motivo.slices[i].fillColor = colores[i % len(colores)]
-        drawing_motivos.add(pie_motivo)
-
-    drawing_prioridad = Drawing(310, 210)
-    if prioridad_stats.count() > 0:
-        pie_prioridad = Pie()
-        pie_prioridad.x = 90
-        pie_prioridad.y = 45
-        pie_prioridad.width = 130
-        pie_prioridad.height = 130
-        prioridad_labels = [prioridad_nombres.get(stat['prioridad'], stat['prioridad']) for stat in prioridad_stats]
-        prioridad_values = [stat['total'] for stat in prioridad_stats]
-        pie_prioridad.data = prioridad_values
-        pie_prioridad.labels = prioridad_labels
-        pie_prioridad.slices.strokeWidth = 0.5
-        pie_prioridad.slices.fontSize = 9
-        prioridad_colores = {
-            'Baja': colors.HexColor('#3b82f6'),
-            'Media': colors.HexColor('#f59e0b'),
-            'Alta': colors.HexColor('#fb923c'),
-            'Urgente': colors.HexColor('#ef4444')
-        }
-        for i, label in enumerate(prioridad_labels):
-            pie_prioridad.slices[i].fillColor = prioridad_colores.get(label, colors.gray)
-        drawing_prioridad.add(pie_prioridad)
-
-    tabla_graficas = Table([
-        [Paragraph(txt['tickets_by_reason'], heading_style), Paragraph(txt['tickets_by_dept'], heading_style)],
-        [drawing_motivos, drawing_dept],
-        [Paragraph(txt['users_most_tickets'], heading_style), Paragraph(txt['tickets_by_priority'], heading_style)],
-        [drawing_users, drawing_prioridad],
-    ], colWidths=[310, 310])
-
-    tabla_graficas.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 0),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-        ('TOPPADDING', (0, 0), (-1, -1), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
-        ('TOPPADDING', (0, 0), (-1, 0), 0),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('TOPPADDING', (0, 2), (-1, 2), 12),
-        ('BOTTOMPADDING', (0, 2), (-1, 2), 8),
-    ]))
-
-    elements.append(tabla_graficas)
-
-    doc.build(elements)
-
-    pdf_content = buffer.getvalue()
-    buffer.close()
-
-    with open(pdf_path, 'wb') as f:
-        f.write(pdf_content)
-
-    response = HttpResponse(pdf_content, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    duracion = time.perf_counter() - inicio
+    metrics.duracion_pdf.observar(duracion, reporte='libro')
+
+    filename = f"libro_tickets_{fechas['desde']:%Y%m%d}_{fechas['hasta']:%Y%m%d}.pdf"
+    pdf_path = report_store.guardar(pdf_content, 'libros')
+    response = report_store.respuesta(pdf_path, filename)
+    response['X-Render-Time'] = f"{duracion:.3f}"
+    response['X-Render-Pages'] = str(paginas)
+    response['X-Render-Pages-Per-Second'] = f"{paginas / duracion:.1f}" if duracion else '0'
     return response
 
 
@@ -565,296 +427,189 @@ def generar_pdf_ticket(request, ticket_id):
                         status=status.HTTP_403_FORBIDDEN)
 
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        ticket = Ticket.objects.select_related('usuario__departamento', 'motivo').get(id=ticket_id)
     except Ticket.DoesNotExist:
         return Response({'error': 'Ticket no encontrado'},
                         status=status.HTTP_404_NOT_FOUND)
 
-    # same fallback mechanism for individual ticket pdf
-    lang = request.GET.get('lang')
-    if not lang:
-        header = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
-        if header:
-            lang = header.split(',')[0].split('-')[0]
-    if lang not in ('es', 'en'):
-        lang = 'es'
+    lang = _idioma_reporte(request)
 
-    from django.utils import translation
-    translation.activate(lang)
-
-    translations = {
-        'es': {
-            'title': 'Detalles del Ticket',
-            'generated': 'Generado el',
-            'at': 'a las',
-            'field': 'Campo',
-            'information': 'Información',
-            'subject': 'Asunto',
-            'status': 'Estado',
-            'priority': 'Prioridad',
-            'created_by': 'Creado por',
-            'department': 'Departamento',
-            'reason': 'Motivo',
-            'creation_date': 'Fecha de creación',
-            'resolution_time': 'Tiempo de resolución',
-            'pending': 'Pendiente',
-            'close_date': 'Fecha de cierre',
-            'description': 'Descripción del Ticket',
-            'day': 'día',
-            'days': 'días',
-            'hour': 'hora',
-            'hours': 'horas',
-            'minute': 'minuto',
-            'minutes': 'minutos',
-            'status_open': 'Abierto',
-            'status_in_progress': 'En Proceso',
-            'status_resolved': 'Resuelto',
-            'priority_low': 'Baja',
-            'priority_medium': 'Media',
-            'priority_high': 'Alta',
-            'priority_urgent': 'Urgente',
-            'department_names': {}
-        },
-        'en': {
-            'title': 'Ticket Details',
-            'generated': 'Generated on',
-            'at': 'at',
-            'field': 'Field',
-            'information': 'Information',
-            'subject': 'Subject',
-            'status': 'Status',
-            'priority': 'Priority',
-            'created_by': 'Created by',
-            'department': 'Department',
-            'reason': 'Reason',
-            'creation_date': 'Creation date',
-            'resolution_time': 'Resolution time',
-            'pending': 'Pending',
-            'close_date': 'Close date',
-            'description': 'Ticket Description',
-            'day': 'day',
-            'days': 'days',
-            'hour': 'hour',
-            'hours': 'hours',
-            'minute': 'minute',
-            'minutes': 'minutes',
-            'status_open': 'Open',
-            'status_in_progress': 'In Progress',
-            'status_resolved': 'Resolved',
-            'priority_low': 'Low',
-            'priority_medium': 'Medium',
-            'priority_high': 'High',
-            'priority_urgent': 'Urgent',
-            'department_names': {
-                'Calidad': 'Quality',
-                'Finanzas': 'Finance',
-                'Compras': 'Purchasing',
-                'Ventas': 'Sales',
-                'Ingenieria': 'Engineering',
-                'Logistica': 'Logistics',
-                'Recursos Humanos': 'Human Resources',
-                'Tecnologias de la Informacion': 'Information Technology',
-                'Mantenimiento': 'Maintenance',
-                'Produccion': 'Production'
-            }
-        }
-    }
+    from .pdf_reports import render_ticket_pdf
 
-    t = translations.get(lang, translations['es'])
+    filename = f"ticket_{ticket.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    with metrics.medir(metrics.duracion_pdf, reporte='ticket'):
+        pdf_content = render_ticket_pdf(obtener_datos_ticket(ticket, lang))
+    pdf_path = report_store.guardar(pdf_content, 'tickets')
+    return report_store.respuesta(pdf_path, filename)
 
-    pdf_dir = os.path.join(settings.BASE_DIR, 'reportes_pdf', 'tickets')
-    os.makedirs(pdf_dir, exist_ok=True)
 
-    filename = f"ticket_{ticket.id}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    pdf_path = os.path.join(pdf_dir, filename)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def exportar_pdfs_tickets(request):
+    """Stream a ZIP with one PDF per selected ticket.
 
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40)
+    Tickets are chosen with ``?ids=1,2,3`` and/or the ``estado``,
+    ``prioridad``, ``departamento``, ``desde`` and ``hasta`` filters.
+    """
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para generar reportes'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-    elements = []
-    styles = getSampleStyleSheet()
+    ids = [i for i in request.GET.get('ids', '').split(',') if i.strip()]
+    try:
+        tickets = filtrar_tickets(
+            ids=ids,
+            estado=request.GET.get('estado'),
+            prioridad=request.GET.get('prioridad'),
+            departamento=request.GET.get('departamento'),
+            desde=request.GET.get('desde'),
+            hasta=request.GET.get('hasta'),
+        )
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    total = tickets.count()
+    if total == 0:
+        return Response({'error': 'Ningún ticket coincide con el filtro'},
+                        status=status.HTTP_404_NOT_FOUND)
+    if total > settings.REPORT_BATCH_MAX_TICKETS:
+        return Response({'error': f'Máximo {settings.REPORT_BATCH_MAX_TICKETS} tickets por exportación'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#2563eb'),
-        spaceAfter=12,
-        alignment=TA_CENTER
-    )
+    lang = _idioma_reporte(request)
+    filename = f"tickets_{timezone.now().strftime('%Y%m%d_%H%M%S')}.zip"
 
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        textColor=colors.HexColor('#1e40af'),
-        spaceAfter=8,
-        spaceBefore=12,
-        alignment=TA_LEFT
-    )
+    response = StreamingHttpResponse(iter_zip(iter_pdfs(tickets, lang)), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
-    body_style = ParagraphStyle(
-        'BodyText',
-        parent=styles['Normal'],
-        fontSize=11,
-        alignment=TA_LEFT,
-        spaceAfter=6
-    )
 
-    logo_path = os.path.join(settings.BASE_DIR, 'client', 'public', 'image.png')
-    logo_header = LogoHeader(7.5 * inch, 60, logo_path)
-    elements.append(logo_header)
-    elements.append(Spacer(1, 0.15 * inch))
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def trabajos_reporte(request):
+    """List the report queue (GET) or submit a report job (POST)."""
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para generar reportes'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-    title = Paragraph(f"{ticket.asunto}", title_style)
-    elements.append(title)
+    if request.method == 'GET':
+        trabajos = TrabajoReporte.objects.select_related('usuario')[:50]
+        return Response({
+            'cola': report_jobs.estado_cola(),
+            'trabajos': TrabajoReporteSerializer(trabajos, many=True).data,
+        })
 
-    subtitle_style = ParagraphStyle(
-        'Subtitle',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#6b7280')
-    )
+    tipo = request.data.get('tipo')
+    if tipo not in dict(TrabajoReporte.TIPO_CHOICES):
+        return Response({'error': 'Tipo de reporte inválido'},
+                        status=status.HTTP_400_BAD_REQUEST)
 
-    now = timezone.localtime(timezone.now())
-    if lang == 'en':
-        date_format = now.strftime('%m/%d/%Y at %I:%M %p')
-    else:
-        date_format = now.strftime('%d/%m/%Y a las %H:%M')
+    if report_jobs.cola_llena():
+        return Response({'error': 'La cola de reportes está llena, intenta más tarde'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
-    subtitle = Paragraph(
-        f"{t['generated']} {date_format}",
-        subtitle_style
-    )
-    elements.append(subtitle)
-    elements.append(Spacer(1, 0.3 * inch))
-
-    status_translations = {
-        'abierto': t['status_open'],
-        'en_proceso': t['status_in_progress'],
-        'resuelto': t['status_resolved']
-    }
-
-    priority_translations = {
-        'baja': t['priority_low'],
-        'media': t['priority_medium'],
-        'alta': t['priority_high'],
-        'urgente': t['priority_urgent']
-    }
-
-    tiempo_resolucion = t['pending']
-    if ticket.estado == 'resuelto':
-        tiempo_transcurrido = timezone.now() - ticket.fecha_creacion
-        dias = tiempo_transcurrido.days
-        horas = tiempo_transcurrido.seconds // 3600
-        minutos = (tiempo_transcurrido.seconds % 3600) // 60
-
-        if dias > 0:
-            day_word = t['days'] if dias != 1 else t['day']
-            hour_word = t['hours'] if horas != 1 else t['hour']
-            tiempo_resolucion = f"{dias} {day_word}, {horas} {hour_word}"
-        elif horas > 0:
-            hour_word = t['hours'] if horas != 1 else t['hour']
-            minute_word = t['minutes'] if minutos != 1 else t['minute']
-            tiempo_resolucion = f"{horas} {hour_word}, {minutos} {minute_word}"
-        else:
-            minute_word = t['minutes'] if minutos != 1 else t['minute']
-            tiempo_resolucion = f"{minutos} {minute_word}"
+    lang = _idioma_reporte(request)
+    now = timezone.now()
 
-    if lang == 'en':
-        date_format_ticket = '%m/%d/%Y %I:%M %p'
+    if tipo == 'ticket':
+        try:
+            ticket = Ticket.objects.select_related('usuario__departamento', 'motivo').get(
+                id=request.data.get('ticket_id')
+            )
+        except (Ticket.DoesNotExist, ValueError, TypeError):
+            return Response({'error': 'Ticket no encontrado'},
+                            status=status.HTTP_404_NOT_FOUND)
+        datos = obtener_datos_ticket(ticket, lang, now=now)
+        parametros = {'ticket_id': ticket.id, 'lang': lang}
+        filename = f"ticket_{ticket.id}_{now.strftime('%Y%m%d_%H%M%S')}.pdf"
     else:
-        date_format_ticket = '%d/%m/%Y %H:%M'
-
-    # for the individual ticket PDF, translate department too
-    dept_label = ticket.usuario.departamento.nombre if ticket.usuario.departamento else 'N/A'
-    if lang.startswith('en') and ticket.usuario.departamento:
-        dept_label = translations['en']['department_names'].get(dept_label, dept_label)
-
-    fecha_creacion_local = timezone.localtime(ticket.fecha_creacion)
-
-    info_data = [
-        [t['field'], t['information']],
-        [t['subject'], ticket.asunto],
-        [t['status'], status_translations.get(ticket.estado, ticket.get_estado_display())],
-        [t['priority'], priority_translations.get(ticket.prioridad, ticket.get_prioridad_display())],
-        [t['created_by'], f"{ticket.usuario.first_name} {ticket.usuario.last_name}" if ticket.usuario.first_name else ticket.usuario.username],
-        [t['department'], dept_label],
-        [t['reason'], ticket.motivo.get_nombre_por_idioma() if ticket.motivo else 'N/A'],
-        [t['creation_date'], fecha_creacion_local.strftime(date_format_ticket)],
-        [t['resolution_time'], tiempo_resolucion],
-    ]
-
-    if ticket.fecha_cierre:
-        fecha_cierre_local = timezone.localtime(ticket.fecha_cierre)
-        info_data.append([t['close_date'], fecha_cierre_local.strftime(date_format_ticket)])
-
-    info_table = Table(info_data, colWidths=[2 * inch, 5 * inch])
-    info_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('TOPPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#f3f4f6')),
-        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db')),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 1), (-1, -1), 8),
-        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-    ]))
-
-    elements.append(info_table)
-    elements.append(Spacer(1, 0.3 * inch))
-
-    elements.append(Paragraph(t['description'], heading_style))
-    elements.append(Spacer(1, 0.1 * inch))
-
-    content_style = ParagraphStyle(
-        'ContentText',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_LEFT,
-        leftIndent=10,
-        rightIndent=10,
-        spaceAfter=6,
-        leading=14
-    )
+        datos = obtener_datos_estadisticas(lang, now=now)
+        parametros = {'lang': lang}
+        filename = f"reporte_tickets_{now.strftime('%Y%m%d_%H%M%S')}.pdf"
+
+    trabajo = report_jobs.encolar(tipo, datos, request.user, filename, parametros)
+    return Response(TrabajoReporteSerializer(trabajo).data, status=status.HTTP_202_ACCEPTED)
+
 
-    content_text = ticket.contenido.replace('\n', '<br/>')
-    content_paragraph = Paragraph(content_text, content_style)
+def _obtener_trabajo(request, trabajo_id):
+    if request.user.rol != 'superuser':
+        return None, Response({'error': 'No tienes permisos para generar reportes'},
+                              status=status.HTTP_403_FORBIDDEN)
+    try:
+        return TrabajoReporte.objects.get(pk=trabajo_id), None
+    except TrabajoReporte.DoesNotExist:
+        return None, Response({'error': 'Trabajo no encontrado'},
+                              status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def detalle_trabajo_reporte(request, trabajo_id):
+    """Job status; clients poll it until ``estado`` leaves ``pendiente``."""
+    trabajo, error = _obtener_trabajo(request, trabajo_id)
+    if error:
+        return error
+    return Response(TrabajoReporteSerializer(trabajo).data)
 
-    content_frame_data = [[content_paragraph]]
-    content_table = Table(content_frame_data, colWidths=[7 * inch])
-    content_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f9fafb')),
-        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db')),
-        ('LEFTPADDING', (0, 0), (-1, -1), 15),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 15),
-        ('TOPPADDING', (0, 0), (-1, -1), 15),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-    ]))
 
-    elements.append(content_table)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def descargar_trabajo_reporte(request, trabajo_id):
+    trabajo, error = _obtener_trabajo(request, trabajo_id)
+    if error:
+        return error
 
-    doc.build(elements)
+    if trabajo.estado == 'completado' and not os.path.exists(trabajo.archivo):
+        # removed outside podar_reportes (by hand, lost volume)
+        report_store.expirar_trabajos([trabajo.archivo])
+        trabajo.estado = 'expirado'
+    if trabajo.estado == 'expirado':
+        return Response({'error': 'El reporte ya no está disponible, genéralo de nuevo', 'estado': trabajo.estado},
+                        status=status.HTTP_410_GONE)
+    if trabajo.estado != 'completado':
+        return Response({'error': 'El reporte aún no está disponible', 'estado': trabajo.estado},
+                        status=status.HTTP_409_CONFLICT)
 
-    pdf_content = buffer.getvalue()
-    buffer.close()
+    return report_store.respuesta(trabajo.archivo, trabajo.nombre_descarga)
 
-    with open(pdf_path, 'wb') as f:
-        f.write(pdf_content)
 
-    response = HttpResponse(pdf_content, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return response
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def estado_listo(request):
+    """Readiness probe: 200 once this worker has finished its warm-up.
+
+    Only reports; the warm-up runs, and is retried, inside the worker.
+    """
+    listo = warmup.listo()
+    codigo = status.HTTP_200_OK if listo else status.HTTP_503_SERVICE_UNAVAILABLE
+    return Response({'listo': listo, 'pasos': warmup.estado()}, status=codigo)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def estado_cache_tokens(request):
+    """Hit rate of the token authentication cache in this worker."""
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para ver esta información'},
+                        status=status.HTTP_403_FORBIDDEN)
+    return Response(authentication.estadisticas())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def perfil_peticion(request, perfil_id):
+    """Report of a profiled request (``X-Profile-Id``); ``?formato=prof`` for pstats."""
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para ver perfiles'},
+                        status=status.HTTP_403_FORBIDDEN)
+    formato = request.GET.get('formato', 'txt')
+    path = profiling.ruta(perfil_id, formato) if formato in ('txt', 'prof') else None
+    if path is None or not path.is_file():
+        return Response({'error': 'Perfil no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    if formato == 'prof':
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
+    return HttpResponse(path.read_bytes(), content_type='text/plain; charset=utf-8')
 
 
 @api_view(['POST'])
@@ -911,27 +666,117 @@ def upload_image(request):
         return Response({'error': 'No se proporcionó ninguna imagen'},
                         status=status.HTTP_400_BAD_REQUEST)
 
-    imagen = request.FILES['imagen']
-    # Validar tipo de archivo
-    if not imagen.content_type in ['image/jpeg', 'image/png', 'image/gif']:
-        return Response({'error': 'Tipo de archivo no permitido. Solo imágenes JPEG, PNG o GIF'},
-                        status=status.HTTP_400_BAD_REQUEST)
+    return _guardar_imagen(request, request.FILES['imagen'])
+
+
+def _guardar_imagen(request, imagen):
+    """Validate, process and register an uploaded image; the API response."""
+    # Validar tamaño y tipo real del archivo (no el content_type del cliente)
+    try:
+        image_pipeline.validar(imagen)
+    except image_pipeline.ImagenInvalida as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Redimensionar y recodificar (sin metadatos) fuera del hilo de la petición;
+    # una imagen idéntica ya guardada se reutiliza sin procesarla
+    try:
+        digest, relativo, nueva = image_pipeline.procesar(imagen)
+    except TimeoutError:
+        return Response({'error': 'El procesamiento de la imagen tardó demasiado'},
+                        status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    registro, creada = ImagenSolucion.objects.get_or_create(
+        hash=digest, defaults={'archivo': relativo, 'tamano': imagen.size})
+    if not creada:
+        # restart the purge grace period: the client is about to reference it
+        ImagenSolucion.objects.filter(pk=registro.pk).update(fecha_creacion=timezone.now())
+
+    # Devolver URL completa de la imagen y de sus variantes
+    return _respuesta_imagen(request.build_absolute_uri(f"{settings.MEDIA_URL}{relativo}"))
+
+
+def _respuesta_imagen(url):
+    urls = image_pipeline.variantes(url)
+    return Response({'url': urls['original'], 'miniatura': urls['miniatura'], 'webp': urls['webp']})
+
+
+def _datos_sesion(sesion):
+    return {'id': str(sesion.id), 'tamano': sesion.tamano, 'recibido': sesion.recibido,
+            'estado': sesion.estado, 'url': sesion.url or None}
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def crear_subida(request):
+    """Start a resumable image upload: ``{"nombre": ..., "tamano": bytes}``."""
+    if request.user.rol != 'superuser':
+        return Response({'error': 'No tienes permisos para subir imágenes'},
+                        status=status.HTTP_403_FORBIDDEN)
 
-    # Crear directorio si no existe
-    upload_dir = os.path.join(settings.MEDIA_ROOT, 'soluciones')
-    os.makedirs(upload_dir, exist_ok=True)
+    try:
+        tamano = int(request.data.get('tamano'))
+    except (TypeError, ValueError):
+        return Response({'error': 'Tamaño inválido'}, status=status.HTTP_400_BAD_REQUEST)
+    if tamano <= 0:
+        return Response({'error': 'Tamaño inválido'}, status=status.HTTP_400_BAD_REQUEST)
+    if tamano > settings.IMAGE_UPLOAD_MAX_BYTES:
+        return Response({'error': f'La imagen supera el tamaño máximo de '
+                                  f'{settings.IMAGE_UPLOAD_MAX_BYTES // (1024 * 1024)} MB'},
+                        status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    sesion = chunked_upload.crear_sesion(request.user, request.data.get('nombre') or '', tamano)
+    return Response(_datos_sesion(sesion), status=status.HTTP_201_CREATED)
 
-    # Generar nombre único
-    import uuid
-    ext = os.path.splitext(imagen.name)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-    filepath = os.path.join(upload_dir, filename)
 
-    # Guardar archivo
-    with open(filepath, 'wb+') as destination:
-        for chunk in imagen.chunks():
-            destination.write(chunk)
+@api_view(['GET', 'PUT', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def sesion_subida(request, sesion_id):
+    """GET: offset to resume from. PUT: one chunk with ``Content-Range``. DELETE: cancel."""
+    try:
+        sesion = SesionSubida.objects.get(pk=sesion_id, usuario=request.user)
+    except SesionSubida.DoesNotExist:
+        return Response({'error': 'Sesión de subida no encontrada'},
+                        status=status.HTTP_404_NOT_FOUND)
 
-    # Devolver URL completa
-    image_url = request.build_absolute_uri(f"{settings.MEDIA_URL}soluciones/{filename}")
-    return Response({'url': image_url})
\ No newline at end of file
+    if request.method == 'GET':
+        return Response(_datos_sesion(sesion))
+
+    if request.method == 'DELETE':
+        chunked_upload.cancelar(sesion)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if sesion.estado != 'activa':
+        return Response(_datos_sesion(sesion), status=status.HTTP_409_CONFLICT)
+    try:
+        inicio, fin = chunked_upload.parse_content_range(request.META.get('HTTP_CONTENT_RANGE'), sesion.tamano)
+        # the body is read straight from the stream, never parsed or buffered
+        chunked_upload.escribir_fragmento(sesion, inicio, fin, request.stream)
+    except chunked_upload.OffsetIncorrecto as e:
+        return Response({'error': str(e), 'recibido': e.recibido}, status=status.HTTP_409_CONFLICT)
+    except chunked_upload.FragmentoInvalido as e:
+        return Response({'error': str(e), 'recibido': sesion.recibido}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(_datos_sesion(sesion))
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalizar_subida(request, sesion_id):
+    """Process a fully received upload as a solution image."""
+    try:
+        sesion = SesionSubida.objects.get(pk=sesion_id, usuario=request.user)
+    except SesionSubida.DoesNotExist:
+        return Response({'error': 'Sesión de subida no encontrada'},
+                        status=status.HTTP_404_NOT_FOUND)
+    if sesion.estado == 'completada':
+        return _respuesta_imagen(sesion.url)
+    if sesion.recibido != sesion.tamano:
+        return Response({'error': 'La subida no está completa', 'recibido': sesion.recibido},
+                        status=status.HTTP_409_CONFLICT)
+
+    with open(chunked_upload.ruta(sesion), 'rb') as f:
+        response = _guardar_imagen(request, File(f, name=sesion.nombre))
+    if response.status_code == status.HTTP_200_OK:
+        chunked_upload.completar(sesion, response.data['url'])
+    elif response.status_code == status.HTTP_400_BAD_REQUEST:
+        # not an image: nothing to resume
+        chunked_upload.cancelar(sesion)
+    return response
\ No newline at end of file
@@ -6,5 +6,6 @@ class TicketSystemConfig(AppConfig):
     name = 'ticket_system'
 
     def ready(self):
-        from tickets.db_init import create_database_if_not_exists
-        create_database_if_not_exists()
+        # keep this cheap: it runs in every worker and every manage.py
+        # command. Creating the MySQL database is `manage.py crear_base_datos`.
+        from . import signals  # noqa: F401
@@ -0,0 +1,126 @@
+"""Token authentication backed by the configured cache.
+
+DRF's ``TokenAuthentication`` joins ``authtoken_token`` and ``usuario`` on
+every request, the 2-second polls included. ``CachedTokenAuthentication``
+keeps what authentication needs (user id, ``is_active``, ``rol`` and the
+token's creation and stored last use) in the ``default`` cache for
+``AUTH_TOKEN_CACHE_TTL`` seconds, and on a hit rebuilds the user from it
+with every other field deferred, so nothing else (the password hash in
+particular) is pickled into the cache. Entries are keyed by a hash of the
+token, so raw tokens never reach the cache server.
+
+``signals`` drops the entry when a token is deleted (logout) and whenever
+its user is saved, which covers password changes, deactivation and role
+changes. With a per-process cache (``LocMemCache``) that would only reach
+the process that made the change, so unless ``CACHE_SHARED`` is set every
+request looks the token up in the database, as DRF does.
+
+Tokens also expire after ``AUTH_TOKEN_EXPIRY_HOURS`` without use; see
+``token_activity``.
+"""
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from . import token_activity
+from .models import Usuario
+
+
+_lock = threading.Lock()
+_contadores = {'aciertos': 0, 'fallos': 0}
+
+
+def clave_cache(key):
+    return 'auth_token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def _contar(nombre):
+    with _lock:
+        _contadores[nombre] += 1
+
+
+def invalidar_token(key):
+    cache.delete(clave_cache(key))
+
+
+def invalidar_usuario(user_id):
+    if not settings.CACHE_SHARED:
+        # nothing is cached, so skip the token query on every user save
+        return
+    claves = [clave_cache(key) for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True)]
+    if claves:
+        cache.delete_many(claves)
+
+
+def _entrada(token, guardado):
+    return {
+        'user_id': token.user_id,
+        'is_active': token.user.is_active,
+        'rol': token.user.rol,
+        'created': token.created,
+        'ultimo_uso': guardado,
+    }
+
+
+def _reconstruir(key, entrada):
+    # from_db() marks the fields not given as deferred: they load on first
+    # access, which the API views (they only read rol and pk) never do
+    usuario = Usuario.from_db(None, ['id', 'is_active', 'rol'],
+                              [entrada['user_id'], entrada['is_active'], entrada['rol']])
+    token = Token.from_db(None, ['key', 'user_id', 'created'], [key, entrada['user_id'], entrada['created']])
+    token.user = usuario
+    return token
+
+
+def estadisticas():
+    """Hit rate of this process since it started."""
+    with _lock:
+        aciertos, fallos = _contadores['aciertos'], _contadores['fallos']
+    total = aciertos + fallos
+    return {
+        'aciertos': aciertos,
+        'fallos': fallos,
+        'tasa_aciertos': round(aciertos / total, 4) if total else None,
+        'ttl_segundos': settings.AUTH_TOKEN_CACHE_TTL,
+        'cache_compartida': settings.CACHE_SHARED,
+    }
+
+
+def reiniciar_estadisticas():
+    with _lock:
+        _contadores.update(aciertos=0, fallos=0)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        entrada = cache.get(clave_cache(key)) if settings.CACHE_SHARED else None
+        if entrada is None:
+            _contar('fallos')
+            try:
+                token = Token.objects.select_related('user', 'actividad').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            if not token.user.is_active:
+                # never cached, so reactivation takes effect immediately
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            guardado = token_activity.uso_guardado(token)
+            if settings.CACHE_SHARED:
+                cache.set(clave_cache(key), _entrada(token, guardado), settings.AUTH_TOKEN_CACHE_TTL)
+        else:
+            _contar('aciertos')
+            if not entrada['is_active']:
+                raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+            token = _reconstruir(key, entrada)
+            guardado = entrada['ultimo_uso']
+
+        if token_activity.expirado(token, guardado):
+            token.delete()
+            raise exceptions.AuthenticationFailed('Sesión expirada, inicia sesión de nuevo')
+        token_activity.registrar_uso(token.key)
+        return token.user, token
@@ -0,0 +1,100 @@
+"""Versioned caching for data that rarely changes.
+
+Each group of models shares a version number stored in the ``default``
+cache. Cached entries include the version in their key, so bumping it
+(``bump_version``, called from ``signals`` on every save or delete)
+orphans all of them at once without having to know their keys; the
+orphans expire after ``REFERENCE_CACHE_TTL``. The same version goes into
+the ``ETag``, so a client revalidating with ``If-None-Match`` gets a
+``304`` without any database or cache lookup beyond the version itself.
+
+As with the token cache, a per-process ``LocMemCache`` only sees the
+bumps made by its own process; other workers keep serving the previous
+version for up to ``REFERENCE_CACHE_TTL`` seconds unless ``CACHES``
+points at a shared backend.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.utils import translation
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+def _clave_version(grupo):
+    return f'version:{grupo}'
+
+
+def get_version(grupo):
+    version = cache.get(_clave_version(grupo))
+    if version is None:
+        # add() so two processes starting together agree on the first value
+        cache.add(_clave_version(grupo), 1, timeout=None)
+        version = cache.get(_clave_version(grupo), 1)
+    return version
+
+
+def bump_version(grupo):
+    try:
+        return cache.incr(_clave_version(grupo))
+    except ValueError:
+        # not set yet (or evicted): anything cached under it is unreachable
+        version = get_version(grupo) + 1
+        cache.set(_clave_version(grupo), version, timeout=None)
+        return version
+
+
+class ListaVersionadaMixin:
+    """Serve ``list`` from the cache under the group's current version.
+
+    Entries are keyed per language and per value of each query parameter
+    in ``parametros_cache``. ``cache_publica`` marks responses that do not
+    depend on the user, which shared proxies may then store.
+    """
+
+    grupo_version = 'referencia'
+    parametros_cache = ()
+    cache_publica = False
+
+    def _datos(self, request, version, resumen):
+        clave = f'lista:{self.basename}:{version}:{resumen}'
+        datos = cache.get(clave)
+        if datos is None:
+            datos = super().list(request).data
+            cache.set(clave, datos, settings.REFERENCE_CACHE_TTL)
+        return datos
+
+    def _resumen(self, request):
+        variante = [translation.get_language() or ''] + [
+            request.query_params.get(nombre, '') for nombre in self.parametros_cache
+        ]
+        return hashlib.sha1('\x00'.join(variante).encode()).hexdigest()[:16]
+
+    def list(self, request, *args, **kwargs):
+        version = get_version(self.grupo_version)
+        resumen = self._resumen(request)
+        etag = f'"{self.basename}-{version}-{resumen}"'
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(self._datos(request, version, resumen))
+
+        response['ETag'] = etag
+        if self.cache_publica:
+            patch_cache_control(response, public=True, max_age=settings.REFERENCE_CACHE_MAX_AGE)
+        else:
+            patch_cache_control(response, private=True, max_age=settings.REFERENCE_CACHE_MAX_AGE)
+        return response
+
+    @classmethod
+    def precalentar(cls, basename, idiomas):
+        """Cache the unfiltered list in each language, outside a request."""
+        request = Request(HttpRequest())
+        vista = cls(request=request, args=(), kwargs={}, format_kwarg=None, basename=basename, action='list')
+        version = get_version(cls.grupo_version)
+        for idioma in idiomas:
+            with translation.override(idioma):
+                vista._datos(request, version, vista._resumen(request))
@@ -0,0 +1,143 @@
+"""Resumable uploads: create a session, PUT byte ranges, then finalize.
+
+Each session owns a ``.part`` file under ``UPLOAD_SESSIONS_ROOT``, created
+at its full size when the session starts. A chunk is written in place at
+its offset straight from the request stream, so earlier chunks are never
+read again, and ``SesionSubida.recibido`` is only advanced once the chunk
+is on disk. A client that lost its connection asks for the session and
+continues from ``recibido``. ``purgar`` removes sessions nobody has
+touched for ``UPLOAD_SESSION_TTL_HOURS``.
+"""
+import os
+import re
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import SesionSubida
+
+
+BLOQUE = 64 * 1024
+
+_CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+
+class FragmentoInvalido(ValueError):
+    pass
+
+
+class OffsetIncorrecto(Exception):
+    """The chunk does not start at the confirmed offset."""
+
+    def __init__(self, recibido):
+        super().__init__(f'Se esperaba el byte {recibido}')
+        self.recibido = recibido
+
+
+def _root():
+    return Path(settings.UPLOAD_SESSIONS_ROOT)
+
+
+def ruta(sesion):
+    return _root() / f"{sesion.pk}.part"
+
+
+def crear_sesion(usuario, nombre, tamano):
+    sesion = SesionSubida.objects.create(usuario=usuario, nombre=nombre[:255], tamano=tamano)
+    _root().mkdir(parents=True, exist_ok=True)
+    with open(ruta(sesion), 'wb') as f:
+        # reserve the full size up front; chunks are then written in place
+        f.truncate(tamano)
+    return sesion
+
+
+def parse_content_range(header, tamano):
+    """``(inicio, fin)`` inclusive from a ``Content-Range`` request header."""
+    coincidencia = _CONTENT_RANGE.match((header or '').strip())
+    if not coincidencia:
+        raise FragmentoInvalido('Cabecera Content-Range inválida')
+    inicio, fin, total = coincidencia.groups()
+    inicio, fin = int(inicio), int(fin)
+    if total != '*' and int(total) != tamano:
+        raise FragmentoInvalido('El tamaño total no coincide con la sesión')
+    if fin < inicio or fin >= tamano:
+        raise FragmentoInvalido('Rango fuera del archivo')
+    if fin - inicio + 1 > settings.UPLOAD_CHUNK_MAX_BYTES:
+        raise FragmentoInvalido('Fragmento demasiado grande')
+    return inicio, fin
+
+
+def escribir_fragmento(sesion, inicio, fin, stream):
+    """Write bytes ``inicio..fin`` from ``stream`` and confirm them.
+
+    Returns the new confirmed offset. Raises ``OffsetIncorrecto`` when the
+    chunk does not continue the upload (the client should resume from
+    ``recibido``) and ``FragmentoInvalido`` when the body is short.
+    """
+    if inicio != sesion.recibido:
+        raise OffsetIncorrecto(sesion.recibido)
+    if stream is None:
+        raise FragmentoInvalido('El fragmento está vacío')
+
+    longitud = fin - inicio + 1
+    escritos = 0
+    with open(ruta(sesion), 'r+b') as f:
+        f.seek(inicio)
+        while escritos < longitud:
+            bloque = stream.read(min(BLOQUE, longitud - escritos))
+            if not bloque:
+                break
+            f.write(bloque)
+            escritos += len(bloque)
+        f.flush()
+        os.fsync(f.fileno())
+    if escritos != longitud:
+        raise FragmentoInvalido(f'Se recibieron {escritos} de {longitud} bytes')
+
+    # only one writer can move the offset forward from ``inicio``
+    actualizados = SesionSubida.objects.filter(pk=sesion.pk, estado='activa', recibido=inicio).update(
+        recibido=fin + 1, fecha_actualizacion=timezone.now()
+    )
+    if not actualizados:
+        sesion.refresh_from_db()
+        raise OffsetIncorrecto(sesion.recibido)
+    sesion.recibido = fin + 1
+    return sesion.recibido
+
+
+def completar(sesion, url):
+    SesionSubida.objects.filter(pk=sesion.pk).update(estado='completada', url=url, fecha_actualizacion=timezone.now())
+    ruta(sesion).unlink(missing_ok=True)
+
+
+def cancelar(sesion):
+    ruta(sesion).unlink(missing_ok=True)
+    sesion.delete()
+
+
+def purgar(horas=None, dry_run=False):
+    """Delete sessions idle for ``horas`` and ``.part`` files without a session.
+
+    Returns ``(sesiones, archivos)``.
+    """
+    horas = settings.UPLOAD_SESSION_TTL_HOURS if horas is None else horas
+    limite = timezone.now() - timedelta(hours=horas)
+
+    vencidas = SesionSubida.objects.filter(fecha_actualizacion__lt=limite)
+    ids = {str(pk) for pk in vencidas.values_list('pk', flat=True)}
+    conocidas = {str(pk) for pk in SesionSubida.objects.values_list('pk', flat=True)}
+
+    archivos = 0
+    if _root().is_dir():
+        for path in _root().glob('*.part'):
+            huerfano = path.stem not in conocidas and path.stat().st_mtime < limite.timestamp()
+            if path.stem not in ids and not huerfano:
+                continue
+            archivos += 1
+            if not dry_run:
+                path.unlink(missing_ok=True)
+    if not dry_run:
+        vencidas.filter(pk__in=ids).delete()
+    return len(ids), archivos
@@ -1,3 +1,4 @@
+import logging
 import os
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
@@ -5,6 +6,10 @@ from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from email.mime.image import MIMEImage
 
+from . import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
 
 def send_ticket_created_email_to_user(ticket):
     subject = f'Nuevo Ticket Creado: {ticket.asunto}'
@@ -139,22 +144,20 @@ Por favor, ingresa al sistema para gestionar este ticket.
     admin_emails = [admin.email for admin in admins if admin.email]
 
     if not admin_emails:
-        print("No hay administradores con email configurado para notificar")
+        logger.warning("No hay administradores con email configurado para notificar")
         return False
 
     # send with inline logo and copy hotline mailbox
     cc_list = [settings.HOTLINE_EMAIL] if getattr(settings, 'HOTLINE_EMAIL', None) else None
     success = _send_email_with_logo(subject, plain_message, logo_html + html_message, admin_emails, cc_list=cc_list)
     if success:
-        print(f"Email enviado a administradores: {', '.join(admin_emails)}")
+        logger.info("Email enviado a administradores: %s", ', '.join(admin_emails))
         if cc_list:
-            print(f"Copia enviada a: {', '.join(cc_list)}")
+            logger.info("Copia enviada a: %s", ', '.join(cc_list))
     return success
 
 
 def send_ticket_status_updated_email(ticket, previous_status):
-    from django.utils import timezone
-
     subject = f'Ticket #{ticket.id} - Estado Actualizado'
     logo_html = '<div style="text-align:center;margin-bottom:20px;"><img src="cid:logo_image" alt="Logo" style="max-width:200px;height:auto;"></div>'
 
@@ -164,8 +167,8 @@ def send_ticket_status_updated_email(ticket, previous_status):
     solucion_html = ""
     solucion_plain = ""
 
-    if ticket.estado == 'resuelto':
-        tiempo_transcurrido = timezone.now() - ticket.fecha_creacion
+    if ticket.estado == 'resuelto' and ticket.duracion_resolucion is not None:
+        tiempo_transcurrido = ticket.duracion_resolucion
         dias = tiempo_transcurrido.days
         horas = tiempo_transcurrido.seconds // 3600
         minutos = (tiempo_transcurrido.seconds % 3600) // 60
@@ -326,6 +329,14 @@ def send_ticket_priority_updated_email(ticket, previous_priority):
 def _send_email_with_logo(subject, plain_message, html_message, recipient_list, cc_list=None, bcc_list=None):
     """Send an email with HTML body and embed the project logo as an inline image (CID).
     Returns True on success, False on failure."""
+    with metrics.medir(metrics.duracion_email) as labels, \
+            tracing.span('email', destinatarios=len(recipient_list), asunto=subject[:100]):
+        enviado = _enviar(subject, plain_message, html_message, recipient_list, cc_list, bcc_list)
+        labels['resultado'] = 'ok' if enviado else 'error'
+    return enviado
+
+
+def _enviar(subject, plain_message, html_message, recipient_list, cc_list, bcc_list):
     try:
         msg = EmailMultiAlternatives(
             subject=subject,
@@ -353,10 +364,10 @@ def _send_email_with_logo(subject, plain_message, html_message, recipient_list,
                 image.add_header('Content-Disposition', 'inline', filename=os.path.basename(logo_path))
                 msg.attach(image)
         else:
-            print(f"Logo not found at {logo_path}; sending email without inline logo")
+            logger.warning("Logo not found at %s; sending email without inline logo", logo_path)
 
         msg.send(fail_silently=False)
         return True
-    except Exception as e:
-        print(f"Error enviando email: {e}")
+    except Exception:
+        logger.exception("Error enviando email a %s", recipient_list)
         return False
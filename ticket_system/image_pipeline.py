@@ -0,0 +1,275 @@
+"""Processing of the images attached to ticket solutions.
+
+Uploads are checked from their header in the request thread (size, real
+format, pixel count) and then decoded and re-encoded on a small thread
+pool; Pillow releases the GIL while it decodes, resizes and encodes, so
+the pool also bounds how many large photos are being worked on at once.
+
+Files are named after the SHA-256 of the uploaded bytes, so the same
+screenshot attached to many tickets is processed and stored once. The hash
+is a separate pass over the upload before it is decoded: what gets written
+is the re-encoded image, not the uploaded bytes, and a repeated upload has
+to be recognised before any decoding is spent on it. Each distinct upload produces,
+under ``MEDIA_ROOT/soluciones/<hash[:2]>/``:
+
+* ``<hash>.jpg`` (``.png`` when the image has transparency): at most
+  ``IMAGE_MAX_DIMENSION`` pixels on its longest side
+* ``<hash>_thumb.jpg``: at most ``IMAGE_THUMB_DIMENSION`` pixels
+* ``<hash>.webp``: the main image as WebP, when Pillow was built with WebP
+
+Re-encoding drops EXIF (camera, GPS), XMP and comments; only the colour
+profile of RGB sources is kept (CMYK photos are converted to sRGB through
+their profile, which is then dropped). The request waits for the main image, whose URL it
+returns, while the thumbnail and WebP variant are written in the
+background. ``IMAGE_WORKERS = 0`` does everything inline (tests).
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from PIL import Image, ImageCms, ImageOps, UnidentifiedImageError, features
+
+
+FORMATOS_PERMITIDOS = {'JPEG', 'PNG', 'GIF'}
+SUBDIRECTORIO = 'soluciones'
+SUFIJO_MINIATURA = '_thumb'
+
+# names written by this module; older uploads kept their original names
+_NOMBRE_PROCESADO = re.compile(r'^(?P<base>.*/)?(?P<id>[0-9a-f]{64})\.(?P<ext>jpg|png)$')
+EXTENSIONES = ('jpg', 'png')
+# source modes whose embedded profile still describes the re-encoded pixels
+MODOS_RGB = {'RGB', 'RGBA', 'P', 'PA'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImagenInvalida(ValueError):
+    pass
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.IMAGE_WORKERS,
+                thread_name_prefix='imagenes',
+            )
+        return _executor
+
+
+def webp_disponible():
+    return features.check('webp')
+
+
+def validar(archivo):
+    """Check an ``UploadedFile`` without decoding it; returns ``(formato, ancho, alto)``.
+
+    Raises ``ImagenInvalida`` with a message suitable for the API client.
+    """
+    if archivo.size > settings.IMAGE_UPLOAD_MAX_BYTES:
+        raise ImagenInvalida(
+            f'La imagen supera el tamaño máximo de {settings.IMAGE_UPLOAD_MAX_BYTES // (1024 * 1024)} MB'
+        )
+    try:
+        # only the header is read here; pixel data is decoded in the pool
+        with Image.open(archivo) as img:
+            formato, (ancho, alto) = img.format, img.size
+    except Image.DecompressionBombError:
+        raise ImagenInvalida('La imagen tiene demasiados píxeles')
+    except (UnidentifiedImageError, OSError):
+        raise ImagenInvalida('El archivo no es una imagen válida')
+    finally:
+        archivo.seek(0)
+
+    if formato not in FORMATOS_PERMITIDOS:
+        raise ImagenInvalida('Tipo de archivo no permitido. Solo imágenes JPEG, PNG o GIF')
+    if ancho * alto > settings.IMAGE_MAX_PIXELS:
+        raise ImagenInvalida('La imagen tiene demasiados píxeles')
+    return formato, ancho, alto
+
+
+def _tiene_transparencia(img):
+    return img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+
+
+def _guardar(img, path, formato, **opciones):
+    # write next to the target and rename, so the URL never serves half a file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            img.save(f, formato, **opciones)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _opciones(formato, icc):
+    opciones = {'icc_profile': icc} if icc else {}
+    if formato == 'JPEG':
+        opciones.update(quality=85, optimize=True, progressive=True)
+    elif formato == 'PNG':
+        opciones.update(optimize=True)
+    return opciones
+
+
+def _codificar_principal(archivo, directorio, identificador):
+    """Decode, orient and bound the upload; write the main image."""
+    limite = settings.IMAGE_MAX_DIMENSION
+    with Image.open(archivo) as original:
+        # JPEG can decode at 1/2, 1/4 or 1/8 scale directly, which is most
+        # of the saving on large phone photos
+        original.draft('RGB', (limite, limite))
+        icc = original.info.get('icc_profile')
+        # animated GIFs keep their first frame
+        img = ImageOps.exif_transpose(original)
+        img.load()
+
+    alfa = _tiene_transparencia(img)
+    if img.mode not in MODOS_RGB:
+        img, icc = _a_srgb(img, icc), None
+    img = img.convert('RGBA' if alfa else 'RGB')
+    img.thumbnail((limite, limite), Image.Resampling.LANCZOS)
+
+    formato, ext = ('PNG', 'png') if alfa else ('JPEG', 'jpg')
+    _guardar(img, directorio / f"{identificador}.{ext}", formato, **_opciones(formato, icc))
+    return img, formato, ext, icc
+
+
+def _a_srgb(img, icc):
+    """Colour-convert a CMYK image through its profile; other modes convert as-is."""
+    if icc and img.mode == 'CMYK':
+        try:
+            return ImageCms.profileToProfile(
+                img, ImageCms.ImageCmsProfile(io.BytesIO(icc)), ImageCms.createProfile('sRGB'),
+                outputMode='RGB',
+            )
+        except (ImageCms.PyCMSError, OSError):
+            pass
+    return img
+
+
+def _codificar_variantes(img, formato, ext, icc, directorio, identificador):
+    miniatura = img.copy()
+    limite = settings.IMAGE_THUMB_DIMENSION
+    miniatura.thumbnail((limite, limite), Image.Resampling.LANCZOS)
+    _guardar(miniatura, directorio / f"{identificador}{SUFIJO_MINIATURA}.{ext}", formato,
+             **_opciones(formato, icc))
+
+    if webp_disponible():
+        _guardar(img, directorio / f"{identificador}.webp", 'WEBP', quality=80, method=4,
+                 **({'icc_profile': icc} if icc else {}))
+
+
+def calcular_hash(archivo):
+    """SHA-256 of an ``UploadedFile``, read chunk by chunk and rewound for Pillow."""
+    digest = hashlib.sha256()
+    for chunk in archivo.chunks():
+        digest.update(chunk)
+    archivo.seek(0)
+    return digest.hexdigest()
+
+
+def ruta_relativa(digest, ext):
+    return f"{SUBDIRECTORIO}/{digest[:2]}/{digest}.{ext}"
+
+
+def _existente(digest):
+    for ext in EXTENSIONES:
+        relativo = ruta_relativa(digest, ext)
+        if (Path(settings.MEDIA_ROOT) / relativo).exists():
+            return relativo
+    return None
+
+
+def _variantes_faltantes(relativo):
+    _, miniatura, webp = archivos(relativo)
+    return not miniatura.exists() or (webp_disponible() and not webp.exists())
+
+
+def _completar_variantes(relativo):
+    """Rewrite the variants of a stored image from its main file."""
+    principal = Path(settings.MEDIA_ROOT) / relativo
+    with Image.open(principal) as img:
+        formato, icc = img.format, img.info.get('icc_profile')
+        img.load()
+    ext = principal.suffix[1:]
+    _codificar_variantes(img, formato, ext, icc, principal.parent, principal.stem)
+
+
+def archivos(relativo):
+    """Every file (main image and variants) belonging to a stored image."""
+    principal = Path(settings.MEDIA_ROOT) / relativo
+    return [
+        principal,
+        principal.with_name(f"{principal.stem}{SUFIJO_MINIATURA}{principal.suffix}"),
+        principal.with_suffix('.webp'),
+    ]
+
+
+def procesar(archivo):
+    """Store a validated upload; returns ``(hash, ruta, nueva)``.
+
+    ``ruta`` is the main image relative to ``MEDIA_ROOT`` and ``nueva``
+    is False when identical bytes had already been stored, in which case
+    only variants missing on disk (an earlier pool task that failed or has
+    not run yet) are queued again. Otherwise blocks until the main image
+    is written (at most ``IMAGE_PROCESS_TIMEOUT`` seconds); the variants
+    are queued behind it on the same pool.
+    """
+    digest = calcular_hash(archivo)
+    relativo = _existente(digest)
+    if relativo:
+        if _variantes_faltantes(relativo):
+            if settings.IMAGE_WORKERS <= 0:
+                _completar_variantes(relativo)
+            else:
+                get_executor().submit(_completar_variantes, relativo)
+        return digest, relativo, False
+
+    directorio = Path(settings.MEDIA_ROOT) / SUBDIRECTORIO / digest[:2]
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    if settings.IMAGE_WORKERS <= 0:
+        resultado = _codificar_principal(archivo, directorio, digest)
+        _codificar_variantes(*resultado, directorio, digest)
+        return digest, ruta_relativa(digest, resultado[2]), True
+
+    executor = get_executor()
+    img, formato, ext, icc = executor.submit(
+        _codificar_principal, archivo, directorio, digest
+    ).result(timeout=settings.IMAGE_PROCESS_TIMEOUT)
+    executor.submit(_codificar_variantes, img, formato, ext, icc, directorio, digest)
+    return digest, ruta_relativa(digest, ext), True
+
+
+def hash_de_url(url):
+    """Content hash encoded in a stored image URL, or ``None`` for older uploads."""
+    coincidencia = _NOMBRE_PROCESADO.match(url or '') if isinstance(url, str) else None
+    return coincidencia.group('id') if coincidencia else None
+
+
+def variantes(url):
+    """URLs of every variant of a stored solution image.
+
+    ``miniatura`` and ``webp`` are ``None`` for images uploaded before the
+    pipeline existed, so clients fall back to ``original``.
+    """
+    coincidencia = _NOMBRE_PROCESADO.match(url or '')
+    if not coincidencia:
+        return {'original': url, 'miniatura': None, 'webp': None}
+    base, identificador, ext = coincidencia.group('base') or '', coincidencia.group('id'), coincidencia.group('ext')
+    return {
+        'original': url,
+        'miniatura': f"{base}{identificador}{SUFIJO_MINIATURA}.{ext}",
+        'webp': f"{base}{identificador}.webp" if webp_disponible() else None,
+    }
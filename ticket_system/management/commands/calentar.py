@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket_system import warmup
+
+
+class Command(BaseCommand):
+    help = 'Precarga conexiones, cachés de referencia, el modelo de lectura y los estilos PDF.'
+
+    def handle(self, *args, **options):
+        correcto = warmup.calentar()
+        for paso, valor in warmup.resultado.items():
+            detalle = f"{valor} ms" if isinstance(valor, float) else f"{valor} (ver el log)"
+            self.stdout.write(f"{paso}: {detalle}")
+        if not correcto:
+            raise CommandError('El calentamiento falló')
+        self.stdout.write(self.style.SUCCESS('Calentamiento completado'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tickets.db_init import create_database_if_not_exists
+
+
+class Command(BaseCommand):
+    help = 'Crea la base de datos MySQL configurada si todavía no existe.'
+
+    def handle(self, *args, **options):
+        create_database_if_not_exists()
+        self.stdout.write(self.style.SUCCESS('Base de datos lista'))
@@ -0,0 +1,56 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ticket_system.report_batch import filtrar_tickets, iter_pdfs, iter_zip
+
+
+class Command(BaseCommand):
+    help = 'Exporta los PDF de varios tickets a un archivo ZIP, renderizados en paralelo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ids', nargs='+', help='IDs de los tickets a exportar')
+        parser.add_argument('--estado', choices=['abierto', 'en_proceso', 'resuelto'])
+        parser.add_argument('--prioridad', choices=['baja', 'media', 'alta', 'urgente'])
+        parser.add_argument('--departamento', help='ID del departamento')
+        parser.add_argument('--desde', help='Fecha de creación mínima (AAAA-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha de creación máxima (AAAA-MM-DD)')
+        parser.add_argument('--lang', choices=['es', 'en'], default='es')
+        parser.add_argument('--output', '-o', required=True, help="Archivo ZIP de salida ('-' para stdout)")
+
+    def handle(self, *args, **options):
+        try:
+            tickets = filtrar_tickets(
+                ids=options['ids'],
+                estado=options['estado'],
+                prioridad=options['prioridad'],
+                departamento=options['departamento'],
+                desde=options['desde'],
+                hasta=options['hasta'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        total = tickets.count()
+        if total == 0:
+            raise CommandError('Ningún ticket coincide con el filtro')
+
+        exportados = 0
+
+        def contar(pdfs):
+            nonlocal exportados
+            for par in pdfs:
+                exportados += 1
+                if options['verbosity'] > 1:
+                    self.stderr.write(f"{exportados}/{total} ticket #{par[0]}")
+                yield par
+
+        destino = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in iter_zip(contar(iter_pdfs(tickets, options['lang']))):
+                destino.write(chunk)
+        finally:
+            if destino is not sys.stdout.buffer:
+                destino.close()
+
+        self.stderr.write(self.style.SUCCESS(f"{exportados} PDF exportados a {options['output']}"))
@@ -0,0 +1,51 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from ticket_system import synthetic_data
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos con distribuciones realistas para pruebas a escala.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--departamentos', type=int, default=10)
+        parser.add_argument('--usuarios', type=int, default=1000)
+        parser.add_argument('--motivos', type=int, default=40)
+        parser.add_argument('--cerradores', type=int, default=15)
+        parser.add_argument('--tickets', type=int, default=100000)
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia que cubren los tickets')
+        parser.add_argument('--semilla', type=int, default=1, help='Misma semilla, mismos datos')
+        parser.add_argument('--lote', type=int, default=5000, help='Filas insertadas por consulta')
+        parser.add_argument(
+            '--hasta',
+            help=f'Fecha (AAAA-MM-DD) en que termina la historia, a medianoche local; '
+                 f'por defecto {synthetic_data.AHORA.isoformat()}',
+        )
+
+    def handle(self, *args, **options):
+        ahora = None
+        if options['hasta']:
+            hasta = parse_date(options['hasta'])
+            if hasta is None:
+                raise CommandError('--hasta debe tener el formato AAAA-MM-DD')
+            ahora = timezone.make_aware(datetime.combine(hasta, time.min))
+
+        def progreso(nombre, cantidad):
+            self.stdout.write(f"{cantidad} {nombre} creados")
+
+        synthetic_data.generar(
+            departamentos=options['departamentos'],
+            usuarios=options['usuarios'],
+            motivos=options['motivos'],
+            cerradores=options['cerradores'],
+            tickets=options['tickets'],
+            semilla=options['semilla'],
+            lote=options['lote'],
+            dias=options['dias'],
+            ahora=ahora,
+            progreso=progreso,
+        )
+        self.stdout.write(self.style.SUCCESS('Datos sintéticos generados'))
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ticket_system import report_store
+
+
+class Command(BaseCommand):
+    help = 'Elimina reportes PDF antiguos según la política de retención.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=settings.REPORT_RETENTION_DAYS,
+                            help='Antigüedad máxima en días')
+        parser.add_argument('--max-mb', type=int, default=settings.REPORT_RETENTION_MAX_BYTES // (1024 * 1024),
+                            help='Tamaño máximo del archivo de reportes en MB (0 sin límite)')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se eliminaría')
+
+    def handle(self, *args, **options):
+        borrados, liberados = report_store.podar(
+            max_dias=options['dias'],
+            max_bytes=options['max_mb'] * 1024 * 1024,
+            dry_run=options['dry_run'],
+        )
+        accion = 'Se eliminarían' if options['dry_run'] else 'Eliminados'
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {borrados} reportes ({liberados / (1024 * 1024):.1f} MB)"
+        ))
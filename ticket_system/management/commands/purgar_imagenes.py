@@ -0,0 +1,61 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ticket_system.image_pipeline import archivos, hash_de_url
+from ticket_system.models import ImagenSolucion, Ticket
+
+
+class Command(BaseCommand):
+    help = 'Elimina las imágenes de solución que ningún ticket referencia.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=24,
+                            help='Margen para imágenes recién subidas que aún no se han adjuntado')
+        parser.add_argument('--recontar', action='store_true',
+                            help='Recalcular las referencias desde Ticket.solucion_imagenes antes de purgar')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se eliminaría')
+
+    def recontar(self):
+        # bulk updates such as QuerySet.update() skip the signals that keep
+        # the counters in sync, so they can be rebuilt from the tickets
+        conteo = Counter()
+        imagenes = Ticket.objects.exclude(solucion_imagenes=None).values_list('solucion_imagenes', flat=True)
+        for urls in imagenes.iterator(chunk_size=2000):
+            conteo.update(h for h in map(hash_de_url, urls or []) if h)
+
+        por_cantidad = {}
+        for digest, cantidad in conteo.items():
+            por_cantidad.setdefault(cantidad, []).append(digest)
+        with transaction.atomic():
+            ImagenSolucion.objects.update(referencias=0)
+            for cantidad, hashes in por_cantidad.items():
+                ImagenSolucion.objects.filter(hash__in=hashes).update(referencias=cantidad)
+
+    def handle(self, *args, **options):
+        if options['recontar']:
+            self.recontar()
+
+        limite = timezone.now() - timedelta(hours=options['horas'])
+        candidatas = ImagenSolucion.objects.filter(referencias__lte=0, fecha_creacion__lt=limite)
+
+        borradas, liberados = 0, 0
+        for imagen in candidatas.iterator():
+            paths = [path for path in archivos(imagen.archivo) if path.exists()]
+            tamano = sum(path.stat().st_size for path in paths)
+            if not options['dry_run']:
+                # conditional delete: a ticket may have attached it meanwhile
+                if not ImagenSolucion.objects.filter(pk=imagen.pk, referencias__lte=0).delete()[0]:
+                    continue
+                for path in paths:
+                    path.unlink(missing_ok=True)
+            borradas += 1
+            liberados += tamano
+
+        accion = 'Se eliminarían' if options['dry_run'] else 'Eliminadas'
+        self.stdout.write(self.style.SUCCESS(
+            f"{accion} {borradas} imágenes ({liberados / (1024 * 1024):.1f} MB)"
+        ))
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ticket_system import chunked_upload
+
+
+class Command(BaseCommand):
+    help = 'Elimina las sesiones de subida abandonadas y sus archivos parciales.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=settings.UPLOAD_SESSION_TTL_HOURS,
+                            help='Horas sin actividad tras las que una sesión se considera abandonada')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se eliminaría')
+
+    def handle(self, *args, **options):
+        sesiones, archivos = chunked_upload.purgar(horas=options['horas'], dry_run=options['dry_run'])
+        accion = 'Se eliminarían' if options['dry_run'] else 'Eliminadas'
+        self.stdout.write(self.style.SUCCESS(f"{accion} {sesiones} sesiones ({archivos} archivos parciales)"))
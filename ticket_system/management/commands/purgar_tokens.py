@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ticket_system import token_activity
+
+
+class Command(BaseCommand):
+    help = 'Elimina los tokens de API que llevan demasiado tiempo sin usarse.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horas', type=int, default=settings.AUTH_TOKEN_EXPIRY_HOURS,
+                            help='Horas sin uso tras las que un token se considera expirado')
+        parser.add_argument('--lote', type=int, default=1000, help='Tokens eliminados por consulta')
+        parser.add_argument('--dry-run', action='store_true', help='Solo mostrar lo que se eliminaría')
+
+    def handle(self, *args, **options):
+        total = token_activity.purgar(horas=options['horas'], lote=options['lote'], dry_run=options['dry_run'])
+        accion = 'Se eliminarían' if options['dry_run'] else 'Eliminados'
+        self.stdout.write(self.style.SUCCESS(f"{accion} {total} tokens expirados"))
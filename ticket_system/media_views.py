@@ -0,0 +1,91 @@
+"""Serving of uploaded media (``MEDIA_URL``).
+
+Replaces ``django.conf.urls.static.static()``, which only works with
+``DEBUG`` on and sends no cache headers. Requests are answered from the
+file's metadata whenever possible: conditional requests get a ``304``
+before the file is opened, the transfer itself goes through
+``sendfile_response`` (``X-Accel-Redirect`` behind Nginx), and files whose
+name is their content hash are marked ``immutable`` for a year.
+"""
+import mimetypes
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .image_pipeline import SUFIJO_MINIATURA, hash_de_url
+from .sendfile import sendfile_response
+
+
+UN_ANIO = 365 * 24 * 60 * 60
+
+
+def _hash_contenido(path):
+    """Content hash of a pipeline file (main image or variant), if it is one."""
+    stem = path.stem.removesuffix(SUFIJO_MINIATURA)
+    return hash_de_url(f"{stem}.jpg")
+
+
+def _etag(path, stat):
+    if _hash_contenido(path):
+        # the name already identifies the bytes, so it is a strong validator
+        return f'"{path.name}"'
+    return f'W/"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def _rango_aplicable(request, etag, last_modified):
+    """``Range`` header to honour, taking ``If-Range`` into account."""
+    rango = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not rango or not if_range:
+        return rango
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        # weak validators never match If-Range
+        return rango if if_range == etag and not etag.startswith('W/') else None
+    return rango if parse_http_date_safe(if_range) == last_modified else None
+
+
+@require_safe
+def servir_media(request, path):
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404('Archivo no encontrado')
+    try:
+        stat = fullpath.stat()
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Archivo no encontrado')
+    if not fullpath.is_file():
+        raise Http404('Archivo no encontrado')
+
+    etag = _etag(fullpath, stat)
+    last_modified = int(stat.st_mtime)
+    inmutable = _hash_contenido(fullpath) is not None
+
+    def cabeceras(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        if inmutable:
+            patch_cache_control(response, public=True, max_age=UN_ANIO, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE)
+        return response
+
+    condicional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if condicional is not None:
+        return cabeceras(condicional)
+
+    relativo = Path(os.path.relpath(fullpath, os.path.abspath(settings.MEDIA_ROOT))).as_posix()
+    response = sendfile_response(
+        fullpath,
+        settings.MEDIA_ACCEL_PREFIX + relativo,
+        content_type=mimetypes.guess_type(fullpath.name)[0],
+        range_header=_rango_aplicable(request, etag, last_modified),
+    )
+    return cabeceras(response)
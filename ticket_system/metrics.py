@@ -0,0 +1,324 @@
+"""Request and render metrics in the Prometheus text format.
+
+``middleware.MetricasMiddleware`` records for every request, labelled
+with the resolved URL name: latency, number and time of database queries, size of
+the response body and status code. ``medir`` times other work (email
+sends, PDF renders). Everything lives in this process's memory behind a
+single lock; an observation is a ``bisect`` and a few additions, so the
+cost per request stays in the microseconds. ``metricas`` serves the
+current values at ``/metrics`` for a scraper holding ``METRICS_TOKEN``.
+
+Values are per process. With several Gunicorn workers set ``METRICS_DIR``:
+each worker then writes its series to ``<METRICS_DIR>/<pid>.json`` every
+``METRICS_FLUSH_SECONDS`` (from a background thread, never in the request)
+and ``/metrics`` adds up the files of every worker, so any worker answers
+a scrape with the totals. Files of workers that have exited are folded
+into ``historico.json``, keeping counters monotonic across restarts;
+``process_start_time_seconds`` carries the ``pid`` of each live worker.
+"""
+import atexit
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_inicio_proceso = time.time()
+# observations since start; the flusher skips writing when unchanged
+_cambios = 0
+_volcador = None
+_volcador_lock = threading.Lock()
+HISTORICO = 'historico.json'
+
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self.series = {}  # labels -> [count per bucket..., +Inf count, sum]
+
+    def observar(self, valor, **labels):
+        global _cambios
+        clave = tuple(sorted(labels.items()))
+        indice = bisect.bisect_left(self.buckets, valor)
+        with _lock:
+            serie = self.series.get(clave)
+            if serie is None:
+                serie = self.series[clave] = [0] * (len(self.buckets) + 2)
+            serie[indice] += 1
+            serie[-1] += valor
+            _cambios += 1
+
+    def copiar(self):
+        with _lock:
+            return {clave: list(serie) for clave, serie in self.series.items()}
+
+    @staticmethod
+    def sumar(serie, otra):
+        return [a + b for a, b in zip(serie, otra)]
+
+    def exponer(self, series):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for clave, serie in sorted(series.items()):
+            acumulado = 0
+            for limite, cantidad in zip(self.buckets + ('+Inf',), serie):
+                acumulado += cantidad
+                lineas.append(f'{self.nombre}_bucket{_labels(clave, le=limite)} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_labels(clave)} {serie[-1]:.6f}')
+            lineas.append(f'{self.nombre}_count{_labels(clave)} {acumulado}')
+        return lineas
+
+
+class Contador:
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.series = {}
+
+    def incrementar(self, valor=1, **labels):
+        global _cambios
+        clave = tuple(sorted(labels.items()))
+        with _lock:
+            self.series[clave] = self.series.get(clave, 0) + valor
+            _cambios += 1
+
+    def copiar(self):
+        with _lock:
+            return dict(self.series)
+
+    @staticmethod
+    def sumar(serie, otra):
+        return serie + otra
+
+    def exponer(self, series):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        for clave, valor in sorted(series.items()):
+            lineas.append(f'{self.nombre}{_labels(clave)} {valor:g}')
+        return lineas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(clave, **extra):
+    pares = list(clave) + list(extra.items())
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in pares) + '}'
+
+
+duracion_peticion = Histograma(
+    'http_request_duration_seconds', 'Request latency by URL name.', BUCKETS_SEGUNDOS)
+peticiones = Contador('http_requests_total', 'Requests by URL name, method and status code.')
+consultas_peticion = Histograma(
+    'http_request_db_queries', 'Database queries per request by URL name.', BUCKETS_CONSULTAS)
+tiempo_consultas = Contador(
+    'http_request_db_seconds_total', 'Time spent in database queries by URL name.')
+tamano_respuesta = Histograma(
+    'http_response_size_bytes', 'Response body size by URL name (non-streaming responses).', BUCKETS_BYTES)
+duracion_email = Histograma(
+    'email_send_duration_seconds', 'Time to build and send a notification email.', BUCKETS_SEGUNDOS)
+duracion_pdf = Histograma(
+    'pdf_render_duration_seconds', 'PDF report render time by report.', BUCKETS_SEGUNDOS)
+
+REGISTRO = (
+    duracion_peticion, peticiones, consultas_peticion, tiempo_consultas,
+    tamano_respuesta, duracion_email, duracion_pdf,
+)
+
+
+@contextmanager
+def medir(histograma, **labels):
+    inicio = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        # the caller may add labels (e.g. the result) through the yielded dict
+        histograma.observar(time.perf_counter() - inicio, **labels)
+
+
+def _serializar():
+    return {
+        'pid': os.getpid(),
+        'inicio': _inicio_proceso,
+        'series': {
+            metrica.nombre: [[list(clave), serie] for clave, serie in metrica.copiar().items()]
+            for metrica in REGISTRO
+        },
+    }
+
+
+def _combinar(total, datos):
+    """Add the series of a dumped process (``_serializar``) into ``total``."""
+    for metrica in REGISTRO:
+        series = total.setdefault(metrica.nombre, {})
+        for clave, serie in datos['series'].get(metrica.nombre, ()):
+            clave = tuple(tuple(par) for par in clave)
+            series[clave] = metrica.sumar(series[clave], serie) if clave in series else serie
+
+
+def _escribir(path, datos):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(datos, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _leer(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _bloqueo(directorio):
+    # serializes folding into historico.json with the scrapes that read it
+    import fcntl
+    with open(directorio / '.lock', 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _archivar(directorio, path, datos):
+    """Fold the file of a process that is gone into ``historico.json``; under ``_bloqueo``."""
+    historico = _leer(directorio / HISTORICO) or {'series': {}}
+    total = {}
+    _combinar(total, historico)
+    _combinar(total, datos)
+    _escribir(directorio / HISTORICO, {'series': {
+        nombre: [[list(clave), serie] for clave, serie in series.items()] for nombre, series in total.items()
+    }})
+    path.unlink()
+
+
+_revisado = False
+
+
+def volcar():
+    """Write this process's series to ``METRICS_DIR/<pid>.json``."""
+    global _revisado
+    directorio = Path(settings.METRICS_DIR)
+    path = directorio / f'{os.getpid()}.json'
+    if not _revisado:
+        # a previous process with the same pid left its file behind
+        with _bloqueo(directorio):
+            anterior = _leer(path)
+            if anterior is not None and anterior.get('inicio') != _inicio_proceso:
+                _archivar(directorio, path, anterior)
+        _revisado = True
+    _escribir(path, _serializar())
+
+
+def _volcar_periodicamente():
+    ultimo = None
+    while True:
+        time.sleep(settings.METRICS_FLUSH_SECONDS)
+        if _cambios == ultimo:
+            continue
+        ultimo = _cambios
+        try:
+            volcar()
+        except OSError:
+            logger.exception('No se pudieron guardar las métricas en %s', settings.METRICS_DIR)
+
+
+def iniciar_volcado():
+    """Start the background flusher when ``METRICS_DIR`` is set; idempotent."""
+    global _volcador
+    if not settings.METRICS_DIR:
+        return
+    with _volcador_lock:
+        if _volcador is None:
+            Path(settings.METRICS_DIR).mkdir(parents=True, exist_ok=True)
+            _volcador = threading.Thread(target=_volcar_periodicamente, name='metricas', daemon=True)
+            _volcador.start()
+            atexit.register(volcar)
+
+
+def _agregado():
+    """Series of every worker in ``METRICS_DIR`` added up, plus the live pids."""
+    directorio = Path(settings.METRICS_DIR)
+    volcar()  # this worker's values as of now
+    total, procesos = {}, []
+    with _bloqueo(directorio):
+        for path in directorio.glob('*.json'):
+            datos = _leer(path) if path.name != HISTORICO else None
+            if datos is not None and not _vivo(datos['pid']):
+                _archivar(directorio, path, datos)
+        for path in sorted(directorio.glob('*.json')):
+            datos = _leer(path)
+            if datos is None:
+                continue
+            if path.name != HISTORICO:
+                procesos.append((datos['pid'], datos['inicio']))
+            _combinar(total, datos)
+    return total, procesos
+
+
+def exponer():
+    if settings.METRICS_DIR:
+        total, procesos = _agregado()
+    else:
+        total = {metrica.nombre: metrica.copiar() for metrica in REGISTRO}
+        procesos = [(os.getpid(), _inicio_proceso)]
+    lineas = [
+        '# HELP process_start_time_seconds Start time of the process since the epoch.',
+        '# TYPE process_start_time_seconds gauge',
+    ]
+    lineas.extend(f'process_start_time_seconds{{pid="{pid}"}} {inicio:.3f}' for pid, inicio in procesos)
+    for metrica in REGISTRO:
+        lineas.extend(metrica.exponer(total.get(metrica.nombre, {})))
+    return '\n'.join(lineas) + '\n'
+
+
+def reiniciar():
+    with _lock:
+        for metrica in REGISTRO:
+            metrica.series.clear()
+
+
+def metricas(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        raise Http404('Métricas deshabilitadas')
+    autorizacion = request.META.get('HTTP_AUTHORIZATION', '')
+    if not constant_time_compare(autorizacion, f'Bearer {token}'):
+        return HttpResponse('No autorizado', status=401, content_type='text/plain')
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,155 @@
+"""Middleware that stays out of the way of the token-authenticated API.
+
+The API under ``/api/`` authenticates every request with a token (see
+``authentication``) and never uses the session, CSRF cookies or flash
+messages, yet the stock middleware loads and saves the session, checks
+CSRF and wraps the message storage on each call. These subclasses behave
+exactly like Django's for the admin and the template views and pass
+``/api/`` requests straight through.
+
+``AuthenticationMiddleware`` is skipped as well because it reads the
+session; DRF sets ``request.user`` itself when it authenticates the token.
+``LocaleMiddleware`` stays, since the API localises department names, and
+so does ``XFrameOptionsMiddleware``, which only adds a header.
+
+``MetricasMiddleware`` feeds the per-endpoint metrics in ``metrics``,
+``TrazasMiddleware`` opens the root span of sampled requests (``tracing``)
+and ``PerfilMiddleware`` profiles requests on demand (``profiling``).
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.db import connection
+from django.middleware import csrf
+
+from . import metrics, profiling, tracing
+
+
+PREFIJO_API = '/api/'
+
+
+def es_api(request):
+    return request.path_info.startswith(PREFIJO_API)
+
+
+class SoloWebMixin:
+    """Skip the wrapped middleware entirely for ``/api/`` requests."""
+
+    sync_capable = True
+    async_capable = False
+
+    def __call__(self, request):
+        if es_api(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SoloWebMixin, sessions_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SoloWebMixin, csrf.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # process_view is called by the handler, not from __call__
+        if es_api(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(SoloWebMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SoloWebMixin, messages_middleware.MessageMiddleware):
+    pass
+
+
+class _Consultas:
+    __slots__ = ('cantidad', 'segundos')
+
+    def __init__(self):
+        self.cantidad = 0
+        self.segundos = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.cantidad += 1
+            self.segundos += time.perf_counter() - inicio
+
+
+class MetricasMiddleware:
+    """Goes first in ``MIDDLEWARE`` so the latency covers the whole stack."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        metrics.iniciar_volcado()
+
+    def __call__(self, request):
+        consultas = _Consultas()
+        inicio = time.perf_counter()
+        with connection.execute_wrapper(consultas):
+            response = self.get_response(request)
+        duracion = time.perf_counter() - inicio
+
+        coincidencia = getattr(request, 'resolver_match', None)
+        # unresolved paths share one label so scanners cannot blow up the
+        # number of series
+        endpoint = (coincidencia.view_name if coincidencia else None) or 'sin_ruta'
+        metrics.duracion_peticion.observar(duracion, endpoint=endpoint, metodo=request.method)
+        metrics.peticiones.incrementar(endpoint=endpoint, metodo=request.method, estado=response.status_code)
+        metrics.consultas_peticion.observar(consultas.cantidad, endpoint=endpoint)
+        if consultas.segundos:
+            metrics.tiempo_consultas.incrementar(consultas.segundos, endpoint=endpoint)
+        if not response.streaming:
+            metrics.tamano_respuesta.observar(len(response.content), endpoint=endpoint)
+        return response
+
+
+class TrazasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        muestra = tracing.muestrear(request)
+        if muestra is None:
+            return self.get_response(request)
+
+        etiquetas = {'http.method': request.method, 'http.path': request.path_info}
+        with tracing.trazar(f'{request.method} {request.path_info}', *muestra, **etiquetas) as raiz:
+            with connection.execute_wrapper(tracing.ConsultasTrazadas()):
+                response = self.get_response(request)
+            coincidencia = getattr(request, 'resolver_match', None)
+            if coincidencia is not None:
+                raiz['name'] = f'{request.method} {coincidencia.view_name}'
+            raiz['tags']['http.status_code'] = str(response.status_code)
+        response['X-Trace-Id'] = raiz['traceId']
+        return response
+
+
+class PerfilMiddleware:
+    """Goes after ``AuthenticationMiddleware`` so web sessions are known."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.PROFILING_ENABLED or not profiling.solicitado(request):
+            return self.get_response(request)
+        if not profiling.es_superusuario(request):
+            return self.get_response(request)
+        if not profiling.ocupar():
+            response = self.get_response(request)
+            response['X-Profile'] = 'ocupado'
+            return response
+        try:
+            response, perfil_id = profiling.perfilar(self.get_response, request)
+        finally:
+            profiling.liberar()
+        response['X-Profile-Id'] = perfil_id
+        return response
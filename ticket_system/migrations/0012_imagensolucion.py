@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket_system', '0011_trabajoreporte'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImagenSolucion',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('archivo', models.CharField(max_length=255)),
+                ('tamano', models.PositiveIntegerField(default=0)),
+                ('referencias', models.IntegerField(db_index=True, default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Imagen de solución',
+                'verbose_name_plural': 'Imágenes de solución',
+                'db_table': 'imagen_solucion',
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:05
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket_system', '0012_imagensolucion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SesionSubida',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(blank=True, max_length=255)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('recibido', models.PositiveBigIntegerField(default=0)),
+                ('estado', models.CharField(choices=[('activa', 'Activa'), ('completada', 'Completada')], default='activa', max_length=20)),
+                ('url', models.CharField(blank=True, max_length=255)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True, db_index=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sesiones_subida', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sesión de subida',
+                'verbose_name_plural': 'Sesiones de subida',
+                'db_table': 'sesion_subida',
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+
+def registrar_tokens_existentes(apps, schema_editor):
+    # existing sessions start their expiry window now instead of at the
+    # token's creation date, so deploying this does not log everyone out
+    Token = apps.get_model('authtoken', 'Token')
+    TokenActividad = apps.get_model('ticket_system', 'TokenActividad')
+    ahora = timezone.now()
+    TokenActividad.objects.bulk_create(
+        [TokenActividad(token_id=key, ultimo_uso=ahora) for key in Token.objects.values_list('key', flat=True)],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authtoken', '0003_tokenproxy'),
+        ('ticket_system', '0013_sesionsubida'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenActividad',
+            fields=[
+                ('token', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='actividad', serialize=False, to='authtoken.token')),
+                ('ultimo_uso', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Actividad de token',
+                'verbose_name_plural': 'Actividad de tokens',
+                'db_table': 'token_actividad',
+            },
+        ),
+        migrations.RunPython(registrar_tokens_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:36
+
+from django.db import migrations, models
+from django.db.models import ExpressionWrapper, F
+
+
+def calcular_duraciones(apps, schema_editor):
+    # one UPDATE computed by the database; resolved tickets without a
+    # fecha_cierre have nothing to measure and stay NULL
+    Ticket = apps.get_model('ticket_system', 'Ticket')
+    Ticket.objects.filter(estado='resuelto', fecha_cierre__isnull=False).update(
+        duracion_resolucion=ExpressionWrapper(F('fecha_cierre') - F('fecha_creacion'), output_field=models.DurationField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket_system', '0014_tokenactividad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='duracion_resolucion',
+            field=models.DurationField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(calcular_duraciones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-19 16:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket_system', '0015_ticket_duracion_resolucion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajoreporte',
+            name='estado',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('completado', 'Completado'), ('error', 'Error'), ('expirado', 'Expirado')], db_index=True, default='pendiente', max_length=20),
+        ),
+    ]
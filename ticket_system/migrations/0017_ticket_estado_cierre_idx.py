@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket_system', '0016_trabajoreporte_expirado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['estado', 'fecha_cierre'], name='ticket_estado_cierre_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.11 on 2026-10-19 17:07
+
+from django.db import migrations, models
+
+
+def add_nombre_en(apps, schema_editor):
+    Departamento = apps.get_model('ticket_system', 'Departamento')
+    # the names the reports used to translate from a hard-coded map;
+    # departments added later get theirs through the admin
+    translation_map = {
+        'Calidad': 'Quality',
+        'Finanzas': 'Finance',
+        'Compras': 'Purchasing',
+        'Ventas': 'Sales',
+        'Ingenieria': 'Engineering',
+        'Logistica': 'Logistics',
+        'Recursos Humanos': 'Human Resources',
+        'Tecnologias de la Informacion': 'Information Technology',
+        'Mantenimiento': 'Maintenance',
+        'Produccion': 'Production',
+    }
+    for nombre, nombre_en in translation_map.items():
+        Departamento.objects.filter(nombre=nombre, nombre_en__isnull=True).update(nombre_en=nombre_en)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket_system', '0017_ticket_estado_cierre_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='departamento',
+            name='nombre_en',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.RunPython(add_nombre_en, reverse_code=migrations.RunPython.noop),
+    ]
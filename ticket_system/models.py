@@ -1,9 +1,13 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
 
 class Departamento(models.Model):
     nombre = models.CharField(max_length=100)
+    nombre_en = models.CharField(max_length=100, blank=True, null=True)
     gerente = models.CharField(max_length=100)
     email = models.EmailField()
     descripcion = models.TextField(blank=True)
@@ -142,6 +146,9 @@ class Ticket(models.Model):
     estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='abierto')
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_cierre = models.DateTimeField(null=True, blank=True)
+    # fecha_cierre - fecha_creacion, set by save() while the ticket is
+    # resolved so SLA percentiles can be computed in the database
+    duracion_resolucion = models.DurationField(null=True, blank=True, editable=False)
     cerrado_por = models.ForeignKey(
         Cerrador,
         on_delete=models.SET_NULL,
@@ -157,6 +164,163 @@ class Ticket(models.Model):
         verbose_name = 'Ticket'
         verbose_name_plural = 'Tickets'
         ordering = ['-fecha_creacion']
+        indexes = [
+            # count and latest closing date of the resolved tickets, polled
+            # by the admin page through tickets/estadisticas/
+            models.Index(fields=['estado', 'fecha_cierre'], name='ticket_estado_cierre_idx'),
+        ]
 
     def __str__(self):
         return f"Ticket #{self.id} - {self.asunto}"
+
+    def save(self, *args, **kwargs):
+        # every path (API, PATCH, admin) goes through here; bulk_create and
+        # QuerySet.update must set it themselves
+        if self.estado == 'resuelto' and self.fecha_cierre:
+            self.duracion_resolucion = self.fecha_cierre - (self.fecha_creacion or timezone.now())
+        else:
+            self.duracion_resolucion = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'estado', 'fecha_cierre'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'duracion_resolucion'}
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        # the image reference counts are diffed against the loaded value
+        from .signals import recordar_imagenes_cargadas
+        recordar_imagenes_cargadas(self)
+
+
+class TrabajoReporte(models.Model):
+    """A PDF report rendered in the background by ``report_jobs``."""
+
+    TIPO_CHOICES = [
+        ('estadisticas', 'Estadísticas'),
+        ('ticket', 'Ticket'),
+    ]
+
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('completado', 'Completado'),
+        ('error', 'Error'),
+        # the PDF was removed by the retention policy (report_store.podar)
+        ('expirado', 'Expirado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    parametros = models.JSONField(default=dict, blank=True)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente', db_index=True)
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='trabajos_reporte'
+    )
+    archivo = models.CharField(max_length=255, blank=True)
+    nombre_descarga = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'trabajo_reporte'
+        verbose_name = 'Trabajo de reporte'
+        verbose_name_plural = 'Trabajos de reporte'
+        ordering = ['-fecha_creacion']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} {self.id} ({self.estado})"
+
+    @property
+    def duracion_render(self):
+        if self.fecha_inicio and self.fecha_fin:
+            return (self.fecha_fin - self.fecha_inicio).total_seconds()
+        return None
+
+    @property
+    def tiempo_en_cola(self):
+        if self.fecha_inicio:
+            return (self.fecha_inicio - self.fecha_creacion).total_seconds()
+        return None
+
+
+class ImagenSolucion(models.Model):
+    """A stored solution image, keyed by the SHA-256 of the uploaded bytes.
+
+    ``referencias`` counts how many times the image appears in
+    ``Ticket.solucion_imagenes``; it is kept up to date by ``signals`` and
+    images left at zero are removed by ``manage.py purgar_imagenes``.
+    ``fecha_creacion`` is moved forward whenever the same bytes are
+    uploaded again, so the purge grace period counts from the last upload.
+    """
+
+    hash = models.CharField(max_length=64, primary_key=True)
+    archivo = models.CharField(max_length=255)
+    tamano = models.PositiveIntegerField(default=0)
+    referencias = models.IntegerField(default=0, db_index=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'imagen_solucion'
+        verbose_name = 'Imagen de solución'
+        verbose_name_plural = 'Imágenes de solución'
+
+    def __str__(self):
+        return f"{self.archivo} ({self.referencias} ref.)"
+
+
+class SesionSubida(models.Model):
+    """A resumable upload in progress, written by ``chunked_upload``."""
+
+    ESTADO_CHOICES = [
+        ('activa', 'Activa'),
+        ('completada', 'Completada'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(
+        Usuario,
+        on_delete=models.CASCADE,
+        related_name='sesiones_subida'
+    )
+    nombre = models.CharField(max_length=255, blank=True)
+    tamano = models.PositiveBigIntegerField()
+    # bytes confirmed on disk; the next chunk must start here
+    recibido = models.PositiveBigIntegerField(default=0)
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='activa')
+    url = models.CharField(max_length=255, blank=True)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        db_table = 'sesion_subida'
+        verbose_name = 'Sesión de subida'
+        verbose_name_plural = 'Sesiones de subida'
+
+    def __str__(self):
+        return f"{self.nombre} {self.recibido}/{self.tamano}"
+
+
+class TokenActividad(models.Model):
+    """Last time an API token was used, for sliding expiry.
+
+    Written in batches by ``token_activity.flush``, not on every request.
+    """
+
+    token = models.OneToOneField(
+        Token,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='actividad'
+    )
+    ultimo_uso = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'token_actividad'
+        verbose_name = 'Actividad de token'
+        verbose_name_plural = 'Actividad de tokens'
+
+    def __str__(self):
+        return f"{self.token_id[:8]}… {self.ultimo_uso}"
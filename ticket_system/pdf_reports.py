@@ -0,0 +1,477 @@
+"""ReportLab rendering for the PDF reports.
+
+The functions here only take the plain structures built by
+``report_data`` and return the PDF bytes. They never touch the ORM, so
+they can run in a separate worker process (see ``report_jobs``).
+
+Documents are built with ``invariant=True`` (no creation timestamp or
+random document id), so the same data always yields the same bytes and
+``report_store`` can deduplicate them.
+"""
+import time
+from io import BytesIO
+from itertools import islice
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.charts.piecharts import Pie
+
+from . import tracing
+from .pdf_toolkit import (
+    TRADUCCIONES_ESTADISTICAS,
+    TRADUCCIONES_LIBRO,
+    TRADUCCIONES_TICKET,
+    get_styles,
+    logo_header,
+    traducciones,
+)
+
+
+def render_estadisticas_pdf(datos):
+    """Render the weekly statistics report from ``obtener_datos_estadisticas``."""
+    lang = datos['lang']
+    txt = traducciones(TRADUCCIONES_ESTADISTICAS, lang)
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30,
+                            invariant=True)
+
+    elements = []
+    styles = get_styles()
+    title_style = styles['stats_title']
+    heading_style = styles['stats_heading']
+
+    fecha_inicio = datos['fecha_inicio']
+
+    elements.append(logo_header())
+    elements.append(Spacer(1, 0.15 * inch))
+
+    title = Paragraph(txt['title'], title_style)
+    elements.append(title)
+
+    subtitle = Paragraph(
+        f"{txt['period']} {fecha_inicio.strftime('%d/%m/%Y')} - {datos['fecha_fin'].strftime('%d/%m/%Y')}",
+        styles['stats_subtitle']
+    )
+    elements.append(subtitle)
+    elements.append(Spacer(1, 0.2 * inch))
+
+    dept_stats = datos['departamentos']
+    user_stats = datos['usuarios']
+    motivo_stats = datos['motivos']
+    prioridad_stats = datos['prioridades']
+
+    drawing_dept = Drawing(310, 210)
+    if dept_stats:
+        bc_dept = HorizontalBarChart()
+        bc_dept.x = 100
+        bc_dept.y = 30
+        bc_dept.height = 150
+        bc_dept.width = 190
+        dept_names = [nombre for nombre, total in dept_stats]
+        dept_values = [[total for nombre, total in dept_stats]]
+        bc_dept.data = dept_values
+        bc_dept.categoryAxis.categoryNames = dept_names
+        bc_dept.categoryAxis.labels.fontSize = 8
+        bc_dept.valueAxis.valueMin = 0
+        bc_dept.valueAxis.valueMax = max(dept_values[0]) * 1.2
+        bc_dept.valueAxis.labels.fontSize = 8
+        bc_dept.bars[0].fillColor = colors.HexColor('#3b82f6')
+        bc_dept.barWidth = 15
+        drawing_dept.add(bc_dept)
+
+    drawing_users = Drawing(310, 210)
+    if user_stats:
+        bc_users = HorizontalBarChart()
+        bc_users.x = 100
+        bc_users.y = 30
+        bc_users.height = 150
+        bc_users.width = 190
+        user_names = [nombre for nombre, total in user_stats]
+        user_values = [[total for nombre, total in user_stats]]
+        bc_users.data = user_values
+        bc_users.categoryAxis.categoryNames = user_names
+        bc_users.categoryAxis.labels.fontSize = 8
+        bc_users.valueAxis.valueMin = 0
+        bc_users.valueAxis.valueMax = max(user_values[0]) * 1.2
+        bc_users.valueAxis.labels.fontSize = 8
+        bc_users.bars[0].fillColor = colors.HexColor('#10b981')
+        bc_users.barWidth = 15
+        drawing_users.add(bc_users)
+
+    drawing_motivos = Drawing(310, 210)
+    if motivo_stats:
+        pie_motivo = Pie()
+        pie_motivo.x = 90
+        pie_motivo.y = 45
+        pie_motivo.width = 130
+        pie_motivo.height = 130
+        # labels arrive already translated from the data layer
+        motivo_labels = [nombre for nombre, total in motivo_stats]
+        motivo_values = [total for nombre, total in motivo_stats]
+        pie_motivo.data = motivo_values
+        pie_motivo.labels = motivo_labels
+        pie_motivo.slices.strokeWidth = 0.5
+        pie_motivo.slices.fontSize = 9
+        colores = [
+            colors.HexColor('#3b82f6'),
+            colors.HexColor('#10b981'),
+            colors.HexColor('#f59e0b'),
+            colors.HexColor('#ef4444'),
+            colors.HexColor('#8b5cf6'),
+            colors.HexColor('#ec4899'),
+        ]
+        for i in range(len(motivo_values)):
+            pie_motivo.slices[i].fillColor = colores[i % len(colores)]
+        drawing_motivos.add(pie_motivo)
+
+    drawing_prioridad = Drawing(310, 210)
+    if prioridad_stats:
+        pie_prioridad = Pie()
+        pie_prioridad.x = 90
+        pie_prioridad.y = 45
+        pie_prioridad.width = 130
+        pie_prioridad.height = 130
+        prioridad_labels = [nombre for codigo, nombre, total in prioridad_stats]
+        prioridad_values = [total for codigo, nombre, total in prioridad_stats]
+        pie_prioridad.data = prioridad_values
+        pie_prioridad.labels = prioridad_labels
+        pie_prioridad.slices.strokeWidth = 0.5
+        pie_prioridad.slices.fontSize = 9
+        # keyed on the stored code so the colours survive translation
+        prioridad_colores = {
+            'baja': colors.HexColor('#3b82f6'),
+            'media': colors.HexColor('#f59e0b'),
+            'alta': colors.HexColor('#fb923c'),
+            'urgente': colors.HexColor('#ef4444')
+        }
+        for i, (codigo, nombre, total) in enumerate(prioridad_stats):
+            pie_prioridad.slices[i].fillColor = prioridad_colores.get(codigo, colors.gray)
+        drawing_prioridad.add(pie_prioridad)
+
+    tabla_graficas = Table([
+        [Paragraph(txt['tickets_by_reason'], heading_style), Paragraph(txt['tickets_by_dept'], heading_style)],
+        [drawing_motivos, drawing_dept],
+        [Paragraph(txt['users_most_tickets'], heading_style), Paragraph(txt['tickets_by_priority'], heading_style)],
+        [drawing_users, drawing_prioridad],
+    ], colWidths=[310, 310])
+
+    tabla_graficas.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        ('TOPPADDING', (0, 0), (-1, -1), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+        ('TOPPADDING', (0, 0), (-1, 0), 0),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 2), (-1, 2), 12),
+        ('BOTTOMPADDING', (0, 2), (-1, 2), 8),
+    ]))
+
+    elements.append(tabla_graficas)
+
+    with tracing.span('pdf.build', reporte='estadisticas'):
+        doc.build(elements)
+
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
+
+
+def render_ticket_pdf(datos):
+    """Render the single-ticket report from ``obtener_datos_ticket``."""
+    lang = datos['lang']
+    t = traducciones(TRADUCCIONES_TICKET, lang)
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=40, leftMargin=40, topMargin=40, bottomMargin=40,
+                            invariant=True)
+
+    elements = []
+    styles = get_styles()
+    title_style = styles['ticket_title']
+    heading_style = styles['ticket_heading']
+
+    elements.append(logo_header())
+    elements.append(Spacer(1, 0.15 * inch))
+
+    title = Paragraph(f"{datos['asunto']}", title_style)
+    elements.append(title)
+
+    now = datos['generado']
+    if lang == 'en':
+        date_format = now.strftime('%m/%d/%Y at %I:%M %p')
+    else:
+        date_format = now.strftime('%d/%m/%Y a las %H:%M')
+
+    subtitle = Paragraph(
+        f"{t['generated']} {date_format}",
+        styles['ticket_subtitle']
+    )
+    elements.append(subtitle)
+    elements.append(Spacer(1, 0.3 * inch))
+
+    status_translations = {
+        'abierto': t['status_open'],
+        'en_proceso': t['status_in_progress'],
+        'resuelto': t['status_resolved']
+    }
+
+    priority_translations = {
+        'baja': t['priority_low'],
+        'media': t['priority_medium'],
+        'alta': t['priority_high'],
+        'urgente': t['priority_urgent']
+    }
+
+    tiempo_resolucion = t['pending']
+    if datos['tiempo_resolucion'] is not None:
+        tiempo_transcurrido = datos['tiempo_resolucion']
+        dias = tiempo_transcurrido.days
+        horas = tiempo_transcurrido.seconds // 3600
+        minutos = (tiempo_transcurrido.seconds % 3600) // 60
+
+        if dias > 0:
+            day_word = t['days'] if dias != 1 else t['day']
+            hour_word = t['hours'] if horas != 1 else t['hour']
+            tiempo_resolucion = f"{dias} {day_word}, {horas} {hour_word}"
+        elif horas > 0:
+            hour_word = t['hours'] if horas != 1 else t['hour']
+            minute_word = t['minutes'] if minutos != 1 else t['minute']
+            tiempo_resolucion = f"{horas} {hour_word}, {minutos} {minute_word}"
+        else:
+            minute_word = t['minutes'] if minutos != 1 else t['minute']
+            tiempo_resolucion = f"{minutos} {minute_word}"
+
+    if lang == 'en':
+        date_format_ticket = '%m/%d/%Y %I:%M %p'
+    else:
+        date_format_ticket = '%d/%m/%Y %H:%M'
+
+    info_data = [
+        [t['field'], t['information']],
+        [t['subject'], datos['asunto']],
+        [t['status'], status_translations.get(datos['estado'], datos['estado_display'])],
+        [t['priority'], priority_translations.get(datos['prioridad'], datos['prioridad_display'])],
+        [t['created_by'], datos['creado_por']],
+        [t['department'], datos['departamento']],
+        [t['reason'], datos['motivo']],
+        [t['creation_date'], datos['fecha_creacion'].strftime(date_format_ticket)],
+        [t['resolution_time'], tiempo_resolucion],
+    ]
+
+    if datos['fecha_cierre']:
+        info_data.append([t['close_date'], datos['fecha_cierre'].strftime(date_format_ticket)])
+
+    info_table = Table(info_data, colWidths=[2 * inch, 5 * inch])
+    info_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2563eb')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('TOPPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (0, -1), colors.HexColor('#f3f4f6')),
+        ('FONTNAME', (0, 1), (0, -1), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db')),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 10),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+        ('TOPPADDING', (0, 1), (-1, -1), 8),
+        ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ]))
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.3 * inch))
+
+    elements.append(Paragraph(t['description'], heading_style))
+    elements.append(Spacer(1, 0.1 * inch))
+
+    content_text = datos['contenido'].replace('\n', '<br/>')
+    content_paragraph = Paragraph(content_text, styles['ticket_content'])
+
+    content_frame_data = [[content_paragraph]]
+    content_table = Table(content_frame_data, colWidths=[7 * inch])
+    content_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f9fafb')),
+        ('BOX', (0, 0), (-1, -1), 1, colors.HexColor('#d1d5db')),
+        ('LEFTPADDING', (0, 0), (-1, -1), 15),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 15),
+        ('TOPPADDING', (0, 0), (-1, -1), 15),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 15),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+
+    elements.append(content_table)
+
+    with tracing.span('pdf.build', reporte='ticket'):
+        doc.build(elements)
+
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
+
+
+class FlowablesPerezosos(list):
+    """Flowable list that refills itself from a generator while ``build`` runs.
+
+    ``BaseDocTemplate.build`` only ever calls ``len()``, reads and deletes
+    ``flowables[0]`` and re-inserts split remainders at the front, so
+    keeping a couple of items buffered is enough: flowables are created
+    just before they are laid out and dropped once they are drawn.
+    """
+
+    def __init__(self, iniciales, generador):
+        super().__init__(iniciales)
+        self._generador = generador
+
+    def _rellenar(self):
+        # keep two items so keepWithNext can always peek at the next one
+        while self._generador is not None and list.__len__(self) < 2:
+            siguiente = next(self._generador, None)
+            if siguiente is None:
+                self._generador = None
+            else:
+                self.append(siguiente)
+
+    def __len__(self):
+        self._rellenar()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._rellenar()
+        return list.__getitem__(self, index)
+
+
+LIBRO_ANCHOS = [40, 72, 190, 90, 90, 80, 50, 55, 65]
+# characters that fit each column at the ledger font size; None = no limit
+LIBRO_LIMITES = [None, None, 48, 22, 22, 20, 12, 14, None]
+LIBRO_ALTO_FILA = 12
+LIBRO_FILAS_POR_TABLA = 250
+
+ESTILO_LIBRO_ENCABEZADO = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#2563eb')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.white),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+ESTILO_LIBRO_FILAS = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('ROWBACKGROUNDS', (0, 0), (-1, -1), [colors.white, colors.HexColor('#f3f4f6')]),
+    ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.HexColor('#d1d5db')),
+])
+
+
+def _recortar(fila):
+    return [
+        valor if limite is None or len(valor) <= limite else valor[:limite - 3] + '...'
+        for valor, limite in zip(fila, LIBRO_LIMITES)
+    ]
+
+
+def _tabla_encabezado_libro(columnas):
+    tabla = Table([columnas], colWidths=LIBRO_ANCHOS, rowHeights=LIBRO_ALTO_FILA + 2)
+    tabla.setStyle(ESTILO_LIBRO_ENCABEZADO)
+    return tabla
+
+
+def _tablas_libro(filas):
+    filas = iter(filas)
+    while True:
+        bloque = [_recortar(fila) for fila in islice(filas, LIBRO_FILAS_POR_TABLA)]
+        if not bloque:
+            return
+        tabla = Table(bloque, colWidths=LIBRO_ANCHOS, rowHeights=LIBRO_ALTO_FILA)
+        tabla.setStyle(ESTILO_LIBRO_FILAS)
+        yield tabla
+
+
+def render_libro_pdf(datos, filas):
+    """Render the ticket ledger; returns ``(pdf_bytes, paginas)``.
+
+    ``datos`` comes from ``obtener_encabezado_libro`` and ``filas`` is the
+    row iterator from ``iter_filas_libro``. Rows are turned into tables of
+    ``LIBRO_FILAS_POR_TABLA`` rows only when the layout reaches them, so
+    memory stays flat however many tickets the period holds. Unlike the
+    other renderers this one runs in the request process, because the rows
+    are read from the database while the document is built.
+    """
+    lang = datos['lang']
+    txt = traducciones(TRADUCCIONES_LIBRO, lang)
+    styles = get_styles()
+    pagesize = landscape(letter)
+    alto_encabezado = LIBRO_ALTO_FILA + 2
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesize, rightMargin=30, leftMargin=30,
+                            topMargin=30 + alto_encabezado, bottomMargin=30, invariant=True)
+
+    encabezado = _tabla_encabezado_libro(txt['columns'])
+
+    def pie(canvas, doc):
+        canvas.saveState()
+        canvas.setFont('Helvetica', 7)
+        canvas.drawRightString(pagesize[0] - 30, 15, f"{txt['page']} {doc.page}")
+        canvas.restoreState()
+
+    def pagina_siguiente(canvas, doc):
+        # column headers repeated above the frame on every later page
+        pie(canvas, doc)
+        encabezado.wrapOn(canvas, doc.width, alto_encabezado)
+        encabezado.drawOn(canvas, doc.leftMargin, pagesize[1] - 30 - alto_encabezado)
+
+    iniciales = [
+        logo_header(),
+        Spacer(1, 0.1 * inch),
+        Paragraph(txt['title'], styles['stats_title']),
+        Paragraph(
+            f"{txt['period']} {datos['fecha_inicio'].strftime('%d/%m/%Y')} - "
+            f"{datos['fecha_fin'].strftime('%d/%m/%Y')} &nbsp; {txt['total']} {datos['total']}",
+            styles['stats_subtitle']
+        ),
+        Spacer(1, 0.15 * inch),
+        _tabla_encabezado_libro(txt['columns']),
+    ]
+
+    with tracing.span('pdf.build', reporte='libro'):
+        doc.build(FlowablesPerezosos(iniciales, _tablas_libro(filas)), onFirstPage=pie, onLaterPages=pagina_siguiente)
+
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content, doc.page
+
+
+RENDERERS = {
+    'estadisticas': render_estadisticas_pdf,
+    'ticket': render_ticket_pdf,
+}
+
+
+def render_report(tipo, datos):
+    return RENDERERS[tipo](datos)
+
+
+def render_report_medido(tipo, datos):
+    """Entry point for the job pool; returns the PDF and wall-clock bounds.
+
+    It lives here rather than in ``report_jobs`` because the spawned worker
+    imports it by name and must not import the models.
+    """
+    inicio = time.time()
+    contenido = render_report(tipo, datos)
+    return contenido, inicio, time.time()
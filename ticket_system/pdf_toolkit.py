@@ -0,0 +1,261 @@
+"""Shared building blocks for every ReportLab document.
+
+Paragraph styles, translation tables and the decoded logo are built once
+per process and reused by every report; before this each request called
+``getSampleStyleSheet()``, rebuilt its ``ParagraphStyle`` objects and
+re-read and re-decoded ``client/public/image.png``.
+
+The styles are shared, so callers must treat them as read-only.
+"""
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus.flowables import Flowable
+
+
+# Streams are written as raw Flate data instead of ASCII85 text. ASCII85
+# only matters for 7-bit transports; here it made the PDFs ~25% larger and
+# its pure-Python encoder was the single biggest cost of drawing the logo.
+rl_config.useA85 = 0
+
+
+TRADUCCIONES_ESTADISTICAS = {
+    'es': {
+        'title': 'Reporte Semanal de Tickets',
+        'period': 'Periodo:',
+        'tickets_by_reason': 'Tickets por Motivo',
+        'tickets_by_dept': 'Tickets por Departamento',
+        'users_most_tickets': 'Usuarios con Más Tickets',
+        'tickets_by_priority': 'Tickets por Prioridad',
+    },
+    'en': {
+        'title': 'Weekly Ticket Report',
+        'period': 'Period:',
+        'tickets_by_reason': 'Tickets by Reason',
+        'tickets_by_dept': 'Tickets by Department',
+        'users_most_tickets': 'Users with Most Tickets',
+        'tickets_by_priority': 'Tickets by Priority',
+    }
+}
+
+TRADUCCIONES_TICKET = {
+    'es': {
+        'title': 'Detalles del Ticket',
+        'generated': 'Generado el',
+        'at': 'a las',
+        'field': 'Campo',
+        'information': 'Información',
+        'subject': 'Asunto',
+        'status': 'Estado',
+        'priority': 'Prioridad',
+        'created_by': 'Creado por',
+        'department': 'Departamento',
+        'reason': 'Motivo',
+        'creation_date': 'Fecha de creación',
+        'resolution_time': 'Tiempo de resolución',
+        'pending': 'Pendiente',
+        'close_date': 'Fecha de cierre',
+        'description': 'Descripción del Ticket',
+        'day': 'día',
+        'days': 'días',
+        'hour': 'hora',
+        'hours': 'horas',
+        'minute': 'minuto',
+        'minutes': 'minutos',
+        'status_open': 'Abierto',
+        'status_in_progress': 'En Proceso',
+        'status_resolved': 'Resuelto',
+        'priority_low': 'Baja',
+        'priority_medium': 'Media',
+        'priority_high': 'Alta',
+        'priority_urgent': 'Urgente',
+    },
+    'en': {
+        'title': 'Ticket Details',
+        'generated': 'Generated on',
+        'at': 'at',
+        'field': 'Field',
+        'information': 'Information',
+        'subject': 'Subject',
+        'status': 'Status',
+        'priority': 'Priority',
+        'created_by': 'Created by',
+        'department': 'Department',
+        'reason': 'Reason',
+        'creation_date': 'Creation date',
+        'resolution_time': 'Resolution time',
+        'pending': 'Pending',
+        'close_date': 'Close date',
+        'description': 'Ticket Description',
+        'day': 'day',
+        'days': 'days',
+        'hour': 'hour',
+        'hours': 'hours',
+        'minute': 'minute',
+        'minutes': 'minutes',
+        'status_open': 'Open',
+        'status_in_progress': 'In Progress',
+        'status_resolved': 'Resolved',
+        'priority_low': 'Low',
+        'priority_medium': 'Medium',
+        'priority_high': 'High',
+        'priority_urgent': 'Urgent',
+    }
+}
+
+TRADUCCIONES_LIBRO = {
+    'es': {
+        'title': 'Libro de Tickets',
+        'period': 'Periodo:',
+        'total': 'Total de tickets:',
+        'page': 'Página',
+        'columns': ['ID', 'Creado', 'Asunto', 'Departamento', 'Usuario', 'Motivo', 'Prioridad', 'Estado',
+                    'Cierre'],
+    },
+    'en': {
+        'title': 'Ticket Ledger',
+        'period': 'Period:',
+        'total': 'Total tickets:',
+        'page': 'Page',
+        'columns': ['ID', 'Created', 'Subject', 'Department', 'User', 'Reason', 'Priority', 'Status',
+                    'Closed'],
+    }
+}
+
+
+def traducciones(tabla, lang):
+    return tabla.get(lang, tabla['es'])
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Every ``ParagraphStyle`` used by the reports, keyed by role."""
+    base = getSampleStyleSheet()
+    return {
+        'stats_title': ParagraphStyle(
+            'CustomTitle',
+            parent=base['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#2563eb'),
+            spaceAfter=6,
+            alignment=TA_CENTER
+        ),
+        'stats_heading': ParagraphStyle(
+            'CustomHeading',
+            parent=base['Heading2'],
+            fontSize=12,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=10,
+            spaceBefore=12,
+            alignment=TA_CENTER
+        ),
+        'stats_subtitle': ParagraphStyle(
+            'Subtitle',
+            parent=base['Normal'],
+            fontSize=9,
+            alignment=TA_CENTER
+        ),
+        'ticket_title': ParagraphStyle(
+            'CustomTitle',
+            parent=base['Heading1'],
+            fontSize=20,
+            textColor=colors.HexColor('#2563eb'),
+            spaceAfter=12,
+            alignment=TA_CENTER
+        ),
+        'ticket_heading': ParagraphStyle(
+            'CustomHeading',
+            parent=base['Heading2'],
+            fontSize=14,
+            textColor=colors.HexColor('#1e40af'),
+            spaceAfter=8,
+            spaceBefore=12,
+            alignment=TA_LEFT
+        ),
+        'ticket_subtitle': ParagraphStyle(
+            'Subtitle',
+            parent=base['Normal'],
+            fontSize=10,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#6b7280')
+        ),
+        'ticket_content': ParagraphStyle(
+            'ContentText',
+            parent=base['Normal'],
+            fontSize=10,
+            alignment=TA_LEFT,
+            leftIndent=10,
+            rightIndent=10,
+            spaceAfter=6,
+            leading=14
+        ),
+    }
+
+
+def logo_path():
+    return os.path.join(settings.BASE_DIR, 'client', 'public', 'image.png')
+
+
+@lru_cache(maxsize=None)
+def get_logo():
+    """The decoded project logo, or ``None`` when the file is missing."""
+    path = logo_path()
+    if not os.path.exists(path):
+        return None
+    logo = ImageReader(path)
+    # decode now so the pixel data is cached on the reader, not per document
+    logo.getRGBData()
+    return logo
+
+
+class LogoHeader(Flowable):
+    def __init__(self, width, height, logo=None):
+        Flowable.__init__(self)
+        self.width = width
+        self.height = height
+        self.logo = logo
+
+    def draw(self):
+        canvas = self.canv
+
+        if self.logo is not None:
+            logo_width = 2.5 * inch
+            logo_height = 0.7 * inch
+            x_position = 0.5 * inch
+            y_position = self.height - logo_height - 0.2 * inch
+
+            canvas.drawImage(
+                self.logo,
+                x_position,
+                y_position,
+                width=logo_width,
+                height=logo_height,
+                preserveAspectRatio=True,
+                mask='auto'
+            )
+        else:
+            canvas.setFillColor(colors.HexColor('#2563eb'))
+            canvas.setFont('Helvetica-Bold', 24)
+            canvas.drawString(0.5 * inch, self.height - 0.5 * inch, 'COFATECH')
+
+
+def logo_header():
+    return LogoHeader(7.5 * inch, 60, get_logo())
+
+
+def warm_up():
+    """Build every cached object now instead of on the first report."""
+    get_styles()
+    get_logo()
+
+
+def clear_caches():
+    get_styles.cache_clear()
+    get_logo.cache_clear()
@@ -0,0 +1,145 @@
+"""On-demand profiling of single requests, for superusers.
+
+A superuser adds ``X-Profile: 1`` (or ``?_perfil=1``) to a request and
+``middleware.PerfilMiddleware`` runs it under ``cProfile``, recording
+every SQL statement with its duration. The response is unchanged apart
+from an ``X-Profile-Id`` header; the report (top functions plus the SQL)
+is stored under ``PROFILE_ROOT`` and read back from
+``/api/perfiles/<id>/``, with ``?formato=prof`` for the raw ``pstats``
+dump (snakeviz, ``python -m pstats``).
+
+Up to Python 3.11 ``cProfile`` only hooks the thread it runs in, so
+requests served meanwhile by other threads are not slowed down; from 3.12
+it is built on ``sys.monitoring`` and briefly sees every thread. Either
+way only one request per process is profiled at a time; a second one runs
+normally and gets ``X-Profile: ocupado``.
+Streaming responses (the ZIP export) are only profiled up to the moment
+the view returns. Only the newest ``PROFILE_MAX_FILES`` reports are kept.
+"""
+import cProfile
+import io
+import os
+import pstats
+import re
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from rest_framework import exceptions
+
+from .authentication import CachedTokenAuthentication
+
+
+TOP_FUNCIONES = 40
+
+_lock = threading.Lock()
+_ID = re.compile(r'^[0-9a-f]{32}$')
+
+
+class ConsultasPerfil:
+    """``execute_wrapper`` that keeps every statement with its duration."""
+
+    def __init__(self):
+        self.consultas = []
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((time.perf_counter() - inicio, sql))
+
+
+def solicitado(request):
+    return request.META.get('HTTP_X_PROFILE') == '1' or request.GET.get('_perfil') == '1'
+
+
+def es_superusuario(request):
+    # the API skips AuthenticationMiddleware, so the token is checked here;
+    # DRF checks it again for the view, from the token cache
+    usuario = getattr(request, 'user', None)
+    if usuario is None or not usuario.is_authenticated:
+        try:
+            resultado = CachedTokenAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return False
+        usuario = resultado[0] if resultado else None
+    return usuario is not None and usuario.is_authenticated and usuario.rol == 'superuser'
+
+
+def ocupar():
+    """Take the per-process profiling slot; False if it is in use."""
+    return _lock.acquire(blocking=False)
+
+
+def liberar():
+    _lock.release()
+
+
+def _root():
+    return Path(settings.PROFILE_ROOT)
+
+
+def ruta(perfil_id, extension):
+    if not _ID.match(perfil_id):
+        return None
+    return _root() / f"{perfil_id}.{extension}"
+
+
+def _escribir(path, contenido):
+    # atomic, like report_store: readers never see half a report
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(contenido)
+    os.replace(tmp, path)
+
+
+def guardar(perfil, consultas, request, response, duracion):
+    """Write the text report and the pstats dump; returns the profile id."""
+    perfil_id = uuid.uuid4().hex
+    _root().mkdir(parents=True, exist_ok=True)
+
+    salida = io.StringIO()
+    salida.write(f"{request.method} {request.get_full_path()} -> {response.status_code}\n")
+    salida.write(f"Duración total: {duracion * 1000:.1f} ms\n")
+    total_sql = sum(segundos for segundos, _ in consultas)
+    salida.write(f"Consultas SQL: {len(consultas)} ({total_sql * 1000:.1f} ms)\n\n")
+    stats = pstats.Stats(perfil, stream=salida)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCIONES)
+    salida.write('\nSQL (en orden de ejecución)\n')
+    for segundos, sql in consultas:
+        salida.write(f"{segundos * 1000:9.2f} ms  {sql}\n")
+
+    _escribir(ruta(perfil_id, 'txt'), salida.getvalue().encode())
+    fd, tmp = tempfile.mkstemp(dir=_root(), suffix='.tmp')
+    os.close(fd)
+    stats.dump_stats(tmp)
+    os.replace(tmp, ruta(perfil_id, 'prof'))
+    _podar()
+    return perfil_id
+
+
+def _podar():
+    informes = sorted(_root().glob('*.txt'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in informes[settings.PROFILE_MAX_FILES:]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+
+def perfilar(get_response, request):
+    """Run ``get_response`` under cProfile; returns ``(response, perfil_id)``."""
+    consultas = ConsultasPerfil()
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    with connection.execute_wrapper(consultas):
+        perfil.enable()
+        try:
+            response = get_response(request)
+        finally:
+            perfil.disable()
+    duracion = time.perf_counter() - inicio
+    return response, guardar(perfil, consultas.consultas, request, response, duracion)
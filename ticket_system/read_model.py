@@ -0,0 +1,215 @@
+"""In-process read model of the open (not resolved) tickets.
+
+Admins mostly look at the few thousand tickets that are still open, so
+each worker keeps them in memory: one ``TicketAbierto`` per ticket (with
+``__slots__``) holding the fields used for filtering plus the ticket's
+JSON, already encoded by ``TicketSerializer`` once per language. A list
+request then only filters, sorts and joins bytes.
+
+The model follows the ``tickets`` version from ``cache_utils``:
+
+* saves and deletes in this process bump the version and re-encode the
+  ticket after the transaction commits (``cambio_local``);
+* a version bumped by another process, or a model older than
+  ``READ_MODEL_RECONCILE_SECONDS`` (which also catches ``QuerySet.update``
+  and renamed users or departments), marks it stale.
+
+A stale or not yet loaded model answers nothing: callers fall back to the
+ORM while a reload runs in a background thread. The first request that
+asks for the model triggers the initial load.
+
+The version only reveals other workers' writes when it lives in a shared
+cache, so the model stays off unless ``CACHE_SHARED`` is set (see
+``activo``). Only lists filtered on open states
+(``?estado=abierto,en_proceso``) and the stats endpoint use it; the admin
+ticket page polls exactly those two and reads the resolved tickets from
+the database only when ``estadisticas`` reports a new count or closing
+date.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import translation
+from rest_framework.renderers import JSONRenderer
+
+from .cache_utils import get_version
+from .models import Ticket
+
+
+ESTADOS_ABIERTOS = ('abierto', 'en_proceso')
+
+
+class TicketAbierto:
+    __slots__ = ('id', 'estado', 'prioridad', 'departamento_id', 'fecha_creacion', 'json')
+
+    def __init__(self, ticket, json):
+        self.id = ticket.id
+        self.estado = ticket.estado
+        self.prioridad = ticket.prioridad
+        self.departamento_id = ticket.departamento_id
+        self.fecha_creacion = ticket.fecha_creacion
+        self.json = json  # tuple of bytes, one per IDIOMAS entry
+
+
+def activo():
+    """Whether the model may be used: enabled, and the version cache is shared."""
+    return settings.READ_MODEL_ENABLED and settings.CACHE_SHARED
+
+
+def _idiomas():
+    return tuple(codigo for codigo, _ in settings.LANGUAGES)
+
+
+def _consulta():
+    return Ticket.objects.select_related(
+        'usuario__departamento', 'departamento', 'motivo', 'cerrado_por'
+    )
+
+
+class ModeloLectura:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tickets = {}
+        self._orden = None
+        self._cargando = False
+        self.version = None
+        self.cargado_en = None
+
+    def _construir(self, ticket):
+        from .serializers import TicketSerializer
+
+        renderer = JSONRenderer()
+        json = []
+        for idioma in _idiomas():
+            with translation.override(idioma):
+                json.append(renderer.render(TicketSerializer(ticket).data))
+        return TicketAbierto(ticket, tuple(json))
+
+    def cargar(self):
+        # the version is read first: a change during the query leaves the
+        # model stale instead of current without the change
+        version = get_version('tickets')
+        tickets = {}
+        for ticket in _consulta().exclude(estado='resuelto').iterator(chunk_size=500):
+            tickets[ticket.id] = self._construir(ticket)
+        with self._lock:
+            self._tickets = tickets
+            self._orden = None
+            self.version = version
+            self.cargado_en = time.monotonic()
+
+    def _recargar_en_segundo_plano(self):
+        try:
+            self.cargar()
+        finally:
+            with self._lock:
+                self._cargando = False
+            connection.close()
+
+    def vigente(self):
+        if self.cargado_en is None or self.version != get_version('tickets'):
+            return False
+        return time.monotonic() - self.cargado_en < settings.READ_MODEL_RECONCILE_SECONDS
+
+    def asegurar(self):
+        """True if the model is current; otherwise start a reload."""
+        if not activo():
+            return False
+        if self.vigente():
+            return True
+        if not settings.READ_MODEL_BACKGROUND:
+            self.cargar()
+            return True
+        with self._lock:
+            if self._cargando:
+                return False
+            self._cargando = True
+        threading.Thread(target=self._recargar_en_segundo_plano, name='modelo-lectura', daemon=True).start()
+        return False
+
+    def cambio_local(self, ticket_id, version):
+        """Record a save or delete made by this process.
+
+        ``version`` is the value ``bump_version`` returned for it. If it
+        directly follows ours, nobody else wrote in between and the model
+        stays current once the ticket is re-read after the commit.
+        """
+        with self._lock:
+            if self.version is None:
+                return
+            if version == self.version + 1:
+                self.version = version
+            else:
+                self.cargado_en = None
+        transaction.on_commit(lambda: self._aplicar(ticket_id))
+
+    def _aplicar(self, ticket_id):
+        ticket = _consulta().filter(pk=ticket_id).exclude(estado='resuelto').first()
+        nuevo = self._construir(ticket) if ticket is not None else None
+        with self._lock:
+            if nuevo is None:
+                self._tickets.pop(ticket_id, None)
+            else:
+                self._tickets[ticket_id] = nuevo
+            self._orden = None
+
+    def _ordenados(self):
+        with self._lock:
+            if self._orden is None:
+                # Ticket.Meta.ordering
+                self._orden = sorted(self._tickets.values(), key=lambda t: t.fecha_creacion, reverse=True)
+            return self._orden
+
+    def listar(self, estados, prioridad=None, departamento_id=None):
+        """JSON array of the matching open tickets in the active language.
+
+        Returns None when the model cannot answer (stale, or a state or
+        language it does not hold).
+        """
+        if not estados or not set(estados) <= set(ESTADOS_ABIERTOS):
+            return None
+        idioma = translation.get_language() or ''
+        indices = [i for i, codigo in enumerate(_idiomas()) if idioma.startswith(codigo)]
+        if not indices or not self.asegurar():
+            return None
+        indice = indices[0]
+        partes = [
+            t.json[indice] for t in self._ordenados()
+            if t.estado in estados
+            and (prioridad is None or t.prioridad == prioridad)
+            and (departamento_id is None or t.departamento_id == departamento_id)
+        ]
+        return b'[' + b','.join(partes) + b']'
+
+    def estadisticas(self):
+        """Counts of the open tickets, or None when the model is stale."""
+        if not self.asegurar():
+            return None
+        return resumir(
+            (t.estado, t.prioridad, t.departamento_id, t.fecha_creacion) for t in self._ordenados()
+        )
+
+
+def resumir(filas):
+    """Stats from ``(estado, prioridad, departamento_id, fecha_creacion)`` rows."""
+    por_estado, por_prioridad, por_departamento = Counter(), Counter(), Counter()
+    mas_antiguo = None
+    for estado, prioridad, departamento_id, fecha in filas:
+        por_estado[estado] += 1
+        por_prioridad[prioridad] += 1
+        por_departamento[departamento_id] += 1
+        if mas_antiguo is None or fecha < mas_antiguo:
+            mas_antiguo = fecha
+    return {
+        'total': sum(por_estado.values()),
+        'por_estado': dict(por_estado),
+        'por_prioridad': dict(por_prioridad),
+        'por_departamento': dict(por_departamento),
+        'mas_antiguo': mas_antiguo.isoformat() if mas_antiguo else None,
+    }
+
+
+modelo = ModeloLectura()
@@ -0,0 +1,189 @@
+"""Data layer for the PDF reports.
+
+Every function here returns plain Python structures (dicts, lists and
+tuples) so the aggregates can be tested and benchmarked without ReportLab.
+Each report is fetched in a fixed number of queries; translations are
+resolved from the rows already returned instead of looking objects up one
+by one.
+"""
+from datetime import timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Ticket
+
+
+PRIORIDAD_NOMBRES = {
+    'es': {'baja': 'Baja', 'media': 'Media', 'alta': 'Alta', 'urgente': 'Urgente'},
+    'en': {'baja': 'Low', 'media': 'Medium', 'alta': 'High', 'urgente': 'Urgent'},
+}
+
+SIN_DEPARTAMENTO = {'es': 'Sin dept.', 'en': 'No dept.'}
+
+
+def nombre_motivo(nombre, nombre_en, lang):
+    """Same rule as ``Motivo.get_nombre_por_idioma`` but on raw values."""
+    if lang.startswith('en') and nombre_en:
+        return nombre_en
+    return nombre
+
+
+def nombre_departamento(nombre, nombre_en, lang):
+    """Return the department name for ``lang``; Spanish when ``nombre_en`` is empty."""
+    return nombre_motivo(nombre, nombre_en, lang)
+
+
+def nombre_usuario(username, first_name, last_name, max_length=None):
+    nombre = f"{first_name} {last_name}".strip() or username
+    if max_length and len(nombre) > max_length:
+        nombre = nombre[:max_length - 3] + '...'
+    return nombre
+
+
+def obtener_datos_estadisticas(lang='es', dias=7, top=5, now=None):
+    """Collect every aggregate used by the weekly statistics PDF.
+
+    Runs exactly four queries (departments, users, motivos, priorities)
+    regardless of the number of tickets or motivos.
+    """
+    now = now or timezone.now()
+    tickets = Ticket.objects.all()
+
+    dept_stats = tickets.values('usuario__departamento__nombre', 'usuario__departamento__nombre_en').annotate(
+        total=Count('id')
+    ).order_by('-total')[:top]
+
+    user_stats = tickets.values('usuario__username', 'usuario__first_name', 'usuario__last_name').annotate(
+        total=Count('id')
+    ).order_by('-total')[:top]
+
+    # fetch both names in the aggregate so no per-slice lookup is needed
+    motivo_stats = tickets.filter(motivo__isnull=False).values(
+        'motivo__id', 'motivo__nombre', 'motivo__nombre_en'
+    ).annotate(total=Count('id')).order_by('-total')
+
+    prioridad_stats = tickets.values('prioridad').annotate(total=Count('id')).order_by('-total')
+
+    sin_departamento = SIN_DEPARTAMENTO.get(lang, SIN_DEPARTAMENTO['es'])
+    prioridad_nombres = PRIORIDAD_NOMBRES.get(lang, PRIORIDAD_NOMBRES['es'])
+
+    return {
+        'lang': lang,
+        'fecha_inicio': now - timedelta(days=dias),
+        'fecha_fin': now,
+        'departamentos': [
+            (
+                nombre_departamento(stat['usuario__departamento__nombre'],
+                                    stat['usuario__departamento__nombre_en'], lang)
+                if stat['usuario__departamento__nombre'] else sin_departamento,
+                stat['total'],
+            )
+            for stat in dept_stats
+        ],
+        'usuarios': [
+            (
+                nombre_usuario(stat['usuario__username'], stat['usuario__first_name'],
+                               stat['usuario__last_name'], max_length=15),
+                stat['total'],
+            )
+            for stat in user_stats
+        ],
+        'motivos': [
+            (nombre_motivo(stat['motivo__nombre'], stat['motivo__nombre_en'], lang), stat['total'])
+            for stat in motivo_stats
+        ],
+        'prioridades': [
+            (stat['prioridad'], prioridad_nombres.get(stat['prioridad'], stat['prioridad']), stat['total'])
+            for stat in prioridad_stats
+        ],
+    }
+
+
+def obtener_datos_ticket(ticket, lang='es', now=None):
+    """Flatten one ticket into the values printed on its PDF.
+
+    ``ticket`` should come with ``usuario__departamento`` and ``motivo``
+    selected so this does not issue further queries.
+    """
+    now = now or timezone.now()
+    usuario = ticket.usuario
+
+    return {
+        'lang': lang,
+        'id': ticket.id,
+        'asunto': ticket.asunto,
+        'estado': ticket.estado,
+        'estado_display': ticket.get_estado_display(),
+        'prioridad': ticket.prioridad,
+        'prioridad_display': ticket.get_prioridad_display(),
+        'creado_por': f"{usuario.first_name} {usuario.last_name}" if usuario.first_name else usuario.username,
+        'departamento': (nombre_departamento(usuario.departamento.nombre, usuario.departamento.nombre_en, lang)
+                         if usuario.departamento else 'N/A'),
+        'motivo': nombre_motivo(ticket.motivo.nombre, ticket.motivo.nombre_en, lang) if ticket.motivo else 'N/A',
+        'fecha_creacion': timezone.localtime(ticket.fecha_creacion),
+        'fecha_cierre': timezone.localtime(ticket.fecha_cierre) if ticket.fecha_cierre else None,
+        'tiempo_resolucion': ticket.duracion_resolucion if ticket.estado == 'resuelto' else None,
+        'contenido': ticket.contenido,
+        'generado': timezone.localtime(now),
+    }
+
+
+ESTADO_NOMBRES = {
+    'es': {'abierto': 'Abierto', 'en_proceso': 'En Proceso', 'resuelto': 'Resuelto'},
+    'en': {'abierto': 'Open', 'en_proceso': 'In Progress', 'resuelto': 'Resolved'},
+}
+
+CAMPOS_LIBRO = (
+    'id', 'fecha_creacion', 'fecha_cierre', 'asunto', 'prioridad', 'estado',
+    'departamento__nombre', 'departamento__nombre_en', 'usuario__username', 'usuario__first_name', 'usuario__last_name',
+    'motivo__nombre', 'motivo__nombre_en',
+)
+
+
+def obtener_encabezado_libro(desde, hasta, lang='es'):
+    """Period and ticket count for the ledger; ``desde``/``hasta`` are dates."""
+    return {
+        'lang': lang,
+        'fecha_inicio': desde,
+        'fecha_fin': hasta,
+        'total': _tickets_periodo(desde, hasta).count(),
+    }
+
+
+def _tickets_periodo(desde, hasta):
+    return Ticket.objects.filter(fecha_creacion__date__gte=desde, fecha_creacion__date__lte=hasta)
+
+
+def iter_filas_libro(desde, hasta, lang='es', chunk_size=2000):
+    """Yield one tuple of printable strings per ticket created in the period.
+
+    Tickets are read in ``id`` order with keyset pagination (``id > last``),
+    one query per ``chunk_size`` rows, so only a single chunk of rows is
+    ever held in memory. ``QuerySet.iterator()`` is not enough on its own:
+    mysqlclient buffers the whole result set on the client.
+    """
+    prioridad_nombres = PRIORIDAD_NOMBRES.get(lang, PRIORIDAD_NOMBRES['es'])
+    estado_nombres = ESTADO_NOMBRES.get(lang, ESTADO_NOMBRES['es'])
+    formato_fecha = '%m/%d/%Y %H:%M' if lang == 'en' else '%d/%m/%Y %H:%M'
+    tickets = _tickets_periodo(desde, hasta).order_by('id')
+
+    ultimo_id = 0
+    while True:
+        filas = list(tickets.filter(id__gt=ultimo_id).values_list(*CAMPOS_LIBRO)[:chunk_size])
+        for (ticket_id, creado, cerrado, asunto, prioridad, estado, departamento, departamento_en,
+             username, first_name, last_name, motivo, motivo_en) in filas:
+            yield (
+                str(ticket_id),
+                timezone.localtime(creado).strftime(formato_fecha),
+                asunto,
+                nombre_departamento(departamento, departamento_en, lang),
+                nombre_usuario(username, first_name, last_name),
+                nombre_motivo(motivo, motivo_en, lang) if motivo else '-',
+                prioridad_nombres.get(prioridad, prioridad),
+                estado_nombres.get(estado, estado),
+                timezone.localtime(cerrado).strftime(formato_fecha) if cerrado else '-',
+            )
+        if len(filas) < chunk_size:
+            return
+        ultimo_id = filas[-1][0]
@@ -0,0 +1,158 @@
+"""Background rendering of PDF reports.
+
+Views gather the report data (a handful of queries, see ``report_data``)
+and hand it to a bounded process pool, because ReportLab is CPU-bound and
+would otherwise hold the GIL of the web worker for seconds. Job state is
+kept in ``TrabajoReporte`` so any web worker can answer status polls.
+
+``REPORT_JOB_WORKERS = 0`` renders inline, which is what the tests use.
+ReportLab is only imported when the first job is queued, so web workers
+that never render a report do not pay for it at startup.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from . import report_store
+from .models import TrabajoReporte
+
+
+_executor = None
+_executor_lock = threading.Lock()
+# futures submitted by this process, so the queue view can tell queued
+# jobs from the ones a worker is rendering right now
+_en_vuelo = {}
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn instead of fork: the children must not inherit the
+            # parent's database sockets or request threads
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.REPORT_JOB_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _executor
+
+
+def _desde_epoch(valor):
+    return datetime.fromtimestamp(valor, tz=dt_timezone.utc)
+
+
+def _completar(trabajo_id, contenido, inicio, fin):
+    pdf_path = report_store.guardar(contenido, 'trabajos')
+
+    TrabajoReporte.objects.filter(pk=trabajo_id).update(
+        estado='completado',
+        archivo=str(pdf_path),
+        fecha_inicio=_desde_epoch(inicio),
+        fecha_fin=_desde_epoch(fin),
+    )
+
+
+def _fallar(trabajo_id, exc):
+    TrabajoReporte.objects.filter(pk=trabajo_id).update(
+        estado='error',
+        error=str(exc) or exc.__class__.__name__,
+        fecha_fin=timezone.now(),
+    )
+
+
+def _al_terminar(trabajo_id, future):
+    # done callbacks run in the executor's management thread, which keeps
+    # its own database connection between jobs
+    close_old_connections()
+    _en_vuelo.pop(trabajo_id, None)
+    exc = future.exception()
+    if exc is not None:
+        _fallar(trabajo_id, exc)
+    else:
+        _completar(trabajo_id, *future.result())
+
+
+def _marcar_vencidos():
+    """Fail jobs whose worker process went away (restart, crash)."""
+    limite = timezone.now() - timedelta(seconds=settings.REPORT_JOB_TIMEOUT)
+    TrabajoReporte.objects.filter(estado='pendiente', fecha_creacion__lt=limite).update(
+        estado='error',
+        error='Tiempo de espera agotado',
+        fecha_fin=timezone.now(),
+    )
+
+
+def cola_llena():
+    _marcar_vencidos()
+    pendientes = TrabajoReporte.objects.filter(estado='pendiente').count()
+    return pendientes >= settings.REPORT_JOB_MAX_PENDING
+
+
+def encolar(tipo, datos, usuario, nombre_descarga, parametros=None):
+    """Create the job row and submit the render; returns immediately."""
+    from .pdf_reports import render_report_medido
+
+    trabajo = TrabajoReporte.objects.create(
+        tipo=tipo,
+        parametros=parametros or {},
+        usuario=usuario,
+        nombre_descarga=nombre_descarga,
+    )
+
+    if settings.REPORT_JOB_WORKERS <= 0:
+        try:
+            resultado = render_report_medido(tipo, datos)
+        except Exception as e:
+            _fallar(trabajo.pk, e)
+        else:
+            _completar(trabajo.pk, *resultado)
+        trabajo.refresh_from_db()
+        return trabajo
+
+    future = get_executor().submit(render_report_medido, tipo, datos)
+    _en_vuelo[trabajo.pk] = future
+    future.add_done_callback(partial(_al_terminar, trabajo.pk))
+    return trabajo
+
+
+def esta_en_ejecucion(trabajo_id):
+    future = _en_vuelo.get(trabajo_id)
+    return bool(future and future.running())
+
+
+def estado_cola(ventana=timedelta(hours=1)):
+    """Queue depth and render times, for the operators' view."""
+    _marcar_vencidos()
+    desde = timezone.now() - ventana
+    terminados = list(
+        TrabajoReporte.objects.filter(fecha_fin__gte=desde)
+        .values_list('estado', 'fecha_creacion', 'fecha_inicio', 'fecha_fin')
+    )
+    renders = [
+        (fin - inicio).total_seconds()
+        for estado, creado, inicio, fin in terminados
+        if estado == 'completado' and inicio
+    ]
+    esperas = [
+        (inicio - creado).total_seconds()
+        for estado, creado, inicio, fin in terminados
+        if estado == 'completado' and inicio
+    ]
+
+    return {
+        'pendientes': TrabajoReporte.objects.filter(estado='pendiente').count(),
+        'en_ejecucion_local': sum(1 for f in list(_en_vuelo.values()) if f.running()),
+        'trabajadores': settings.REPORT_JOB_WORKERS,
+        'max_pendientes': settings.REPORT_JOB_MAX_PENDING,
+        'completados': len(renders),
+        'errores': sum(1 for estado, *_ in terminados if estado == 'error'),
+        'render_promedio_segundos': round(sum(renders) / len(renders), 3) if renders else None,
+        'render_max_segundos': round(max(renders), 3) if renders else None,
+        'espera_promedio_segundos': round(sum(esperas) / len(esperas), 3) if esperas else None,
+    }
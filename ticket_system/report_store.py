@@ -0,0 +1,107 @@
+"""Content-addressed archive for generated PDF reports.
+
+Reports are stored as ``REPORTS_ROOT/<categoria>/<sha256[:2]>/<sha256>.pdf``
+so identical documents are written once; storing an existing report only
+refreshes its modification time, which is what retention looks at.
+``podar`` enforces ``REPORT_RETENTION_DAYS`` and ``REPORT_RETENTION_MAX_BYTES``
+and is run periodically through ``manage.py podar_reportes``; completed
+report jobs whose file it deletes are marked ``expirado``.
+"""
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+from .sendfile import sendfile_response
+
+
+def _root():
+    return Path(settings.REPORTS_ROOT)
+
+
+def guardar(contenido, categoria):
+    """Store ``contenido`` and return its absolute path."""
+    digest = hashlib.sha256(contenido).hexdigest()
+    directorio = _root() / categoria / digest[:2]
+    path = directorio / f"{digest}.pdf"
+
+    try:
+        os.utime(path)
+        return path
+    except FileNotFoundError:
+        # not stored yet, or podar() deleted it just now
+        pass
+
+    directorio.mkdir(parents=True, exist_ok=True)
+    # write next to the target and rename, so readers never see half a file
+    fd, tmp = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(contenido)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return path
+
+
+def respuesta(path, filename):
+    """Download response for a stored report, delegated to the proxy if possible."""
+    relativo = Path(path).relative_to(_root()).as_posix()
+    return sendfile_response(
+        path,
+        settings.REPORTS_ACCEL_PREFIX + relativo,
+        filename=filename,
+        as_attachment=True,
+        content_type='application/pdf',
+    )
+
+
+def podar(max_dias=None, max_bytes=None, dry_run=False):
+    """Delete reports older than ``max_dias``, then the oldest ones until the
+    archive fits in ``max_bytes``. Returns ``(borrados, bytes_liberados)``.
+    """
+    max_dias = settings.REPORT_RETENTION_DAYS if max_dias is None else max_dias
+    max_bytes = settings.REPORT_RETENTION_MAX_BYTES if max_bytes is None else max_bytes
+    limite = time.time() - max_dias * 86400
+
+    archivos = []
+    for path in _root().rglob('*.pdf'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        archivos.append((stat.st_mtime, stat.st_size, path))
+    archivos.sort()
+
+    total = sum(size for mtime, size, path in archivos)
+    borrados = 0
+    liberados = 0
+    eliminados = []
+    for mtime, size, path in archivos:
+        if mtime >= limite and (not max_bytes or total <= max_bytes):
+            break
+        if not dry_run:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            eliminados.append(str(path))
+        total -= size
+        borrados += 1
+        liberados += size
+    expirar_trabajos(eliminados)
+    return borrados, liberados
+
+
+def expirar_trabajos(archivos, lote=500):
+    """Mark the completed jobs that pointed at deleted ``archivos`` as expired."""
+    from .models import TrabajoReporte
+
+    for inicio in range(0, len(archivos), lote):
+        TrabajoReporte.objects.filter(estado='completado', archivo__in=archivos[inicio:inicio + lote]).update(
+            estado='expirado', archivo=''
+        )
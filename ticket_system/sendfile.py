@@ -0,0 +1,115 @@
+"""Hand file transfers to the front proxy instead of a Python worker.
+
+``SENDFILE_BACKEND`` selects how:
+
+* ``'nginx'``: empty response with ``X-Accel-Redirect`` pointing at an
+  ``internal`` location that maps onto the same directory.
+* ``'apache'``: empty response with ``X-Sendfile`` (mod_xsendfile).
+* anything else: ``FileResponse``, which streams the file in blocks and
+  uses the server's ``wsgi.file_wrapper`` when there is one. Single
+  ``Range`` requests are answered with a ``206`` streamed from the
+  requested offset; the proxies handle ranges themselves.
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+
+BLOQUE = 64 * 1024
+
+_RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangoNoSatisfacible(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """``(start, end)`` (inclusive) for a single byte range, or ``None``.
+
+    Multiple ranges and malformed headers return ``None`` so the whole file
+    is sent, which RFC 9110 allows; ranges starting past the end raise
+    ``RangoNoSatisfacible``.
+    """
+    coincidencia = _RANGO.match((header or '').strip())
+    if not coincidencia or coincidencia.group(1) == coincidencia.group(2) == '':
+        return None
+    inicio, fin = coincidencia.groups()
+    if inicio == '':
+        # suffix range: the last N bytes
+        longitud = int(fin)
+        if longitud == 0:
+            raise RangoNoSatisfacible()
+        return max(size - longitud, 0), size - 1
+    inicio = int(inicio)
+    fin = min(int(fin), size - 1) if fin else size - 1
+    if inicio >= size or fin < inicio:
+        raise RangoNoSatisfacible()
+    return inicio, fin
+
+
+def _leer(path, inicio, longitud):
+    with open(path, 'rb') as f:
+        f.seek(inicio)
+        while longitud > 0:
+            bloque = f.read(min(BLOQUE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+
+
+def _respuesta_parcial(path, range_header, content_type):
+    size = os.path.getsize(path)
+    try:
+        rango = parse_range(range_header, size)
+    except RangoNoSatisfacible:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if rango is None:
+        return None
+    inicio, fin = rango
+    response = StreamingHttpResponse(_leer(path, inicio, fin - inicio + 1), status=206, content_type=content_type)
+    response['Content-Length'] = str(fin - inicio + 1)
+    response['Content-Range'] = f'bytes {inicio}-{fin}/{size}'
+    return response
+
+
+def sendfile_response(path, internal_url, filename=None, as_attachment=False, content_type=None,
+                      range_header=None):
+    """Response that delivers ``path``; ``internal_url`` is the proxy location.
+
+    ``range_header`` is the request's ``Range`` value, when the caller has
+    decided it applies (``If-Range`` is the caller's business). The caller
+    must have checked that ``path`` exists and is allowed.
+    """
+    content_type = content_type or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    backend = getattr(settings, 'SENDFILE_BACKEND', '')
+
+    if backend == 'nginx':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(internal_url)
+    elif backend == 'apache':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = os.fspath(path)
+    else:
+        response = _respuesta_parcial(path, range_header, content_type) if range_header else None
+        if response is None:
+            response = FileResponse(open(path, 'rb'), as_attachment=as_attachment,
+                                    filename=filename or '', content_type=content_type)
+        elif filename and response.status_code == 206:
+            disposition = 'attachment' if as_attachment else 'inline'
+            response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    # FileResponse sets this itself; the proxy passes our header through
+    if filename:
+        disposition = 'attachment' if as_attachment else 'inline'
+        response['Content-Disposition'] = f'{disposition}; filename="{filename}"'
+    return response
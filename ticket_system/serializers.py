@@ -1,14 +1,40 @@
 from rest_framework import serializers
-from .models import Usuario, Departamento, Motivo, Ticket, Cerrador
+from .models import Usuario, Departamento, Motivo, Ticket, Cerrador, TrabajoReporte
+from .image_pipeline import variantes
+from . import tracing
 
 
-class DepartamentoSerializer(serializers.ModelSerializer):
+class ListaTrazada(serializers.ListSerializer):
+    @property
+    def data(self):
+        with tracing.span('serializar', serializer=f'{type(self.child).__name__}[]'):
+            return super().data
+
+
+class TrazadoModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer whose ``.data`` shows up as a span in traces."""
+
+    @property
+    def data(self):
+        with tracing.span('serializar', serializer=type(self).__name__):
+            return super().data
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        lista = super().many_init(*args, **kwargs)
+        # same as Meta.list_serializer_class, without repeating it in every Meta
+        if type(lista) is serializers.ListSerializer:
+            lista.__class__ = ListaTrazada
+        return lista
+
+
+class DepartamentoSerializer(TrazadoModelSerializer):
     class Meta:
         model = Departamento
         fields = ['id', 'nombre', 'gerente', 'email', 'descripcion', 'activo']
 
 
-class UsuarioSerializer(serializers.ModelSerializer):
+class UsuarioSerializer(TrazadoModelSerializer):
     departamento_nombre = serializers.CharField(source='departamento.nombre', read_only=True)
 
     class Meta:
@@ -18,7 +44,7 @@ class UsuarioSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
-class UsuarioRegistroSerializer(serializers.ModelSerializer):
+class UsuarioRegistroSerializer(TrazadoModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
 
@@ -47,7 +73,7 @@ class UsuarioRegistroSerializer(serializers.ModelSerializer):
         return usuario
 
 
-class MotivoSerializer(serializers.ModelSerializer):
+class MotivoSerializer(TrazadoModelSerializer):
     departamento_nombre = serializers.CharField(source='departamento.nombre', read_only=True)
     # override field so that the name is translated based on the active
     # language.  we return exactly the value that ``Motivo.get_nombre_por_idioma``
@@ -63,13 +89,13 @@ class MotivoSerializer(serializers.ModelSerializer):
         fields = ['id', 'nombre', 'descripcion', 'departamento', 'departamento_nombre']
 
 
-class CerradorSerializer(serializers.ModelSerializer):
+class CerradorSerializer(TrazadoModelSerializer):
     class Meta:
         model = Cerrador
         fields = ['id', 'nombre', 'activo']
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(TrazadoModelSerializer):
     usuario_nombre = serializers.SerializerMethodField()
     usuario_departamento_nombre = serializers.SerializerMethodField()
     departamento_nombre = serializers.CharField(source='departamento.nombre', read_only=True)
@@ -87,6 +113,12 @@ class TicketSerializer(serializers.ModelSerializer):
 
     estado_display = serializers.CharField(source='get_estado_display', read_only=True)
     prioridad_display = serializers.CharField(source='get_prioridad_display', read_only=True)
+    # original, thumbnail and WebP URL of each solution image, so clients
+    # can pick the smallest one that fits
+    solucion_imagenes_variantes = serializers.SerializerMethodField()
+
+    def get_solucion_imagenes_variantes(self, obj):
+        return [variantes(url) for url in obj.solucion_imagenes or []]
 
     class Meta:
         model = Ticket
@@ -94,7 +126,7 @@ class TicketSerializer(serializers.ModelSerializer):
                   'departamento', 'departamento_nombre', 'motivo', 'motivo_nombre',
                   'asunto', 'contenido', 'prioridad', 'prioridad_display', 'estado',
                   'estado_display', 'fecha_creacion', 'fecha_cierre', 'cerrado_por', 'cerrado_por_nombre',
-                  'solucion_texto', 'solucion_imagenes']
+                  'solucion_texto', 'solucion_imagenes', 'solucion_imagenes_variantes']
         read_only_fields = ['id', 'fecha_creacion', 'usuario']
 
     def get_usuario_nombre(self, obj):
@@ -103,7 +135,19 @@ class TicketSerializer(serializers.ModelSerializer):
     def get_usuario_departamento_nombre(self, obj):
         return obj.usuario.departamento.nombre if obj.usuario.departamento else 'Sin departamento'
 
-class TicketCreateSerializer(serializers.ModelSerializer):
+class TicketCreateSerializer(TrazadoModelSerializer):
     class Meta:
         model = Ticket
-        fields = ['departamento', 'motivo', 'asunto', 'contenido']
\ No newline at end of file
+        fields = ['departamento', 'motivo', 'asunto', 'contenido']
+
+class TrabajoReporteSerializer(TrazadoModelSerializer):
+    usuario_nombre = serializers.CharField(source='usuario.username', read_only=True)
+    duracion_render = serializers.FloatField(read_only=True)
+    tiempo_en_cola = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = TrabajoReporte
+        fields = ['id', 'tipo', 'parametros', 'estado', 'usuario', 'usuario_nombre',
+                  'nombre_descarga', 'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin',
+                  'duracion_render', 'tiempo_en_cola']
+        read_only_fields = fields
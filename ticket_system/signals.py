@@ -0,0 +1,98 @@
+"""Model signal handlers, connected from ``TicketSystemConfig.ready``."""
+from collections import Counter
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import read_model
+from .authentication import invalidar_token, invalidar_usuario
+from .cache_utils import bump_version
+from .image_pipeline import hash_de_url
+from .models import Cerrador, Departamento, ImagenSolucion, Motivo, Ticket, Usuario
+
+
+def _hashes(urls):
+    return Counter(h for h in map(hash_de_url, urls or []) if h)
+
+
+def _ajustar_referencias(delta):
+    # one UPDATE per distinct count; in practice that is one or two queries
+    por_cantidad = {}
+    for digest, cantidad in delta.items():
+        if cantidad:
+            por_cantidad.setdefault(cantidad, []).append(digest)
+    for cantidad, hashes in por_cantidad.items():
+        ImagenSolucion.objects.filter(hash__in=hashes).update(referencias=F('referencias') + cantidad)
+
+
+def recordar_imagenes_cargadas(instance):
+    """Remember ``solucion_imagenes`` as loaded, to diff against on save."""
+    if 'solucion_imagenes' in instance.__dict__:
+        # a copy: the list may be edited in place before saving
+        instance._imagenes_cargadas = tuple(instance.solucion_imagenes or ())
+
+
+@receiver(post_init, sender=Ticket)
+def recordar_imagenes_al_cargar(sender, instance, **kwargs):
+    recordar_imagenes_cargadas(instance)
+
+
+@receiver(pre_save, sender=Ticket)
+def recordar_imagenes_previas(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None:
+        instance._imagenes_previas = Counter()
+        return
+    if update_fields is not None and 'solucion_imagenes' not in update_fields:
+        instance._imagenes_previas = None
+        return
+    cargadas = getattr(instance, '_imagenes_cargadas', None)
+    if cargadas is None or instance._state.adding:
+        # deferred field, or an instance built by hand for an existing pk
+        cargadas = Ticket.objects.filter(pk=instance.pk).values_list('solucion_imagenes', flat=True).first()
+    instance._imagenes_previas = _hashes(cargadas)
+
+
+@receiver(post_save, sender=Ticket)
+def actualizar_referencias_imagenes(sender, instance, raw=False, **kwargs):
+    previas = getattr(instance, '_imagenes_previas', Counter())
+    if raw or previas is None:
+        return
+    delta = _hashes(instance.solucion_imagenes)
+    delta.subtract(previas)
+    _ajustar_referencias(delta)
+    recordar_imagenes_cargadas(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def liberar_imagenes(sender, instance, **kwargs):
+    _ajustar_referencias({digest: -cantidad for digest, cantidad in _hashes(instance.solucion_imagenes).items()})
+
+
+@receiver([post_save, post_delete], sender=Ticket)
+def invalidar_listas_tickets(sender, instance, raw=False, **kwargs):
+    if not raw:
+        read_model.modelo.cambio_local(instance.pk, bump_version('tickets'))
+
+
+@receiver(post_delete, sender=Token)
+def olvidar_token(sender, instance, **kwargs):
+    # logout deletes the token
+    invalidar_token(instance.key)
+
+
+@receiver(post_save, sender=Usuario)
+def olvidar_tokens_usuario(sender, instance, raw=False, **kwargs):
+    # password, is_active and rol all change through save(); any save
+    # refreshes the cached copy of the user
+    if not raw:
+        invalidar_usuario(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Departamento)
+@receiver([post_save, post_delete], sender=Motivo)
+@receiver([post_save, post_delete], sender=Cerrador)
+def invalidar_referencias(sender, **kwargs):
+    # one version for the three: motivos embed the department name
+    bump_version('referencia')
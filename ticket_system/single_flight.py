@@ -0,0 +1,79 @@
+"""Per-process request coalescing ("single flight").
+
+Every superuser polls the same full ticket list every 2 seconds, so a
+worker often receives several identical requests at once and would run
+the query and the serializer for each of them. ``Coalescedor.hacer``
+runs the computation for the first caller of a key while the others
+wait for it and then share its result. The result stays available for
+``ttl`` seconds to requests that arrive right after it.
+
+Keys must contain a data-version marker (see ``cache_utils``) so a write
+never waits out the TTL in the worker that made it. The result lives
+only in this process's memory; with a TTL of about a second, staleness
+across workers stays below the polling interval.
+"""
+import threading
+import time
+
+
+class _Vuelo:
+    __slots__ = ('evento', 'resultado', 'error', 'expira')
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+        self.expira = None
+
+
+class Coalescedor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._vuelos = {}
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    def hacer(self, clave, funcion, ttl):
+        ahora = time.monotonic()
+        with self._lock:
+            vuelo = self._vuelos.get(clave)
+            if vuelo is not None and vuelo.expira is not None and vuelo.expira <= ahora:
+                vuelo = None
+            lider = vuelo is None
+            if lider:
+                self._barrer(ahora)
+                vuelo = self._vuelos[clave] = _Vuelo()
+                self.ejecutadas += 1
+            else:
+                self.compartidas += 1
+
+        if not lider:
+            vuelo.evento.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = funcion()
+        except BaseException as exc:
+            vuelo.error = exc
+            with self._lock:
+                # failures are not shared with later requests
+                if self._vuelos.get(clave) is vuelo:
+                    del self._vuelos[clave]
+            raise
+        finally:
+            vuelo.expira = time.monotonic() + ttl
+            vuelo.evento.set()
+        return vuelo.resultado
+
+    def _barrer(self, ahora):
+        # called with the lock held; drops finished results past their TTL
+        vencidas = [clave for clave, vuelo in self._vuelos.items() if vuelo.expira is not None and vuelo.expira <= ahora]
+        for clave in vencidas:
+            del self._vuelos[clave]
+
+    def limpiar(self):
+        with self._lock:
+            self._vuelos.clear()
+            self.ejecutadas = self.compartidas = 0
@@ -0,0 +1,102 @@
+"""Resolution-time percentiles (SLA) computed by the database.
+
+For each group (department, motivo or priority) the p50/p90/p99 of
+``Ticket.duracion_resolucion`` are the nearest-rank percentiles: the
+smallest duration whose ``CUME_DIST()`` within the group reaches the
+percentile. The ORM builds the inner query (filters, the window
+function); the outer ``GROUP BY`` that picks the percentiles is plain SQL
+because Django cannot aggregate over a window in the same query. One
+statement per dimension, whatever the number of tickets, and only one
+row per group comes back to Python.
+
+Window functions need MySQL 8, MariaDB 10.2 or SQLite 3.25.
+"""
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F, Window
+from django.db.models.functions import CumeDist
+
+from .models import Departamento, Motivo, Ticket
+from .report_data import PRIORIDAD_NOMBRES, nombre_departamento, nombre_motivo
+
+
+PERCENTILES = (50, 90, 99)
+
+# dimension -> Ticket column it groups by
+DIMENSIONES = {
+    'departamento': 'departamento_id',
+    'motivo': 'motivo_id',
+    'prioridad': 'prioridad',
+}
+
+
+def _segundos(valor):
+    if valor is None:
+        return None
+    if isinstance(valor, timedelta):
+        return valor.total_seconds()
+    # MySQL and SQLite store durations as microseconds
+    return valor / 1_000_000
+
+
+def percentiles_por(dimension, desde=None, hasta=None):
+    """``{grupo: {'total', 'p50', 'p90', 'p99'}}`` in seconds, for resolved tickets.
+
+    ``desde``/``hasta`` are dates and filter on the closing date.
+    """
+    columna = DIMENSIONES[dimension]
+    tickets = Ticket.objects.filter(duracion_resolucion__isnull=False)
+    if desde:
+        tickets = tickets.filter(fecha_cierre__date__gte=desde)
+    if hasta:
+        tickets = tickets.filter(fecha_cierre__date__lte=hasta)
+    filas = tickets.order_by().annotate(
+        grupo=F(columna),
+        duracion=F('duracion_resolucion'),
+        rango=Window(CumeDist(), partition_by=F(columna), order_by=F('duracion_resolucion').asc()),
+    ).values('grupo', 'duracion', 'rango')
+    interna, params = filas.query.sql_with_params()
+
+    qn = connection.ops.quote_name
+    columnas = ', '.join(
+        f"MIN(CASE WHEN {qn('rango')} >= %s THEN {qn('duracion')} END)" for _ in PERCENTILES
+    )
+    sql = (
+        f"SELECT {qn('grupo')}, COUNT(*), {columnas} "
+        f"FROM ({interna}) {qn('percentiles')} GROUP BY {qn('grupo')}"
+    )
+    # CUME_DIST is a float; a small margin keeps e.g. 9/10 from missing 0.9
+    umbrales = [p / 100 - 1e-9 for p in PERCENTILES]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, umbrales + list(params))
+        resultado = {}
+        for grupo, total, *valores in cursor.fetchall():
+            resultado[grupo] = {'total': total}
+            for percentil, valor in zip(PERCENTILES, valores):
+                resultado[grupo][f'p{percentil}'] = _segundos(valor)
+    return resultado
+
+
+def _nombres(dimension, ids, lang):
+    if dimension == 'departamento':
+        return {d.id: nombre_departamento(d.nombre, d.nombre_en, lang) for d in Departamento.objects.filter(id__in=ids)}
+    if dimension == 'motivo':
+        return {m.id: nombre_motivo(m.nombre, m.nombre_en, lang) for m in Motivo.objects.filter(id__in=ids)}
+    return PRIORIDAD_NOMBRES.get(lang, PRIORIDAD_NOMBRES['es'])
+
+
+def obtener_sla(lang='es', desde=None, hasta=None, dimensiones=DIMENSIONES):
+    """Percentiles for each dimension, named and sorted by volume."""
+    datos = {}
+    for dimension in dimensiones:
+        grupos = percentiles_por(dimension, desde, hasta)
+        nombres = _nombres(dimension, [g for g in grupos if g is not None], lang)
+        datos[dimension] = sorted(
+            (
+                {'id': grupo, 'nombre': nombres.get(grupo, grupo) if grupo is not None else None, **valores}
+                for grupo, valores in grupos.items()
+            ),
+            key=lambda fila: -fila['total'],
+        )
+    return datos
@@ -0,0 +1,306 @@
+"""Synthetic data at production scale, for benchmarks and query plans.
+
+``generar`` adds departamentos, usuarios, motivos, cerradores and tickets
+with the skew a real help desk shows, so indexes and reports are measured
+against realistic distributions rather than uniform noise:
+
+* departments (in ``id`` order) and, within them, motivos follow a
+  Zipf-like popularity: the first few get most tickets, the tail a handful;
+* a few users open most tickets (Pareto weights);
+* priorities lean towards ``media``, with few ``urgente``;
+* resolution times are log-normal with a median that depends on the
+  priority, so most tickets close in hours and a long tail takes weeks;
+  a ticket whose closing time is still in the future stays open;
+* creation dates fall on local working hours (``TIME_ZONE``), mostly on
+  weekdays, growing over the period that ends at ``ahora``;
+* descriptions are mostly a few sentences with a long tail of long ones.
+
+Everything comes from one ``random.Random(semilla)`` and ``ahora``
+defaults to the fixed ``AHORA`` rather than the current time, so the same
+seed on the same starting database yields the same rows. Rows are written with
+``bulk_create`` in batches of ``lote`` inside one transaction per batch,
+and tickets are generated batch by batch, so memory stays flat up to
+millions of rows. ``auto_now_add`` overrides ``fecha_creacion`` on insert,
+so each ticket batch is followed by a ``bulk_update`` of that column. ``bulk_create`` sends no signals: the cache versions
+are bumped once at the end instead.
+"""
+import math
+import random
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .cache_utils import bump_version
+from .models import Cerrador, Departamento, Motivo, Ticket, Usuario
+
+
+PREFIJO_USUARIO = 'sint'
+# local midnight the generated history ends at, unless ``ahora`` is given
+AHORA = date(2026, 1, 1)
+
+# share of tickets per priority
+PESOS_PRIORIDAD = {'baja': 30, 'media': 45, 'alta': 18, 'urgente': 7}
+# median hours to resolve per priority; log-normal around it
+HORAS_RESOLUCION = {'urgente': 3, 'alta': 10, 'media': 30, 'baja': 72}
+SIGMA_RESOLUCION = 1.1
+
+DEPARTAMENTOS = [
+    ('Tecnologias de la Informacion', 'Information Technology'),
+    ('Mantenimiento', 'Maintenance'),
+    ('Produccion', 'Production'),
+    ('Logistica', 'Logistics'),
+    ('Calidad', 'Quality'),
+    ('Ingenieria', 'Engineering'),
+    ('Compras', 'Purchasing'),
+    ('Ventas', 'Sales'),
+    ('Finanzas', 'Finance'),
+    ('Recursos Humanos', 'Human Resources'),
+]
+MOTIVOS = [
+    ('Equipo no enciende', 'Computer does not start'),
+    ('Problema de red', 'Network problem'),
+    ('Impresora', 'Printer'),
+    ('Acceso a sistema', 'System access'),
+    ('Correo electrónico', 'Email'),
+    ('Instalación de software', 'Software installation'),
+    ('Falla eléctrica', 'Power failure'),
+    ('Herramienta dañada', 'Damaged tool'),
+    ('Solicitud de material', 'Material request'),
+    ('Reporte de calidad', 'Quality report'),
+    ('Nómina', 'Payroll'),
+    ('Otro', 'Other'),
+]
+NOMBRES = ['Ana', 'Luis', 'María', 'Carlos', 'Sofía', 'Jorge', 'Lucía', 'Pedro', 'Elena', 'Miguel', 'Laura', 'Andrés']
+APELLIDOS = ['García', 'Martínez', 'López', 'Hernández', 'González', 'Pérez', 'Rodríguez', 'Sánchez', 'Ramírez', 'Torres']
+ASUNTOS = [
+    'No funciona {objeto}', 'Falla en {objeto}', 'Solicitud de {objeto}', 'Revisión de {objeto}',
+    'Error al usar {objeto}', '{objeto} muy lento', 'Cambio de {objeto}',
+]
+OBJETOS = [
+    'la impresora', 'el equipo', 'la red', 'el correo', 'el ERP', 'la línea 3', 'el montacargas',
+    'el aire acondicionado', 'la contraseña', 'el monitor', 'la báscula', 'el escáner',
+]
+FRASES = [
+    'El problema empezó esta mañana.',
+    'Ya se reinició el equipo sin resultado.',
+    'Afecta a todo el turno.',
+    'Adjunto más detalles en el siguiente mensaje.',
+    'Es urgente porque detiene la producción.',
+    'Sucede de forma intermitente.',
+    'Otros compañeros tienen el mismo problema.',
+    'Se necesita antes del cierre de mes.',
+]
+SOLUCIONES = [
+    'Se reinició el servicio.', 'Se reemplazó la pieza dañada.', 'Se restableció la contraseña.',
+    'Se reconfiguró el equipo.', 'Se escaló al proveedor y quedó resuelto.',
+]
+
+
+def _acumulados(pesos):
+    total = 0.0
+    acumulados = []
+    for peso in pesos:
+        total += peso
+        acumulados.append(total)
+    return acumulados
+
+
+def _zipf(n, exponente=1.1):
+    return [1 / (rango + 1) ** exponente for rango in range(n)]
+
+
+def _por_lotes(total, lote, crear):
+    hechos = 0
+    while hechos < total:
+        cantidad = min(lote, total - hechos)
+        with transaction.atomic():
+            crear(hechos, cantidad)
+        hechos += cantidad
+
+
+class Generador:
+    def __init__(self, semilla=1, lote=5000, dias=365, ahora=None):
+        self.rng = random.Random(semilla)
+        self.lote = lote
+        self.dias = dias
+        self.ahora = ahora or timezone.make_aware(datetime.combine(AHORA, time.min))
+        # dates are built on the local calendar and stored in UTC
+        self.ahora_local = timezone.localtime(self.ahora)
+
+    def departamentos(self, cantidad):
+        inicio = Departamento.objects.count()
+
+        def crear(hechos, n):
+            filas = []
+            for i in range(inicio + hechos, inicio + hechos + n):
+                if i < len(DEPARTAMENTOS):
+                    nombre, nombre_en = DEPARTAMENTOS[i]
+                else:
+                    nombre, nombre_en = f'Departamento {i + 1}', f'Department {i + 1}'
+                filas.append(Departamento(
+                    nombre=nombre,
+                    nombre_en=nombre_en,
+                    gerente=f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)}',
+                    email=f'departamento{i + 1}@example.com',
+                ))
+            Departamento.objects.bulk_create(filas)
+
+        _por_lotes(cantidad, self.lote, crear)
+
+    def usuarios(self, cantidad):
+        departamentos = list(Departamento.objects.order_by('id').values_list('id', flat=True))
+        acumulados = _acumulados(_zipf(len(departamentos), 0.8))
+        inicio = Usuario.objects.filter(username__startswith=PREFIJO_USUARIO).count()
+        # same unusable hash for everyone: hashing millions of passwords would dominate
+        password = make_password(None)
+
+        def crear(hechos, n):
+            filas = []
+            for i in range(inicio + hechos, inicio + hechos + n):
+                username = f'{PREFIJO_USUARIO}{i}'
+                filas.append(Usuario(
+                    username=username,
+                    email=f'{username}@example.com',
+                    password=password,
+                    first_name=self.rng.choice(NOMBRES),
+                    last_name=self.rng.choice(APELLIDOS),
+                    rol='superuser' if self.rng.random() < 0.01 else 'user',
+                    departamento_id=self.rng.choices(departamentos, cum_weights=acumulados)[0],
+                ))
+            Usuario.objects.bulk_create(filas)
+
+        _por_lotes(cantidad, self.lote, crear)
+
+    def motivos(self, cantidad):
+        departamentos = list(Departamento.objects.order_by('id').values_list('id', flat=True))
+        acumulados = _acumulados(_zipf(len(departamentos)))
+
+        def crear(hechos, n):
+            filas = []
+            for i in range(hechos, hechos + n):
+                nombre, nombre_en = MOTIVOS[i % len(MOTIVOS)]
+                vuelta = i // len(MOTIVOS)
+                if vuelta:
+                    nombre, nombre_en = f'{nombre} {vuelta + 1}', f'{nombre_en} {vuelta + 1}'
+                filas.append(Motivo(
+                    nombre=nombre,
+                    nombre_en=nombre_en,
+                    departamento_id=self.rng.choices(departamentos, cum_weights=acumulados)[0],
+                ))
+            Motivo.objects.bulk_create(filas)
+
+        _por_lotes(cantidad, self.lote, crear)
+
+    def cerradores(self, cantidad):
+        def crear(hechos, n):
+            Cerrador.objects.bulk_create([
+                Cerrador(nombre=f'{self.rng.choice(NOMBRES)} {self.rng.choice(APELLIDOS)}')
+                for _ in range(n)
+            ])
+
+        _por_lotes(cantidad, self.lote, crear)
+
+    def _fecha_creacion(self):
+        # more recent days are likelier (steady growth), weekends quieter,
+        # and most tickets between 7:00 and 19:00
+        while True:
+            dias_atras = int(self.dias * (1 - math.sqrt(self.rng.random())))
+            dia = self.ahora_local - timedelta(days=dias_atras)
+            if dia.weekday() < 5 or self.rng.random() < 0.2:
+                break
+        minuto = int(self.rng.triangular(7 * 60, 19 * 60, 10 * 60)) if self.rng.random() < 0.9 \
+            else self.rng.randrange(24 * 60)
+        fecha = dia.replace(hour=minuto // 60, minute=minuto % 60, second=self.rng.randrange(60), microsecond=0)
+        return min(fecha.astimezone(dt_timezone.utc), self.ahora)
+
+    def _contenido(self):
+        frases = max(1, min(200, int(self.rng.lognormvariate(math.log(3), 0.9))))
+        return ' '.join(self.rng.choice(FRASES) for _ in range(frases))
+
+    def tickets(self, cantidad):
+        departamentos = list(Departamento.objects.order_by('id').values_list('id', flat=True))
+        if not departamentos:
+            return
+        pesos_departamento = _zipf(len(departamentos))
+        acumulados_departamento = _acumulados(pesos_departamento)
+
+        motivos_por_departamento = {}
+        for motivo_id, departamento_id in Motivo.objects.order_by('id').values_list('id', 'departamento_id'):
+            motivos_por_departamento.setdefault(departamento_id, []).append(motivo_id)
+        acumulados_motivo = {
+            departamento_id: _acumulados(_zipf(len(motivos)))
+            for departamento_id, motivos in motivos_por_departamento.items()
+        }
+
+        usuarios = list(Usuario.objects.order_by('id').values_list('id', flat=True))
+        if not usuarios:
+            return
+        acumulados_usuario = _acumulados(self.rng.paretovariate(1.2) for _ in usuarios)
+        cerradores = list(Cerrador.objects.order_by('id').values_list('id', flat=True))
+        acumulados_cerrador = _acumulados(_zipf(len(cerradores), 0.7)) if cerradores else None
+
+        prioridades = list(PESOS_PRIORIDAD)
+        acumulados_prioridad = _acumulados(PESOS_PRIORIDAD.values())
+
+        def crear(hechos, n):
+            filas, fechas = [], []
+            for _ in range(n):
+                departamento_id = self.rng.choices(departamentos, cum_weights=acumulados_departamento)[0]
+                motivos = motivos_por_departamento.get(departamento_id)
+                prioridad = self.rng.choices(prioridades, cum_weights=acumulados_prioridad)[0]
+                creado = self._fecha_creacion()
+                horas = self.rng.lognormvariate(math.log(HORAS_RESOLUCION[prioridad]), SIGMA_RESOLUCION)
+                cierre = creado + timedelta(hours=horas)
+
+                ticket = Ticket(
+                    usuario_id=self.rng.choices(usuarios, cum_weights=acumulados_usuario)[0],
+                    departamento_id=departamento_id,
+                    motivo_id=(self.rng.choices(motivos, cum_weights=acumulados_motivo[departamento_id])[0]
+                               if motivos else None),
+                    asunto=self.rng.choice(ASUNTOS).format(objeto=self.rng.choice(OBJETOS)).capitalize(),
+                    contenido=self._contenido(),
+                    prioridad=prioridad,
+                    fecha_creacion=creado,
+                )
+                if cierre <= self.ahora:
+                    ticket.estado = 'resuelto'
+                    ticket.fecha_cierre = cierre
+                    ticket.duracion_resolucion = cierre - creado
+                    ticket.solucion_texto = self.rng.choice(SOLUCIONES)
+                    if cerradores:
+                        ticket.cerrado_por_id = self.rng.choices(cerradores, cum_weights=acumulados_cerrador)[0]
+                else:
+                    ticket.estado = 'en_proceso' if self.rng.random() < 0.5 else 'abierto'
+                filas.append(ticket)
+                fechas.append(creado)
+            # auto_now_add stamps every row with "now" on insert; put the
+            # generated dates back in the same transaction
+            Ticket.objects.bulk_create(filas)
+            for ticket, creado in zip(filas, fechas):
+                ticket.fecha_creacion = creado
+            Ticket.objects.bulk_update(filas, ['fecha_creacion'])
+
+        _por_lotes(cantidad, self.lote, crear)
+
+
+def generar(departamentos=0, usuarios=0, motivos=0, cerradores=0, tickets=0,
+            semilla=1, lote=5000, dias=365, ahora=None, progreso=None):
+    """Add the given number of rows of each kind; tickets use all existing rows."""
+    generador = Generador(semilla=semilla, lote=lote, dias=dias, ahora=ahora)
+    for nombre, cantidad in (
+        ('departamentos', departamentos),
+        ('usuarios', usuarios),
+        ('motivos', motivos),
+        ('cerradores', cerradores),
+        ('tickets', tickets),
+    ):
+        if cantidad > 0:
+            getattr(generador, nombre)(cantidad)
+            if progreso:
+                progreso(nombre, cantidad)
+    if departamentos or motivos or cerradores:
+        bump_version('referencia')
+    if tickets:
+        bump_version('tickets')
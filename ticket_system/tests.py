@@ -1,4 +1,4 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 import io
 from django.contrib.auth import get_user_model
 from django.urls import reverse
@@ -7,6 +7,14 @@ from rest_framework.test import APIClient
 User = get_user_model()
 
 
+def pdf_text(resp):
+    """Extract the text of a PDF download (reports are file responses)."""
+    from PyPDF2 import PdfReader
+    content = b''.join(resp.streaming_content) if resp.streaming else resp.content
+    reader = PdfReader(io.BytesIO(content))
+    return "".join(page.extract_text() or "" for page in reader.pages)
+
+
 class PDFGenerationTests(TestCase):
     def setUp(self):
         # create a superuser to access the report endpoint
@@ -28,9 +36,7 @@ class PDFGenerationTests(TestCase):
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Type'], 'application/pdf')
         # parse PDF and look for Spanish title
-        from PyPDF2 import PdfReader
-        reader = PdfReader(io.BytesIO(resp.content))
-        text = "".join(page.extract_text() or "" for page in reader.pages)
+        text = pdf_text(resp)
         self.assertIn('Reporte Semanal de Tickets', text)
 
     def test_pdf_stats_english(self):
@@ -39,9 +45,7 @@ class PDFGenerationTests(TestCase):
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
         self.assertEqual(resp['Content-Type'], 'application/pdf')
-        from PyPDF2 import PdfReader
-        reader = PdfReader(io.BytesIO(resp.content))
-        text = "".join(page.extract_text() or "" for page in reader.pages)
+        text = pdf_text(resp)
         self.assertIn('Weekly Ticket Report', text)
 
     def test_motivo_translation_via_api_header(self):
@@ -80,16 +84,14 @@ class PDFGenerationTests(TestCase):
         url = reverse('pdf_ticket', args=[ticket.id]) + '?lang=en'
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        from PyPDF2 import PdfReader
-        reader = PdfReader(io.BytesIO(resp.content))
-        text = "".join(page.extract_text() or "" for page in reader.pages)
+        text = pdf_text(resp)
         self.assertIn('Passwords', text)
 
     def test_weekly_pdf_translates_departments(self):
         """When generating stats PDF in English, dept names should appear translated."""
         from ticket_system.models import Departamento, Ticket, Usuario
         # create a spanish-named department and a user/ticket
-        dept = Departamento.objects.create(nombre='Finanzas', gerente='', email='')
+        dept = Departamento.objects.create(nombre='Finanzas', nombre_en='Finance', gerente='', email='')
         user = Usuario.objects.create_user(
             username='u2', password='pass', rol='user', email='u2@x.com',
             departamento=dept
@@ -103,8 +105,1188 @@ class PDFGenerationTests(TestCase):
         url = reverse('pdf_estadisticas') + '?lang=en'
         resp = self.client.get(url)
         self.assertEqual(resp.status_code, 200)
-        from PyPDF2 import PdfReader
-        reader = PdfReader(io.BytesIO(resp.content))
-        text = "".join(page.extract_text() or "" for page in reader.pages)
+        text = pdf_text(resp)
         # english mapping for Finanzas is 'Finance'
         self.assertIn('Finance', text)
+
+
+class ReportDataTests(TestCase):
+    def test_stats_data_uses_fixed_number_of_queries(self):
+        """Aggregates are fetched in four queries however many motivos exist."""
+        from ticket_system.models import Departamento, Motivo, Ticket, Usuario
+        from ticket_system.report_data import obtener_datos_estadisticas
+        dept = Departamento.objects.create(nombre='Finanzas', nombre_en='Finance', gerente='', email='')
+        user = Usuario.objects.create_user(
+            username='u3', password='pass', rol='user', email='u3@x.com',
+            departamento=dept
+        )
+        for i in range(6):
+            motivo = Motivo.objects.create(nombre=f'Motivo {i}', nombre_en=f'Reason {i}', departamento=dept)
+            Ticket.objects.create(usuario=user, departamento=dept, motivo=motivo,
+                                  asunto='t', contenido='x', prioridad='alta')
+
+        with self.assertNumQueries(4):
+            datos = obtener_datos_estadisticas('en')
+
+        self.assertEqual(datos['departamentos'], [('Finance', 6)])
+        self.assertEqual(len(datos['motivos']), 6)
+        self.assertTrue(all(nombre.startswith('Reason') for nombre, total in datos['motivos']))
+        self.assertEqual(datos['prioridades'], [('alta', 'High', 6)])
+
+
+class LedgerPDFTests(TestCase):
+    def setUp(self):
+        from ticket_system.models import Departamento, Ticket, Usuario
+        self.superuser = User.objects.create_user(
+            username="admin", password="password123", rol="superuser",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superuser)
+        dept = Departamento.objects.create(nombre='Compras', nombre_en='Purchasing', gerente='', email='')
+        user = Usuario.objects.create_user(username='u5', password='pass', rol='user', email='u5@x.com')
+        Ticket.objects.bulk_create([
+            Ticket(usuario=user, departamento=dept, asunto=f'Asunto {i}', contenido='x')
+            for i in range(120)
+        ])
+
+    def test_rows_are_read_in_keyset_chunks(self):
+        from django.utils import timezone
+        from ticket_system.report_data import iter_filas_libro
+        hoy = timezone.localdate()
+        # 50 + 50 + 20 rows, one query each
+        with self.assertNumQueries(3):
+            filas = list(iter_filas_libro(hoy, hoy, 'en', chunk_size=50))
+        self.assertEqual(len(filas), 120)
+        self.assertEqual(filas[0][3], 'Purchasing')
+        self.assertEqual(filas[-1][2], 'Asunto 119')
+
+    def test_ledger_spans_pages_and_reports_render_time(self):
+        resp = self.client.get(reverse('pdf_libro') + '?lang=en')
+        self.assertEqual(resp.status_code, 200)
+        self.assertGreater(int(resp['X-Render-Pages']), 1)
+        self.assertIn('X-Render-Time', resp)
+        text = pdf_text(resp)
+        self.assertIn('Ticket Ledger', text)
+        self.assertIn('Asunto 119', text)
+
+    def test_invalid_period_is_rejected(self):
+        resp = self.client.get(reverse('pdf_libro') + '?desde=2024-02-10&hasta=2024-02-01')
+        self.assertEqual(resp.status_code, 400)
+
+
+@override_settings(REPORT_JOB_WORKERS=0)
+class ReportJobTests(TestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_user(
+            username="admin",
+            password="password123",
+            rol="superuser",
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superuser)
+
+    def test_submit_poll_and_download_stats_job(self):
+        resp = self.client.post(reverse('trabajos_reporte'), {'tipo': 'estadisticas', 'lang': 'en'}, format='json')
+        self.assertEqual(resp.status_code, 202)
+        trabajo_id = resp.json()['id']
+
+        resp = self.client.get(reverse('detalle_trabajo_reporte', args=[trabajo_id]))
+        self.assertEqual(resp.json()['estado'], 'completado')
+        self.assertIsNotNone(resp.json()['duracion_render'])
+
+        resp = self.client.get(reverse('descargar_trabajo_reporte', args=[trabajo_id]))
+        self.assertEqual(resp.status_code, 200)
+        text = pdf_text(resp)
+        self.assertIn('Weekly Ticket Report', text)
+
+        resp = self.client.get(reverse('trabajos_reporte'))
+        self.assertEqual(resp.json()['cola']['completados'], 1)
+        self.assertEqual(resp.json()['cola']['pendientes'], 0)
+
+    def test_pruned_job_file_answers_gone(self):
+        from ticket_system import report_store
+        trabajo_id = self.client.post(reverse('trabajos_reporte'), {'tipo': 'estadisticas'}, format='json').json()['id']
+        report_store.podar(max_dias=-1, max_bytes=0)
+
+        resp = self.client.get(reverse('descargar_trabajo_reporte', args=[trabajo_id]))
+        self.assertEqual(resp.status_code, 410)
+        self.assertEqual(self.client.get(reverse('detalle_trabajo_reporte', args=[trabajo_id])).json()['estado'],
+                         'expirado')
+
+    def test_regular_user_cannot_submit_jobs(self):
+        user = User.objects.create_user(username='u4', password='pass', rol='user', email='u4@x.com')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        resp = client.post(reverse('trabajos_reporte'), {'tipo': 'estadisticas'}, format='json')
+        self.assertEqual(resp.status_code, 403)
+
+
+@override_settings(REPORT_JOB_WORKERS=0)
+class BatchExportTests(TestCase):
+    def test_zip_export_contains_one_pdf_per_ticket(self):
+        import zipfile
+        from ticket_system.models import Departamento, Ticket
+        superuser = User.objects.create_user(username='admin', password='password123', rol='superuser')
+        user = User.objects.create_user(username='u5', password='pass', rol='user', email='u5@x.com')
+        dept = Departamento.objects.create(nombre='Ventas', gerente='', email='')
+        tickets = [
+            Ticket.objects.create(usuario=user, departamento=dept, asunto=f'Asunto {i}', contenido='x')
+            for i in range(3)
+        ]
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+
+        ids = ','.join(str(t.id) for t in tickets[:2])
+        resp = client.get(reverse('pdf_tickets_zip') + f'?ids={ids}')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp['Content-Type'], 'application/zip')
+
+        archivo = zipfile.ZipFile(io.BytesIO(b''.join(resp.streaming_content)))
+        self.assertEqual(sorted(archivo.namelist()), sorted(f'ticket_{t.id}.pdf' for t in tickets[:2]))
+        self.assertTrue(archivo.read(f'ticket_{tickets[0].id}.pdf').startswith(b'%PDF'))
+
+
+class PDFToolkitTests(TestCase):
+    def test_styles_and_logo_are_built_once_per_process(self):
+        from ticket_system import pdf_toolkit
+        pdf_toolkit.clear_caches()
+        self.assertIs(pdf_toolkit.get_styles(), pdf_toolkit.get_styles())
+        self.assertIs(pdf_toolkit.get_logo(), pdf_toolkit.get_logo())
+        self.assertEqual(pdf_toolkit.get_styles.cache_info().misses, 1)
+
+
+class ReportStoreTests(TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(REPORTS_ROOT=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_identical_reports_are_stored_once(self):
+        from ticket_system import report_store
+        a = report_store.guardar(b'%PDF-same', 'tickets')
+        b = report_store.guardar(b'%PDF-same', 'tickets')
+        c = report_store.guardar(b'%PDF-other', 'tickets')
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, c)
+
+    def test_report_pruned_meanwhile_is_written_again(self):
+        from ticket_system import report_store
+        path = report_store.guardar(b'%PDF-same', 'tickets')
+        report_store.podar(max_dias=-1, max_bytes=0)
+        self.assertFalse(path.exists())
+        self.assertEqual(report_store.guardar(b'%PDF-same', 'tickets'), path)
+        self.assertEqual(path.read_bytes(), b'%PDF-same')
+
+    def test_prune_by_age_then_size(self):
+        import os
+        import time
+        from ticket_system import report_store
+        viejo = report_store.guardar(b'a' * 100, 'tickets')
+        os.utime(viejo, (time.time() - 40 * 86400,) * 2)
+        medio = report_store.guardar(b'b' * 100, 'tickets')
+        os.utime(medio, (time.time() - 60,) * 2)
+        nuevo = report_store.guardar(b'c' * 100, 'tickets')
+
+        borrados, liberados = report_store.podar(max_dias=30, max_bytes=150)
+        self.assertEqual((borrados, liberados), (2, 200))
+        self.assertEqual([viejo.exists(), medio.exists(), nuevo.exists()], [False, False, True])
+
+    @override_settings(SENDFILE_BACKEND='nginx', REPORTS_ACCEL_PREFIX='/protected/reportes/')
+    def test_nginx_backend_delegates_download(self):
+        superuser = User.objects.create_user(username='admin', password='password123', rol='superuser')
+        client = APIClient()
+        client.force_authenticate(user=superuser)
+        resp = client.get(reverse('pdf_estadisticas') + '?lang=es')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.content, b'')
+        self.assertTrue(resp['X-Accel-Redirect'].startswith('/protected/reportes/semanales/'))
+        self.assertIn('attachment;', resp['Content-Disposition'])
+
+
+@override_settings(IMAGE_WORKERS=0, IMAGE_MAX_DIMENSION=400, IMAGE_THUMB_DIMENSION=100)
+class ImageUploadTests(TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.superuser = User.objects.create_user(username="admin", password="password123", rol="superuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superuser)
+
+    def subir(self, contenido, nombre='foto.jpg'):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        archivo = SimpleUploadedFile(nombre, contenido, content_type='image/jpeg')
+        return self.client.post(reverse('upload_image'), {'imagen': archivo}, format='multipart')
+
+    def test_photo_is_bounded_stripped_and_gets_variants(self):
+        import os
+        from PIL import Image
+        foto = Image.new('RGB', (1200, 800), 'red')
+        exif = Image.Exif()
+        exif[0x0112] = 6  # orientation: rotated 90 degrees
+        exif[0x010F] = 'Camara'
+        buffer = io.BytesIO()
+        foto.save(buffer, 'JPEG', exif=exif)
+
+        resp = self.subir(buffer.getvalue())
+        self.assertEqual(resp.status_code, 200)
+        nombre = os.path.join(self.tmp.name, resp.json()['url'].split('/media/', 1)[1])
+
+        with Image.open(nombre) as principal:
+            # rotated by EXIF and bounded to IMAGE_MAX_DIMENSION
+            self.assertEqual(principal.size, (267, 400))
+            self.assertFalse(principal.getexif())
+        with Image.open(nombre.replace('.jpg', '_thumb.jpg')) as miniatura:
+            self.assertEqual(max(miniatura.size), 100)
+        if resp.json()['webp']:
+            self.assertTrue(os.path.exists(nombre.replace('.jpg', '.webp')))
+
+    def test_cmyk_photo_loses_its_cmyk_profile(self):
+        import os
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('CMYK', (60, 40), (0, 255, 255, 0)).save(buffer, 'JPEG', icc_profile=b'not a real profile')
+
+        resp = self.subir(buffer.getvalue())
+        self.assertEqual(resp.status_code, 200)
+        with Image.open(os.path.join(self.tmp.name, resp.json()['url'].split('/media/', 1)[1])) as principal:
+            self.assertEqual(principal.mode, 'RGB')
+            self.assertNotIn('icc_profile', principal.info)
+
+    def test_duplicate_upload_restores_missing_variants(self):
+        import os
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (300, 200), 'green').save(buffer, 'JPEG')
+
+        url = self.subir(buffer.getvalue()).json()['url']
+        miniatura = os.path.join(self.tmp.name, url.split('/media/', 1)[1]).replace('.jpg', '_thumb.jpg')
+        os.remove(miniatura)
+
+        self.assertEqual(self.subir(buffer.getvalue()).json()['url'], url)
+        self.assertTrue(os.path.exists(miniatura))
+
+    def test_non_image_and_oversized_uploads_are_rejected(self):
+        self.assertEqual(self.subir(b'not an image').status_code, 400)
+        with self.settings(IMAGE_UPLOAD_MAX_BYTES=10):
+            self.assertEqual(self.subir(b'x' * 11).status_code, 400)
+
+    def test_serializer_exposes_variant_urls(self):
+        from ticket_system.image_pipeline import variantes
+        url = 'http://testserver/media/soluciones/aa/' + 'a' * 64 + '.jpg'
+        self.assertEqual(variantes(url)['miniatura'], url.replace('.jpg', '_thumb.jpg'))
+        self.assertIsNone(variantes('http://testserver/media/soluciones/legacy.png')['miniatura'])
+
+    def test_duplicates_are_stored_once_and_collected_when_unreferenced(self):
+        import os
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from PIL import Image
+        from ticket_system.models import Departamento, ImagenSolucion, Ticket
+        buffer = io.BytesIO()
+        Image.new('RGB', (50, 50), 'blue').save(buffer, 'PNG')
+
+        url = self.subir(buffer.getvalue(), 'a.png').json()['url']
+        self.assertEqual(self.subir(buffer.getvalue(), 'b.png').json()['url'], url)
+        imagen = ImagenSolucion.objects.get()
+
+        dept = Departamento.objects.create(nombre='D', gerente='', email='')
+        tickets = [
+            Ticket.objects.create(usuario=self.superuser, departamento=dept, asunto='t', contenido='x',
+                                  solucion_imagenes=[url])
+            for _ in range(2)
+        ]
+        imagen.refresh_from_db()
+        self.assertEqual(imagen.referencias, 2)
+
+        # saves diff against the value loaded with the instance, without re-reading the row
+        cargado = Ticket.objects.get(pk=tickets[0].pk)
+        cargado.solucion_imagenes.append(url)
+        with CaptureQueriesContext(connection) as consultas:
+            cargado.save()
+        self.assertFalse([q for q in consultas.captured_queries if q['sql'].startswith('SELECT')])
+        imagen.refresh_from_db()
+        self.assertEqual(imagen.referencias, 3)
+        cargado.solucion_imagenes.pop()
+        cargado.save(update_fields=['solucion_imagenes'])
+
+        tickets[0].solucion_imagenes = []
+        tickets[0].save()
+        tickets[1].delete()
+        imagen.refresh_from_db()
+        self.assertEqual(imagen.referencias, 0)
+
+        # uploading the same bytes again restarts the grace period
+        ImagenSolucion.objects.update(fecha_creacion=imagen.fecha_creacion - timedelta(days=2))
+        self.subir(buffer.getvalue(), 'c.png')
+        call_command('purgar_imagenes', stdout=io.StringIO())
+        self.assertTrue(ImagenSolucion.objects.exists())
+
+        ImagenSolucion.objects.update(fecha_creacion=imagen.fecha_creacion - timedelta(days=2))
+        call_command('purgar_imagenes', stdout=io.StringIO())
+        self.assertFalse(ImagenSolucion.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, imagen.archivo)))
+
+
+class MediaServingTests(TestCase):
+    def setUp(self):
+        import os
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=self.tmp.name, SENDFILE_BACKEND='')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.nombre = 'soluciones/ab/' + 'ab' * 32 + '.jpg'
+        os.makedirs(os.path.join(self.tmp.name, 'soluciones', 'ab'))
+        with open(os.path.join(self.tmp.name, self.nombre), 'wb') as f:
+            f.write(bytes(range(256)))
+
+    def test_content_addressed_files_are_immutable_and_revalidate(self):
+        resp = self.client.get('/media/' + self.nombre)
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('immutable', resp['Cache-Control'])
+        self.assertEqual(b''.join(resp.streaming_content), bytes(range(256)))
+
+        resp = self.client.get('/media/' + self.nombre, HTTP_IF_NONE_MATCH=resp['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_single_range_is_served_partially(self):
+        resp = self.client.get('/media/' + self.nombre, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(resp.status_code, 206)
+        self.assertEqual(resp['Content-Range'], 'bytes 10-19/256')
+        self.assertEqual(b''.join(resp.streaming_content), bytes(range(10, 20)))
+        self.assertEqual(self.client.get('/media/' + self.nombre, HTTP_RANGE='bytes=300-').status_code, 416)
+
+    def test_nginx_backend_and_traversal(self):
+        with self.settings(SENDFILE_BACKEND='nginx'):
+            resp = self.client.get('/media/' + self.nombre)
+        self.assertEqual(resp['X-Accel-Redirect'], '/protected/media/' + self.nombre)
+        self.assertEqual(resp.content, b'')
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+
+
+@override_settings(IMAGE_WORKERS=0)
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        import tempfile
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(MEDIA_ROOT=self.tmp.name + '/media', UPLOAD_SESSIONS_ROOT=self.tmp.name + '/subidas')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.superuser = User.objects.create_user(username="admin", password="password123", rol="superuser")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superuser)
+
+    def put(self, sesion_id, contenido, inicio, total):
+        return self.client.generic(
+            'PUT', reverse('sesion_subida', args=[sesion_id]), contenido,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {inicio}-{inicio + len(contenido) - 1}/{total}',
+        )
+
+    def test_upload_resumes_from_confirmed_offset_and_finalizes(self):
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), 'green').save(buffer, 'PNG')
+        datos = buffer.getvalue()
+        mitad = len(datos) // 2
+
+        resp = self.client.post(reverse('crear_subida'), {'nombre': 'x.png', 'tamano': len(datos)}, format='json')
+        self.assertEqual(resp.status_code, 201)
+        sesion_id = resp.json()['id']
+
+        self.assertEqual(self.put(sesion_id, datos[:mitad], 0, len(datos)).json()['recibido'], mitad)
+        # a retried chunk that was already confirmed is refused with the offset to resume from
+        conflicto = self.put(sesion_id, datos[:mitad], 0, len(datos))
+        self.assertEqual(conflicto.status_code, 409)
+        self.assertEqual(conflicto.json()['recibido'], mitad)
+        self.assertEqual(self.client.get(reverse('sesion_subida', args=[sesion_id])).json()['recibido'], mitad)
+
+        self.assertEqual(self.put(sesion_id, datos[mitad:], mitad, len(datos)).status_code, 200)
+        resp = self.client.post(reverse('finalizar_subida', args=[sesion_id]))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn('/media/soluciones/', resp.json()['url'])
+
+    def test_stale_sessions_are_purged(self):
+        import os
+        from datetime import timedelta
+        from django.core.management import call_command
+        from django.utils import timezone
+        from ticket_system import chunked_upload
+        from ticket_system.models import SesionSubida
+        sesion = chunked_upload.crear_sesion(self.superuser, 'x.png', 100)
+        SesionSubida.objects.update(fecha_actualizacion=timezone.now() - timedelta(days=2))
+
+        call_command('purgar_subidas', stdout=io.StringIO())
+        self.assertFalse(SesionSubida.objects.exists())
+        self.assertFalse(os.path.exists(chunked_upload.ruta(sesion)))
+
+
+@override_settings(CACHE_SHARED=True)
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.authtoken.models import Token
+        from ticket_system import authentication
+        from ticket_system import token_activity
+        cache.clear()
+        authentication.reiniciar_estadisticas()
+        token_activity.flush()
+        self.user = User.objects.create_user(username='u6', password='pass12345', rol='superuser', email='u6@x.com')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('estado_cache_tokens')
+
+    def test_second_request_skips_token_lookup(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['aciertos'], 1)
+
+    def test_cache_holds_no_user_row(self):
+        import pickle
+        from django.core.cache import cache
+        from ticket_system.authentication import clave_cache
+        self.client.get(self.url)
+        entrada = cache.get(clave_cache(self.token.key))
+        self.assertEqual(set(entrada), {'user_id', 'is_active', 'rol', 'created', 'ultimo_uso'})
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(entrada))
+
+    def test_per_process_cache_is_bypassed(self):
+        with self.settings(CACHE_SHARED=False):
+            self.client.get(self.url)
+            resp = self.client.get(self.url)
+            # nothing to invalidate, so saving the user skips the token query
+            with self.assertNumQueries(1):
+                self.user.save(update_fields=['last_login'])
+        self.assertEqual(resp.json()['aciertos'], 0)
+        self.assertFalse(resp.json()['cache_compartida'])
+
+    def test_logout_and_role_change_invalidate_cache(self):
+        self.client.get(self.url)
+        self.user.rol = 'user'
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        self.client.post(reverse('api_logout'))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_password_change_and_deactivation_invalidate_cache(self):
+        self.client.get(self.url)
+        self.client.post(reverse('cambiar_password'),
+                         {'username': 'u6', 'email': 'u6@x.com', 'new_password': 'nueva12345'})
+        from django.core.cache import cache
+        from ticket_system.authentication import clave_cache
+        self.assertIsNone(cache.get(clave_cache(self.token.key)))
+
+        self.client.get(self.url)
+        self.user.refresh_from_db()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class TokenExpiryTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.authtoken.models import Token
+        from ticket_system import token_activity
+        cache.clear()
+        token_activity.flush()
+        self.user = User.objects.create_user(username='u7', password='pass12345', rol='superuser', email='u7@x.com')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.url = reverse('estado_cache_tokens')
+
+    def _envejecer(self, key, horas):
+        from datetime import timedelta
+        from django.utils import timezone
+        from rest_framework.authtoken.models import Token
+        from ticket_system.models import TokenActividad
+        antes = timezone.now() - timedelta(hours=horas)
+        Token.objects.filter(key=key).update(created=antes)
+        TokenActividad.objects.update_or_create(token_id=key, defaults={'ultimo_uso': antes})
+
+    @override_settings(AUTH_TOKEN_ACTIVITY_FLUSH_SECONDS=3600, AUTH_TOKEN_ACTIVITY_BATCH=3)
+    def test_uses_are_written_in_batches(self):
+        from ticket_system.models import TokenActividad
+        for _ in range(2):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertFalse(TokenActividad.objects.filter(token=self.token).exists())
+
+        from rest_framework.authtoken.models import Token
+        otros = [Token.objects.create(user=User.objects.create_user(username=f'b{i}', password='x', email=f'b{i}@x.com'))
+                 for i in range(2)]
+        for token in otros:
+            self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+            self.client.get(self.url)
+        self.assertEqual(TokenActividad.objects.count(), 3)
+
+    @override_settings(AUTH_TOKEN_EXPIRY_HOURS=24)
+    def test_idle_token_expires_and_login_issues_new_one(self):
+        from rest_framework.authtoken.models import Token
+        self._envejecer(self.token.key, 25)
+        resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 401)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+        self._envejecer(Token.objects.create(user=self.user).key, 25)
+        resp = APIClient().post(reverse('api_login'), {'email': 'u7@x.com', 'password': 'pass12345'})
+        self.assertEqual(resp.status_code, 200)
+        nuevo = resp.json()['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {nuevo}')
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_purge_command_deletes_expired_tokens_in_chunks(self):
+        from django.core.management import call_command
+        from rest_framework.authtoken.models import Token
+        viejos = [Token.objects.create(user=User.objects.create_user(username=f'p{i}', password='x', email=f'p{i}@x.com'))
+                  for i in range(3)]
+        for token in viejos:
+            self._envejecer(token.key, 200)
+
+        out = io.StringIO()
+        call_command('purgar_tokens', '--dry-run', stdout=out)
+        self.assertIn('3', out.getvalue())
+        call_command('purgar_tokens', '--lote', '2', stdout=io.StringIO())
+        self.assertEqual(list(Token.objects.values_list('key', flat=True)), [self.token.key])
+
+
+class ApiMiddlewareTests(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+        self.user = User.objects.create_user(username='u8', password='pass12345', rol='superuser',
+                                             email='u8@x.com', is_staff=True, is_superuser=True)
+        self.token = Token.objects.create(user=self.user)
+
+    def test_api_requests_skip_session_and_csrf(self):
+        from django.test import Client
+        client = Client(enforce_csrf_checks=True, HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        resp = client.get(reverse('estado_cache_tokens'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(hasattr(resp.wsgi_request, 'session'))
+        self.assertNotIn('Cookie', resp.get('Vary', ''))
+        self.assertEqual(len(resp.cookies), 0)
+
+        resp = client.post(reverse('api_login'), {'email': 'u8@x.com', 'password': 'pass12345'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.cookies), 0)
+
+    def test_admin_keeps_session_and_csrf(self):
+        from django.test import Client
+        client = Client(enforce_csrf_checks=True)
+        resp = client.get('/admin/login/')
+        self.assertIn('csrftoken', resp.cookies)
+        self.assertEqual(client.post('/admin/login/', {'username': 'u8', 'password': 'pass12345'}).status_code, 403)
+
+        client.force_login(self.user)
+        self.assertEqual(client.get('/admin/').status_code, 200)
+
+
+class ReferenceCacheTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from ticket_system.models import Departamento, Motivo
+        cache.clear()
+        self.depto = Departamento.objects.create(nombre='Cache', gerente='G', email='c@x.com')
+        self.motivo = Motivo.objects.create(nombre='Impresora', nombre_en='Printer', departamento=self.depto)
+        self.user = User.objects.create_user(username='u9', password='pass12345')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_is_served_from_cache_with_validators(self):
+        url = reverse('departamento-list')
+        primera = self.client.get(url)
+        self.assertIn('public', primera['Cache-Control'])
+        with self.assertNumQueries(0):
+            segunda = self.client.get(url)
+        self.assertEqual(primera.json(), segunda.json())
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(resp.status_code, 304)
+
+    def test_save_bumps_version(self):
+        url = reverse('motivo-list') + f'?departamento={self.depto.id}'
+        primera = self.client.get(url)
+        self.assertIn('private', primera['Cache-Control'])
+        self.motivo.nombre_en = 'Scanner'
+        self.motivo.save()
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], primera['ETag'])
+        self.assertEqual([m['nombre'] for m in resp.json()], ['Scanner'])
+
+    def test_entries_vary_by_language_and_filter(self):
+        url = reverse('motivo-list') + f'?departamento={self.depto.id}'
+        es = self.client.get(url, HTTP_ACCEPT_LANGUAGE='es')
+        en = self.client.get(url, HTTP_ACCEPT_LANGUAGE='en')
+        self.assertEqual([m['nombre'] for m in es.json()], ['Impresora'])
+        self.assertEqual([m['nombre'] for m in en.json()], ['Printer'])
+        self.assertNotEqual(es['ETag'], en['ETag'])
+
+        otro = self.client.get(reverse('motivo-list') + '?departamento=0', HTTP_ACCEPT_LANGUAGE='es')
+        self.assertEqual(otro.json(), [])
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from ticket_system.api_views import listas_tickets
+        cache.clear()
+        listas_tickets.limpiar()
+        self.admin = User.objects.create_user(username='sf_admin', password='x', rol='superuser')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_concurrent_callers_share_one_computation(self):
+        import threading
+        import time
+        from ticket_system.single_flight import Coalescedor
+        coalescedor = Coalescedor()
+        llamadas = []
+
+        def lento():
+            llamadas.append(1)
+            time.sleep(0.2)
+            return b'[]'
+
+        resultados = []
+        hilos = [threading.Thread(target=lambda: resultados.append(coalescedor.hacer('k', lento, 1)))
+                 for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, [b'[]'] * 8)
+        self.assertEqual((coalescedor.ejecutadas, coalescedor.compartidas), (1, 7))
+
+    def test_query_parameters_are_part_of_the_key(self):
+        # multi-valued parameters arrive as lists, which cannot be hashed
+        url = reverse('ticket-list')
+        resp = self.client.get(url + '?format=json&orden=a&orden=b')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), [])
+        self.assertEqual(self.client.get(url + '?orden=b&orden=a').status_code, 200)
+
+    def test_ticket_list_is_reused_until_a_ticket_changes(self):
+        from ticket_system.models import Departamento, Ticket
+        depto = Departamento.objects.create(nombre='SF', gerente='G', email='sf@x.com')
+        usuario = User.objects.create_user(username='sf_user', password='x')
+        Ticket.objects.create(usuario=usuario, departamento=depto, asunto='uno', contenido='c')
+
+        url = reverse('ticket-list')
+        primera = self.client.get(url)
+        self.assertEqual(len(primera.json()), 1)
+        with self.assertNumQueries(0):
+            segunda = self.client.get(url)
+        self.assertEqual(primera.content, segunda.content)
+
+        Ticket.objects.create(usuario=usuario, departamento=depto, asunto='dos', contenido='c')
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+        cliente = APIClient()
+        cliente.force_authenticate(user=usuario)
+        self.assertEqual(len(cliente.get(url).json()), 2)
+
+
+@override_settings(READ_MODEL_BACKGROUND=False, CACHE_SHARED=True)
+class ReadModelTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from ticket_system.api_views import listas_tickets
+        from ticket_system.models import Departamento, Ticket
+        from ticket_system.read_model import ModeloLectura
+        cache.clear()
+        listas_tickets.limpiar()
+        self.depto = Departamento.objects.create(nombre='RM', gerente='G', email='rm@x.com')
+        self.usuario = User.objects.create_user(username='rm_user', password='x')
+        for asunto, estado, prioridad in [('a', 'abierto', 'alta'), ('b', 'en_proceso', 'baja'),
+                                          ('c', 'resuelto', 'alta')]:
+            Ticket.objects.create(usuario=self.usuario, departamento=self.depto, asunto=asunto,
+                                  contenido='x', estado=estado, prioridad=prioridad)
+        from unittest import mock
+        patcher = mock.patch('ticket_system.read_model.modelo', ModeloLectura())
+        self.modelo = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_user(username='rm_admin', password='x', rol='superuser')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def test_open_tickets_match_orm_and_skip_db(self):
+        url = reverse('ticket-list') + '?estado=abierto,en_proceso'
+        with override_settings(READ_MODEL_ENABLED=False):
+            esperado = self.client.get(url).json()
+        self.assertEqual([t['asunto'] for t in esperado], ['b', 'a'])
+
+        self.client.get(url)  # loads the model
+        with self.assertNumQueries(0):
+            resp = self.client.get(url + '&prioridad=alta')
+        self.assertEqual(resp.json(), [t for t in esperado if t['prioridad'] == 'alta'])
+        # only the resolved-ticket aggregate reaches the database
+        with self.assertNumQueries(1):
+            stats = self.client.get(reverse('ticket-estadisticas')).json()
+        self.assertEqual(stats['total'], 2)
+        self.assertEqual(stats['por_estado'], {'abierto': 1, 'en_proceso': 1})
+
+    def test_stats_summarize_resolved_tickets_from_the_database(self):
+        from django.utils import timezone
+        from ticket_system.models import Ticket
+        self.client.get(reverse('ticket-estadisticas'))  # loads the model
+        # what the admin page polls: the open list from memory, plus one
+        # aggregate that tells it when to reload the resolved tickets
+        with self.assertNumQueries(1):
+            stats = self.client.get(reverse('ticket-estadisticas')).json()
+        self.assertEqual(stats['resueltos'], {'total': 1, 'ultimo_cierre': None})
+
+        cierre = timezone.now()
+        Ticket.objects.filter(asunto='b').update(estado='resuelto', fecha_cierre=cierre)
+        stats = self.client.get(reverse('ticket-estadisticas')).json()
+        self.assertEqual(stats['resueltos']['total'], 2)
+        self.assertEqual(stats['resueltos']['ultimo_cierre'], cierre.isoformat())
+
+    def test_local_saves_keep_model_current(self):
+        from ticket_system.models import Ticket
+        url = reverse('ticket-list') + '?estado=abierto'
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(usuario=self.usuario, departamento=self.depto, asunto='d', contenido='x')
+        with self.assertNumQueries(0):
+            resp = self.client.get(url)
+        self.assertEqual([t['asunto'] for t in resp.json()], ['d', 'a'])
+
+    def test_off_without_shared_cache(self):
+        url = reverse('ticket-list') + '?estado=abierto'
+        with override_settings(CACHE_SHARED=False):
+            self.assertEqual([t['asunto'] for t in self.client.get(url).json()], ['a'])
+        self.assertIsNone(self.modelo.cargado_en)
+
+    def test_falls_back_to_orm_when_stale(self):
+        from ticket_system.cache_utils import bump_version
+        url = reverse('ticket-list') + '?estado=abierto'
+        self.client.get(url)
+        from unittest import mock
+        bump_version('tickets')  # a write made by another worker
+        with override_settings(READ_MODEL_BACKGROUND=True):
+            with mock.patch('threading.Thread.start'):
+                resp = self.client.get(url)
+        self.assertEqual([t['asunto'] for t in resp.json()], ['a'])
+        self.assertFalse(self.modelo.vigente())
+
+
+@override_settings(METRICS_TOKEN='secreto')
+class MetricsTests(TestCase):
+    def setUp(self):
+        from ticket_system import metrics
+        metrics.reiniciar()
+        self.user = User.objects.create_user(username='m1', password='x', rol='superuser')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _metricas(self, token='secreto'):
+        return self.client.get(reverse('metricas'), HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_requests_are_recorded_per_url_name(self):
+        self.client.get(reverse('departamento-list'))
+        self.client.get('/api/no-existe/')
+        texto = self._metricas().content.decode()
+        self.assertIn('http_requests_total{endpoint="departamento-list",estado="200",metodo="GET"} 1', texto)
+        self.assertIn('http_request_duration_seconds_count{endpoint="departamento-list",metodo="GET"} 1', texto)
+        self.assertIn('http_request_db_queries_bucket{endpoint="departamento-list",le="+Inf"} 1', texto)
+        self.assertIn('http_response_size_bytes_count{endpoint="departamento-list"} 1', texto)
+        self.assertIn('endpoint="sin_ruta"', texto)
+
+    def test_email_and_pdf_durations(self):
+        from ticket_system.email_utils import _send_email_with_logo
+        self.assertTrue(_send_email_with_logo('Asunto', 'texto', '<p>texto</p>', ['a@x.com']))
+        self.client.get(reverse('pdf_estadisticas'))
+        texto = self._metricas().content.decode()
+        self.assertIn('email_send_duration_seconds_count{resultado="ok"} 1', texto)
+        self.assertIn('pdf_render_duration_seconds_count{reporte="estadisticas"} 1', texto)
+
+    def test_scrape_adds_up_every_worker(self):
+        import json
+        import os
+        import tempfile
+        from unittest import mock
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        serie = [[['endpoint', 'departamento-list'], ['estado', 200], ['metodo', 'GET']], 2]
+        # another live worker, and one that has exited
+        for pid in (os.getppid(), 99999999):
+            with open(os.path.join(tmp.name, f'{pid}.json'), 'w') as f:
+                json.dump({'pid': pid, 'inicio': 1.0, 'series': {'http_requests_total': [serie]}}, f)
+
+        with override_settings(METRICS_DIR=tmp.name), mock.patch('ticket_system.metrics.iniciar_volcado'):
+            self.client.get(reverse('departamento-list'))
+            texto = self._metricas().content.decode()
+            self.assertIn('http_requests_total{endpoint="departamento-list",estado="200",metodo="GET"} 5', texto)
+            self.assertIn(f'process_start_time_seconds{{pid="{os.getpid()}"}}', texto)
+            self.assertNotIn('pid="99999999"', texto)
+            self.assertFalse(os.path.exists(os.path.join(tmp.name, '99999999.json')))
+            # the exited worker's counts stay in historico.json
+            texto = self._metricas().content.decode()
+            self.assertIn('http_requests_total{endpoint="departamento-list",estado="200",metodo="GET"} 5', texto)
+
+    def test_endpoint_requires_token(self):
+        self.assertEqual(self._metricas('otro').status_code, 401)
+        with override_settings(METRICS_TOKEN=''):
+            self.assertEqual(self._metricas('').status_code, 404)
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.core.cache import cache
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.destino = f'{self.tmp.name}/trazas.jsonl'
+        self.user = User.objects.create_user(username='tr1', password='x', rol='superuser')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _trazas(self):
+        import json
+        import os
+        if not os.path.exists(self.destino):
+            return []
+        with open(self.destino) as f:
+            return [json.loads(linea) for linea in f]
+
+    def test_sampled_request_exports_zipkin_spans(self):
+        from ticket_system.models import Departamento
+        Departamento.objects.create(nombre='TR', gerente='G', email='tr@x.com')
+        forzar = {'HTTP_X_B3_SAMPLED': '1', 'HTTP_X_TRACE_TOKEN': 'secreto'}
+        with override_settings(TRACE_EXPORT=self.destino, TRACE_EXPORT_WORKERS=0, TRACE_FORCE_TOKEN='secreto'):
+            resp = self.client.get(reverse('departamento-list'), **forzar)
+            self.client.get(reverse('pdf_estadisticas'), **forzar)
+
+        trazas = self._trazas()
+        self.assertEqual(len(trazas), 2)
+        spans = trazas[0]
+        raiz = next(s for s in spans if s.get('kind') == 'SERVER')
+        self.assertEqual(raiz['traceId'], resp['X-Trace-Id'])
+        self.assertEqual(raiz['name'], 'GET departamento-list')
+        self.assertEqual(raiz['tags']['http.status_code'], '200')
+        serializar = next(s for s in spans if s['name'] == 'serializar')
+        self.assertEqual(serializar['parentId'], raiz['id'])
+        # the queryset is evaluated while serializing
+        self.assertIn('db', {s['name'] for s in spans if s.get('parentId') == serializar['id']})
+        self.assertIn('pdf.build', {s['name'] for s in trazas[1]})
+
+    def test_sampling_controls(self):
+        with override_settings(TRACE_EXPORT=self.destino, TRACE_EXPORT_WORKERS=0):
+            resp = self.client.get(reverse('departamento-list'))
+            self.assertNotIn('X-Trace-Id', resp)
+            with override_settings(TRACE_SAMPLE_RATE=1.0):
+                self.client.get(reverse('departamento-list'), HTTP_X_B3_SAMPLED='0')
+                with override_settings(TRACE_SLOW_MS=60000):
+                    self.assertIn('X-Trace-Id', self.client.get(reverse('departamento-list')))
+        self.assertEqual(self._trazas(), [])
+
+    def test_forced_sampling_needs_token_and_export(self):
+        url = reverse('departamento-list')
+        with override_settings(TRACE_FORCE_TOKEN='secreto'):
+            self.assertNotIn('X-Trace-Id', self.client.get(url, HTTP_X_B3_SAMPLED='1', HTTP_X_TRACE_TOKEN='secreto'))
+            with override_settings(TRACE_EXPORT=self.destino, TRACE_EXPORT_WORKERS=0):
+                self.assertNotIn('X-Trace-Id', self.client.get(url, HTTP_X_B3_SAMPLED='1'))
+                self.assertNotIn('X-Trace-Id', self.client.get(url, HTTP_X_B3_SAMPLED='1', HTTP_X_TRACE_TOKEN='otro'))
+
+    def test_export_file_is_rotated(self):
+        import os
+        from ticket_system import tracing
+        with override_settings(TRACE_EXPORT_MAX_BYTES=50):
+            tracing._enviar(self.destino, [{'name': 'a' * 40}])
+            tracing._enviar(self.destino, [{'name': 'b'}])
+        self.assertTrue(os.path.exists(self.destino + '.1'))
+        self.assertEqual(self._trazas(), [[{'name': 'b'}]])
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.core.cache import cache
+        from rest_framework.authtoken.models import Token
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        ajustes = override_settings(PROFILE_ROOT=tmp.name, PROFILE_MAX_FILES=2)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.admin = User.objects.create_user(username='pf_admin', password='x', rol='superuser')
+        self.usuario = User.objects.create_user(username='pf_user', password='x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.admin).key}')
+
+    def test_superuser_gets_profile_with_sql(self):
+        resp = self.client.get(reverse('ticket-list') + '?_perfil=1')
+        self.assertEqual(resp.status_code, 200)
+        perfil_id = resp['X-Profile-Id']
+
+        informe = self.client.get(reverse('perfil_peticion', args=[perfil_id]))
+        texto = informe.content.decode()
+        self.assertIn('GET /api/tickets/?_perfil=1 -> 200', texto)
+        self.assertIn('function calls', texto)
+        self.assertIn('FROM "ticket"', texto)
+
+        prof = self.client.get(reverse('perfil_peticion', args=[perfil_id]) + '?formato=prof')
+        self.assertEqual(prof.status_code, 200)
+        self.assertEqual(self.client.get(reverse('perfil_peticion', args=['..x'])).status_code, 404)
+
+    def test_only_superusers_and_one_at_a_time(self):
+        from rest_framework.authtoken.models import Token
+        from ticket_system import profiling
+        cliente = APIClient()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.usuario).key}')
+        self.assertNotIn('X-Profile-Id', cliente.get(reverse('ticket-list'), HTTP_X_PROFILE='1'))
+
+        self.assertTrue(profiling.ocupar())
+        try:
+            resp = self.client.get(reverse('ticket-list'), HTTP_X_PROFILE='1')
+        finally:
+            profiling.liberar()
+        self.assertEqual(resp['X-Profile'], 'ocupado')
+        self.assertNotIn('X-Profile-Id', resp)
+
+    def test_old_reports_are_pruned(self):
+        import os
+        from django.conf import settings
+        for _ in range(3):
+            self.client.get(reverse('ticket-list'), HTTP_X_PROFILE='1')
+        self.assertEqual(len([n for n in os.listdir(settings.PROFILE_ROOT) if n.endswith('.txt')]), 2)
+
+
+class SyntheticDataTests(TestCase):
+    def test_command_adds_requested_rows_with_skew(self):
+        from django.core.management import call_command
+        from django.db.models import F
+        from ticket_system.models import Cerrador, Departamento, Motivo, Ticket
+        antes = Departamento.objects.count(), User.objects.count(), Motivo.objects.count()
+        call_command(
+            'generar_datos_sinteticos', '--departamentos', '4', '--usuarios', '30', '--motivos', '8',
+            '--cerradores', '3', '--tickets', '400', '--lote', '64', stdout=io.StringIO(),
+        )
+        self.assertEqual(
+            (Departamento.objects.count(), User.objects.count(), Motivo.objects.count()),
+            (antes[0] + 4, antes[1] + 30, antes[2] + 8),
+        )
+        self.assertEqual(Cerrador.objects.count(), 3)
+        self.assertEqual(Ticket.objects.count(), 400)
+
+        resueltos = Ticket.objects.filter(estado='resuelto')
+        self.assertTrue(resueltos.exists())
+        self.assertFalse(resueltos.filter(fecha_cierre__lt=F('fecha_creacion')).exists())
+        self.assertFalse(Ticket.objects.exclude(estado='resuelto').filter(fecha_cierre__isnull=False).exists())
+        self.assertGreater(
+            Ticket.objects.filter(prioridad='media').count(), Ticket.objects.filter(prioridad='urgente').count()
+        )
+
+    def test_same_seed_same_tickets(self):
+        from django.db import transaction
+        from ticket_system import synthetic_data
+        from ticket_system.models import Ticket
+
+        def generar():
+            with transaction.atomic():
+                synthetic_data.generar(departamentos=3, usuarios=10, motivos=5, tickets=100, semilla=7)
+                filas = list(Ticket.objects.order_by('id').values_list(
+                    'asunto', 'contenido', 'prioridad', 'estado', 'fecha_creacion', 'fecha_cierre'))
+                transaction.set_rollback(True)
+            return filas
+
+        self.assertEqual(generar(), generar())
+
+    def test_dates_follow_local_working_hours(self):
+        from datetime import datetime
+        from django.core.management import call_command
+        from django.utils import timezone
+        from ticket_system.models import Ticket
+        call_command('generar_datos_sinteticos', '--departamentos', '2', '--usuarios', '5', '--motivos', '2',
+                     '--cerradores', '0', '--tickets', '300', '--hasta', '2025-06-30', stdout=io.StringIO())
+        fechas = [timezone.localtime(f) for f in Ticket.objects.values_list('fecha_creacion', flat=True)]
+        self.assertLessEqual(max(fechas).replace(tzinfo=None), datetime(2025, 6, 30))
+        en_horario = sum(7 <= f.hour < 19 for f in fechas)
+        self.assertGreater(en_horario, len(fechas) * 0.8)
+        # the generator sets the dates after insert instead of touching the field
+        self.assertTrue(Ticket._meta.get_field('fecha_creacion').auto_now_add)
+
+
+class StartupTests(TestCase):
+    # generous on purpose: catches a heavy import sneaking back in, not noise
+    PRESUPUESTO_SEGUNDOS = 3.0
+
+    def test_wsgi_import_stays_within_budget_without_reportlab(self):
+        import json
+        import os
+        import subprocess
+        import sys
+        from django.conf import settings
+        script = (
+            "import json, sys, time\n"
+            "inicio = time.perf_counter()\n"
+            "import tickets.wsgi\n"
+            "from django.urls import get_resolver\n"
+            "get_resolver().url_patterns\n"
+            "print(json.dumps({'segundos': time.perf_counter() - inicio,"
+            " 'modulos': [m for m in sys.modules if m.startswith('reportlab')]}))\n"
+        )
+        # the warm-up loads ReportLab on purpose; this measures the import alone
+        entorno = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p), WARMUP_ON_START='False')
+        salida = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=entorno,
+            capture_output=True, text=True, check=True,
+        )
+        resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+        self.assertEqual(resultado['modulos'], [])
+        self.assertLess(resultado['segundos'], self.PRESUPUESTO_SEGUNDOS)
+
+
+@override_settings(CACHE_SHARED=True)
+class WarmupTests(TestCase):
+    def setUp(self):
+        from unittest import mock
+        from django.core.cache import cache
+        from ticket_system import warmup
+        from ticket_system.models import Departamento, Motivo
+        from ticket_system.read_model import ModeloLectura
+        cache.clear()
+        warmup.reiniciar()
+        self.addCleanup(warmup.reiniciar)
+        patcher = mock.patch('ticket_system.read_model.modelo', ModeloLectura())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        depto = Departamento.objects.create(nombre='Calor', gerente='G', email='w@x.com')
+        Motivo.objects.create(nombre='Red', nombre_en='Network', departamento=depto)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='w_user', password='x'))
+
+    def test_ready_after_warmup_with_reference_lists_cached(self):
+        from ticket_system import read_model, warmup
+        self.assertEqual(self.client.get(reverse('estado_listo')).status_code, 503)
+        warmup.al_iniciar()
+        resp = self.client.get(reverse('estado_listo'))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['pasos'], dict.fromkeys(
+            ['conexion', 'rutas', 'referencia', 'modelo_lectura', 'pdf'], 'ok'))
+        self.assertIsNotNone(read_model.modelo.cargado_en)
+
+        with self.assertNumQueries(0):
+            self.client.get(reverse('departamento-list'))
+            self.client.get(reverse('motivo-list'), HTTP_ACCEPT_LANGUAGE='es')
+            self.client.get(reverse('cerrador-list'), HTTP_ACCEPT_LANGUAGE='en')
+
+    def test_failed_step_keeps_worker_unready_and_is_retried_in_the_background(self):
+        from unittest import mock
+        from ticket_system import warmup
+        with mock.patch('ticket_system.pdf_toolkit.warm_up', side_effect=OSError('sin logo')), \
+                mock.patch('threading.Thread.start') as iniciar, \
+                self.assertLogs('ticket_system.warmup', level='ERROR') as logs:
+            warmup.al_iniciar()
+        self.assertTrue(iniciar.called)
+        self.assertIn('sin logo', '\n'.join(logs.output))
+
+        # the probe neither runs the warm-up nor leaks the error
+        with mock.patch('ticket_system.warmup.calentar') as calentar:
+            resp = self.client.get(reverse('estado_listo'))
+        self.assertFalse(calentar.called)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.json()['pasos']['pdf'], 'error')
+        self.assertEqual(resp.json()['pasos']['referencia'], 'ok')
+        self.assertNotIn('sin logo', resp.content.decode())
+
+    @override_settings(WARMUP_RETRY_SECONDS=1, WARMUP_RETRY_MAX_SECONDS=3)
+    def test_retry_backs_off_until_warm(self):
+        from unittest import mock
+        from ticket_system import warmup
+        with mock.patch('ticket_system.warmup.calentar', side_effect=[False, False, False, True]), \
+                mock.patch('ticket_system.warmup.time.sleep') as dormir, \
+                mock.patch('ticket_system.warmup.connection'):
+            warmup._reintentar()
+        self.assertEqual([llamada.args[0] for llamada in dormir.call_args_list], [1, 2, 3, 3])
+
+
+class SlaTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from ticket_system.models import Departamento, Motivo, Ticket
+        self.admin = User.objects.create_user(username='sla_admin', password='x', rol='superuser')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.redes = Departamento.objects.create(nombre='Redes', gerente='G', email='r@x.com')
+        self.compras = Departamento.objects.create(nombre='Compras', nombre_en='Purchasing', gerente='G', email='c@x.com')
+        motivo = Motivo.objects.create(nombre='Caída', nombre_en='Outage', departamento=self.redes)
+        ahora = timezone.now()
+        # exact durations; save() would derive them from fecha_creacion
+        for horas in range(1, 11):
+            ticket = Ticket.objects.create(
+                usuario=self.admin, departamento=self.redes, motivo=motivo, asunto='r', contenido='x',
+                prioridad='alta', estado='resuelto', fecha_cierre=ahora,
+            )
+            Ticket.objects.filter(pk=ticket.pk).update(duracion_resolucion=timedelta(hours=horas))
+        ticket = Ticket.objects.create(
+            usuario=self.admin, departamento=self.compras, asunto='c', contenido='x', prioridad='baja',
+            estado='resuelto', fecha_cierre=ahora,
+        )
+        Ticket.objects.filter(pk=ticket.pk).update(duracion_resolucion=timedelta(hours=2))
+        Ticket.objects.create(usuario=self.admin, departamento=self.compras, asunto='abierto', contenido='x')
+
+    def test_update_estado_stores_resolution_duration(self):
+        from unittest import mock
+        from ticket_system.models import Ticket
+        ticket = Ticket.objects.get(asunto='abierto')
+        with mock.patch('ticket_system.api_views.send_ticket_status_updated_email'):
+            self.client.post(reverse('ticket-update-estado', args=[ticket.id]), {'estado': 'resuelto'}, format='json')
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.duracion_resolucion, ticket.fecha_cierre - ticket.fecha_creacion)
+
+    def test_any_save_keeps_resolution_duration(self):
+        from datetime import timedelta
+        from ticket_system.models import Ticket
+        ticket = Ticket.objects.get(asunto='abierto')
+        ticket.estado = 'resuelto'
+        ticket.fecha_cierre = ticket.fecha_creacion + timedelta(hours=3)
+        ticket.save(update_fields=['estado', 'fecha_cierre'])
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).duracion_resolucion, timedelta(hours=3))
+
+        resp = self.client.patch(reverse('ticket-detail', args=[ticket.id]), {'estado': 'abierto'}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertIsNone(Ticket.objects.get(pk=ticket.pk).duracion_resolucion)
+
+    def test_percentiles_by_department_motivo_and_priority(self):
+        # one statement per dimension plus the department and motivo names
+        with self.assertNumQueries(5):
+            datos = self.client.get(reverse('ticket-sla') + '?lang=en').json()
+        redes, compras = datos['departamento']
+        self.assertEqual((redes['id'], redes['total']), (self.redes.id, 10))
+        self.assertEqual((redes['p50'], redes['p90'], redes['p99']), (5 * 3600, 9 * 3600, 10 * 3600))
+        self.assertEqual((compras['p50'], compras['p99']), (2 * 3600, 2 * 3600))
+        self.assertEqual([m['nombre'] for m in datos['motivo']], ['Outage', None])
+        self.assertEqual({p['id']: p['nombre'] for p in datos['prioridad']}, {'alta': 'High', 'baja': 'Low'})
+
+    def test_filters_and_permissions(self):
+        datos = self.client.get(reverse('ticket-sla') + '?por=prioridad&hasta=2000-01-01').json()
+        self.assertEqual(datos, {'prioridad': []})
+        self.assertEqual(self.client.get(reverse('ticket-sla') + '?por=usuario').status_code, 400)
+        self.assertEqual(self.client.get(reverse('ticket-sla') + '?desde=ayer').status_code, 400)
+
+        cliente = APIClient()
+        cliente.force_authenticate(user=User.objects.create_user(username='sla_user', password='x'))
+        self.assertEqual(cliente.get(reverse('ticket-sla')).status_code, 403)
@@ -0,0 +1,133 @@
+"""Sliding expiry for API tokens.
+
+A token expires once it has gone ``AUTH_TOKEN_EXPIRY_HOURS`` without being
+used. Recording every use would add a write to each request (the ticket
+list polls every 2 seconds), so ``registrar_uso`` only notes the key in
+memory. The notes are written by ``flush`` as a single batched ``UPDATE``
+once ``AUTH_TOKEN_ACTIVITY_FLUSH_SECONDS`` have passed or
+``AUTH_TOKEN_ACTIVITY_BATCH`` keys are waiting, with the flush time as the
+new ``ultimo_uso`` for all of them. The stored value can therefore lag the
+real last use by one flush interval, and a worker that dies loses at most
+that much activity; both are negligible next to an expiry measured in
+hours. A flush interval of 0 writes on every request.
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .models import TokenActividad
+
+
+_lock = threading.Lock()
+_pendientes = {}
+_ultimo_flush = time.monotonic()
+_CONSULTAR = object()
+
+
+def _expiracion():
+    return timedelta(hours=settings.AUTH_TOKEN_EXPIRY_HOURS)
+
+
+def registrar_uso(key):
+    global _ultimo_flush
+    ahora = timezone.now()
+    with _lock:
+        _pendientes[key] = ahora
+        vencido = time.monotonic() - _ultimo_flush >= settings.AUTH_TOKEN_ACTIVITY_FLUSH_SECONDS
+        if not vencido and len(_pendientes) < settings.AUTH_TOKEN_ACTIVITY_BATCH:
+            return
+    flush()
+
+
+def flush():
+    """Write the pending uses. Returns the number of tokens written."""
+    global _pendientes, _ultimo_flush
+    with _lock:
+        lote, _pendientes = _pendientes, {}
+        _ultimo_flush = time.monotonic()
+    if not lote:
+        return 0
+
+    ahora = timezone.now()
+    keys = list(lote)
+    actualizados = TokenActividad.objects.filter(token_id__in=keys).update(ultimo_uso=ahora)
+    if actualizados < len(keys):
+        # tokens created outside login (admin, shell) have no row yet; the
+        # filter skips keys deleted since they were noted
+        existentes = Token.objects.filter(key__in=keys).values_list('key', flat=True)
+        TokenActividad.objects.bulk_create(
+            [TokenActividad(token_id=key, ultimo_uso=ahora) for key in existentes],
+            ignore_conflicts=True,
+        )
+    return len(keys)
+
+
+def uso_guardado(token):
+    """Stored ``ultimo_uso`` of ``token``, or None if it has no activity row."""
+    try:
+        return token.actividad.ultimo_uso
+    except TokenActividad.DoesNotExist:
+        return None
+
+
+def ultimo_uso(token, guardado=_CONSULTAR):
+    """Most recent use known to this process: pending, stored or creation.
+
+    ``guardado`` is the stored use when the caller already has it (as
+    returned by ``uso_guardado``); otherwise it is read from the token.
+    """
+    if guardado is _CONSULTAR:
+        guardado = uso_guardado(token)
+    candidatos = [token.created]
+    if guardado is not None:
+        candidatos.append(guardado)
+    with _lock:
+        pendiente = _pendientes.get(token.key)
+    if pendiente is not None:
+        candidatos.append(pendiente)
+    return max(candidatos)
+
+
+def expirado(token, guardado=_CONSULTAR):
+    return timezone.now() - ultimo_uso(token, guardado) > _expiracion()
+
+
+def obtener_token(usuario):
+    """Token for a login or registration, replacing it if it has expired."""
+    token, creado = Token.objects.select_related('actividad').get_or_create(user=usuario)
+    if not creado and expirado(token):
+        token.delete()
+        token = Token.objects.create(user=usuario)
+    TokenActividad.objects.update_or_create(token=token, defaults={'ultimo_uso': timezone.now()})
+    return token
+
+
+def purgar(horas=None, lote=1000, dry_run=False):
+    """Delete tokens unused for ``horas``, ``lote`` at a time.
+
+    Returns the number of tokens deleted (or that would be).
+    """
+    horas = settings.AUTH_TOKEN_EXPIRY_HOURS if horas is None else horas
+    limite = timezone.now() - timedelta(hours=horas)
+    flush()
+
+    por_actividad = TokenActividad.objects.filter(ultimo_uso__lt=limite).order_by('ultimo_uso')
+    sin_actividad = Token.objects.filter(actividad__isnull=True, created__lt=limite).order_by('created')
+    if dry_run:
+        return por_actividad.count() + sin_actividad.count()
+
+    borrados = 0
+    for consulta, campo in ((por_actividad, 'token_id'), (sin_actividad, 'key')):
+        while True:
+            keys = list(consulta.values_list(campo, flat=True)[:lote])
+            if not keys:
+                break
+            # deleting Token cascades to its TokenActividad and fires the
+            # post_delete signal that drops the cached copy
+            Token.objects.filter(key__in=keys).delete()
+            borrados += len(keys)
+    return borrados
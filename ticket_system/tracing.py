@@ -0,0 +1,186 @@
+"""Lightweight request tracing exported as Zipkin v2 JSON.
+
+``middleware.TrazasMiddleware`` decides per request whether to trace it:
+with probability ``TRACE_SAMPLE_RATE``, never when the caller sends
+``X-B3-Sampled: 0``, and always when it sends ``X-B3-Sampled: 1`` together
+with ``X-Trace-Token: <TRACE_FORCE_TOKEN>``. The forced header is ignored
+without the token or while ``TRACE_EXPORT`` is empty, so anonymous
+clients cannot make the server trace (and write) their requests. A traced
+request gets a root span, and ``span()`` adds children for the stages
+that matter: database queries (``connection.execute_wrapper``),
+serializer ``.data``, email sends and the ReportLab builds. When the
+request is not traced ``span()`` costs one ``ContextVar`` lookup.
+
+Finished traces shorter than ``TRACE_SLOW_MS`` are dropped, so sampling
+every request and keeping only the slow ones is cheap enough to leave on
+in production. The rest are handed to a background thread that appends
+them to ``TRACE_EXPORT`` (a file, one JSON array of spans per line,
+renamed to ``<TRACE_EXPORT>.1`` once it passes ``TRACE_EXPORT_MAX_BYTES``)
+or POSTs them when it is an ``http(s)://`` URL, e.g. a Zipkin collector's
+``/api/v2/spans``. ``TRACE_EXPORT_WORKERS = 0`` exports inline.
+"""
+import json
+import os
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare
+
+
+SERVICIO = 'tickets'
+
+_traza_actual = ContextVar('traza_actual', default=None)
+_executor = None
+_executor_lock = threading.Lock()
+_archivo_lock = threading.Lock()
+
+
+def _id(bits=64):
+    return f'{random.getrandbits(bits):0{bits // 4}x}'
+
+
+def _ahora_us():
+    return time.time_ns() // 1000
+
+
+class Traza:
+    def __init__(self, trace_id=None, padre_id=None):
+        self.trace_id = trace_id or _id(128)
+        self.spans = []
+        self.pila = [padre_id] if padre_id else []
+        self.raiz_id = None
+        self.descartados = 0
+
+    def abrir(self, nombre, tags):
+        span = {
+            'traceId': self.trace_id,
+            'id': _id(),
+            'name': nombre,
+            'timestamp': _ahora_us(),
+            'localEndpoint': {'serviceName': SERVICIO},
+            'tags': {clave: str(valor) for clave, valor in tags.items()},
+        }
+        if self.pila:
+            span['parentId'] = self.pila[-1]
+        if self.raiz_id is None:
+            self.raiz_id = span['id']
+        self.pila.append(span['id'])
+        return span
+
+    def cerrar(self, span, inicio):
+        span['duration'] = max(1, (time.perf_counter_ns() - inicio) // 1000)
+        self.pila.pop()
+        # the root is always kept, whatever the limit
+        if len(self.spans) < settings.TRACE_MAX_SPANS or span['id'] == self.raiz_id:
+            self.spans.append(span)
+        else:
+            self.descartados += 1
+
+
+@contextmanager
+def span(nombre, **tags):
+    traza = _traza_actual.get()
+    if traza is None:
+        yield None
+        return
+    datos = traza.abrir(nombre, tags)
+    inicio = time.perf_counter_ns()
+    try:
+        yield datos
+    except BaseException as exc:
+        datos['tags']['error'] = type(exc).__name__
+        raise
+    finally:
+        traza.cerrar(datos, inicio)
+
+
+def _forzado_autorizado(request):
+    token = settings.TRACE_FORCE_TOKEN
+    return bool(token and settings.TRACE_EXPORT) and constant_time_compare(
+        request.META.get('HTTP_X_TRACE_TOKEN', ''), token)
+
+
+def muestrear(request):
+    """``(trace_id, parent_id)`` if this request should be traced, else None."""
+    forzado = request.META.get('HTTP_X_B3_SAMPLED')
+    if forzado == '0':
+        return None
+    if forzado != '1' or not _forzado_autorizado(request):
+        tasa = settings.TRACE_SAMPLE_RATE
+        if tasa <= 0 or random.random() >= tasa:
+            return None
+    return request.META.get('HTTP_X_B3_TRACEID'), request.META.get('HTTP_X_B3_SPANID')
+
+
+@contextmanager
+def trazar(nombre, trace_id=None, padre_id=None, **tags):
+    """Root span of a trace; the trace is exported when it ends."""
+    traza = Traza(trace_id, padre_id)
+    token = _traza_actual.set(traza)
+    try:
+        with span(nombre, **tags) as raiz:
+            raiz['kind'] = 'SERVER'
+            yield raiz
+    finally:
+        _traza_actual.reset(token)
+        if traza.descartados:
+            raiz['tags']['spans_descartados'] = str(traza.descartados)
+        if raiz['duration'] >= settings.TRACE_SLOW_MS * 1000:
+            exportar(traza.spans)
+
+
+class ConsultasTrazadas:
+    """``execute_wrapper`` that opens a span per SQL statement."""
+
+    def __call__(self, execute, sql, params, many, context):
+        with span('db', sql=sql[:500], many=many):
+            return execute(sql, params, many, context)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.TRACE_EXPORT_WORKERS,
+                thread_name_prefix='trazas',
+            )
+        return _executor
+
+
+def exportar(spans):
+    destino = settings.TRACE_EXPORT
+    if not destino or not spans:
+        return
+    if settings.TRACE_EXPORT_WORKERS:
+        get_executor().submit(_enviar, destino, spans)
+    else:
+        _enviar(destino, spans)
+
+
+def _enviar(destino, spans):
+    cuerpo = json.dumps(spans, separators=(',', ':'))
+    if destino.startswith(('http://', 'https://')):
+        peticion = urllib.request.Request(
+            destino, data=cuerpo.encode(), headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        try:
+            urllib.request.urlopen(peticion, timeout=5).close()
+        except OSError:
+            # tracing must never break or slow down the application
+            pass
+        return
+    with _archivo_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(destino)), exist_ok=True)
+        with open(destino, 'a', encoding='utf-8') as f:
+            f.write(cuerpo + '\n')
+            tamano = f.tell()
+        if tamano > settings.TRACE_EXPORT_MAX_BYTES:
+            # one previous file is kept; the next write starts a new one
+            os.replace(destino, destino + '.1')
@@ -0,0 +1,144 @@
+"""Warm-up of a web worker before it takes traffic.
+
+Right after a deploy the first requests of every worker paid for the URLconf
+and view imports, the first database connection, the reference lists
+(departamentos, motivos, cerradores) missing from the cache, the open
+tickets read model and ReportLab's styles and logo. ``calentar`` does all
+of that up front, step by step, recording how long each step took and
+which ones failed; a failed step is logged and does not stop the others.
+
+``tickets/wsgi.py`` calls ``al_iniciar`` once the application is loaded
+(``WARMUP_ON_START``), so a Gunicorn sync worker is warm before it accepts
+its first connection. If a step fails, a background thread retries the
+whole warm-up after ``WARMUP_RETRY_SECONDS``, doubling the wait up to
+``WARMUP_RETRY_MAX_SECONDS``, until it succeeds. Do not combine it with
+``gunicorn --preload``: the warm-up would run in the master and its
+database connection would be shared by the forked workers.
+
+``/api/estado/listo/`` only reports: 503 until a warm-up has finished
+without errors (200 straight away when ``WARMUP_ON_START`` is off), with
+each step's status but not its error, which goes to the log. A load
+balancer readiness check therefore only routes to warm workers and cannot
+make a worker do any work. ``manage.py calentar`` runs the same steps from
+the command line.
+
+The connection opened here is only reused by requests when
+``DB_CONN_MAX_AGE`` keeps connections open; otherwise the step still
+checks that the database is reachable.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_listo = threading.Event()
+# step -> milliseconds, or ERROR if it failed in the last attempt
+resultado = {}
+ERROR = 'error'
+
+
+def _conexion():
+    connection.ensure_connection()
+
+
+def _rutas():
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+
+def _idiomas():
+    # the variants LocaleMiddleware activates, so the cache keys match
+    codigos = [settings.LANGUAGE_CODE] + [codigo for codigo, _ in settings.LANGUAGES]
+    return sorted({translation.get_supported_language_variant(codigo) for codigo in codigos})
+
+
+def _referencia():
+    from .api_urls import router
+    from .cache_utils import ListaVersionadaMixin
+    for _, viewset, basename in router.registry:
+        if issubclass(viewset, ListaVersionadaMixin):
+            viewset.precalentar(basename, _idiomas())
+
+
+def _modelo_lectura():
+    from . import read_model
+    if read_model.activo():
+        read_model.modelo.cargar()
+
+
+def _pdf():
+    from . import pdf_reports  # noqa: F401
+    from . import pdf_toolkit
+    pdf_toolkit.warm_up()
+
+
+PASOS = (
+    ('conexion', _conexion),
+    ('rutas', _rutas),
+    ('referencia', _referencia),
+    ('modelo_lectura', _modelo_lectura),
+    ('pdf', _pdf),
+)
+
+
+def listo():
+    return _listo.is_set() or not settings.WARMUP_ON_START
+
+
+def estado():
+    """Step -> ``'ok'`` or ``'error'`` of the last attempt, without details."""
+    return {nombre: ERROR if valor == ERROR else 'ok' for nombre, valor in resultado.items()}
+
+
+def calentar():
+    """Run every step; True if all succeeded. None if another thread is at it."""
+    if not _lock.acquire(blocking=False):
+        return None
+    try:
+        errores = 0
+        for nombre, paso in PASOS:
+            if nombre == 'pdf' and not settings.WARMUP_PDF:
+                continue
+            inicio = time.perf_counter()
+            try:
+                paso()
+            except Exception:
+                errores += 1
+                resultado[nombre] = ERROR
+                logger.exception('Calentamiento: falló el paso %s', nombre)
+            else:
+                resultado[nombre] = round((time.perf_counter() - inicio) * 1000, 1)
+        if not errores:
+            _listo.set()
+        return not errores
+    finally:
+        _lock.release()
+
+
+def _reintentar():
+    espera = settings.WARMUP_RETRY_SECONDS
+    try:
+        while True:
+            time.sleep(espera)
+            if calentar():
+                logger.info('Calentamiento completado tras reintentar')
+                return
+            espera = min(espera * 2, settings.WARMUP_RETRY_MAX_SECONDS)
+    finally:
+        connection.close()
+
+
+def al_iniciar():
+    if settings.WARMUP_ON_START and not calentar():
+        threading.Thread(target=_reintentar, name='calentamiento', daemon=True).start()
+
+
+def reiniciar():
+    _listo.clear()
+    resultado.clear()
@@ -6,8 +6,8 @@ from django.conf import settings
 
 def create_database_if_not_exists():
     """
-    Crea la base de datos MySQL automáticamente si no existe.
-    Se ejecuta al iniciar la aplicación Django.
+    Crea la base de datos MySQL si no existe.
+    Se ejecuta con `python manage.py crear_base_datos`, antes de `migrate`.
     """
     db_config = settings.DATABASES['default']
 
@@ -30,7 +30,6 @@ def create_database_if_not_exists():
         cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{db_name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
 
         connection.commit()
-        print(f"Base de datos '{db_name}' lista.")
 
         cursor.close()
         connection.close()
@@ -46,15 +46,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so request latency covers the rest of the stack
+    'ticket_system.middleware.MetricasMiddleware',
+    'ticket_system.middleware.TrazasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    # session, CSRF, auth and messages are skipped for the token-based /api/
+    'ticket_system.middleware.SessionMiddleware',
     # LocaleMiddleware must be after SessionMiddleware and before CommonMiddleware
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'ticket_system.middleware.CsrfViewMiddleware',
+    'ticket_system.middleware.AuthenticationMiddleware',
+    'ticket_system.middleware.MessageMiddleware',
+    'ticket_system.middleware.PerfilMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -90,6 +95,8 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '3306'),
+        # seconds a connection is reused across requests; 0 opens one per request
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
         'OPTIONS': {
             'charset': 'utf8mb4',
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
@@ -150,9 +157,13 @@ STATIC_ROOT = os.getenv('DJANGO_STATIC_ROOT', BASE_DIR / 'staticfiles')
 # additional directories to look for static files (e.g. built frontend assets)
 STATICFILES_DIRS = [BASE_DIR / 'client' / 'dist']
 
-# Media files (uploaded files)
+# Media files (uploaded files), served by ticket_system.media_views
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# internal nginx location that maps onto MEDIA_ROOT (used with SENDFILE_BACKEND='nginx')
+MEDIA_ACCEL_PREFIX = os.getenv('MEDIA_ACCEL_PREFIX', '/protected/media/')
+# browser cache lifetime for media whose name is not a content hash
+MEDIA_CACHE_MAX_AGE = int(os.getenv('MEDIA_CACHE_MAX_AGE', '3600'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
@@ -167,13 +178,110 @@ LOGOUT_REDIRECT_URL = 'login'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'ticket_system.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# LocMemCache is per process; set CACHE_BACKEND/CACHE_LOCATION to a shared
+# cache (e.g. django.core.cache.backends.redis.RedisCache) when running
+# several workers
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'tickets'),
+    }
+}
+
+# whether every worker sees the same cache; defaults to True for any backend
+# other than LocMemCache/DummyCache. Caches whose invalidation has to reach
+# all workers (tokens, open-ticket read model) are off when it is False
+CACHE_SHARED = os.getenv(
+    'CACHE_SHARED',
+    str(CACHES['default']['BACKEND'].rsplit('.', 1)[-1] not in ('LocMemCache', 'DummyCache')),
+) == 'True'
+
+# seconds a token -> user lookup is served from the cache (only with CACHE_SHARED)
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', '30'))
+
+# departamentos/motivos/cerradores lists: seconds kept in the server cache
+# and seconds browsers may reuse them before revalidating with the ETag
+REFERENCE_CACHE_TTL = int(os.getenv('REFERENCE_CACHE_TTL', '300'))
+REFERENCE_CACHE_MAX_AGE = int(os.getenv('REFERENCE_CACHE_MAX_AGE', '60'))
+
+# seconds concurrent identical ticket-list requests share one result, 0 = off
+TICKET_LIST_COALESCE_SECONDS = float(os.getenv('TICKET_LIST_COALESCE_SECONDS', '1'))
+
+# application logs (email failures, etc.) go to stderr, which Gunicorn
+# forwards to journald
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '%(asctime)s %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'ticket_system': {
+            'handlers': ['console'],
+            'level': os.getenv('LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# bearer token Prometheus sends to /metrics; empty disables the endpoint
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# directory where each worker dumps its metrics so /metrics can add them
+# up; empty keeps them per process. Dumped every METRICS_FLUSH_SECONDS
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+
+# request tracing (ticket_system/tracing.py): share of requests traced,
+# minimum duration of an exported trace, and where traces go (a file, or a
+# Zipkin-compatible http(s) URL); empty TRACE_EXPORT keeps nothing
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_SLOW_MS = int(os.getenv('TRACE_SLOW_MS', '0'))
+TRACE_EXPORT = os.getenv('TRACE_EXPORT', '')
+# an export file is moved to <TRACE_EXPORT>.1 once it grows past this size
+TRACE_EXPORT_MAX_BYTES = int(os.getenv('TRACE_EXPORT_MAX_BYTES', str(50 * 1024 * 1024)))
+# secret a caller sends as X-Trace-Token to force tracing with X-B3-Sampled: 1;
+# empty ignores the forced header
+TRACE_FORCE_TOKEN = os.getenv('TRACE_FORCE_TOKEN', '')
+TRACE_EXPORT_WORKERS = int(os.getenv('TRACE_EXPORT_WORKERS', '1'))
+TRACE_MAX_SPANS = int(os.getenv('TRACE_MAX_SPANS', '2000'))
+
+# superusers can profile a request with "X-Profile: 1"; reports are kept
+# in PROFILE_ROOT (newest PROFILE_MAX_FILES)
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'True') == 'True'
+PROFILE_ROOT = os.getenv('PROFILE_ROOT', BASE_DIR / 'perfiles')
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+
+# warm-up (ticket_system.warmup) when tickets/wsgi.py loads; /api/estado/listo/
+# answers 503 until it has succeeded. WARMUP_PDF also preloads ReportLab
+WARMUP_ON_START = os.getenv('WARMUP_ON_START', 'True') == 'True'
+WARMUP_PDF = os.getenv('WARMUP_PDF', 'True') == 'True'
+# after a failed warm-up, seconds before retrying in the background; the
+# wait doubles on each failure up to WARMUP_RETRY_MAX_SECONDS
+WARMUP_RETRY_SECONDS = float(os.getenv('WARMUP_RETRY_SECONDS', '5'))
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv('WARMUP_RETRY_MAX_SECONDS', '300'))
+
+# in-memory model of the open tickets (see ticket_system/read_model.py),
+# used only with CACHE_SHARED and for lists filtered on open states; it is
+# fully reloaded at least every READ_MODEL_RECONCILE_SECONDS
+READ_MODEL_ENABLED = os.getenv('READ_MODEL_ENABLED', 'True') == 'True'
+READ_MODEL_BACKGROUND = os.getenv('READ_MODEL_BACKGROUND', 'True') == 'True'
+READ_MODEL_RECONCILE_SECONDS = int(os.getenv('READ_MODEL_RECONCILE_SECONDS', '60'))
+
+# hours without use after which a token expires (sliding); last-use times
+# are written in batches every N seconds or N tokens, 0 = on every request
+AUTH_TOKEN_EXPIRY_HOURS = int(os.getenv('AUTH_TOKEN_EXPIRY_HOURS', '168'))
+AUTH_TOKEN_ACTIVITY_FLUSH_SECONDS = int(os.getenv('AUTH_TOKEN_ACTIVITY_FLUSH_SECONDS', '60'))
+AUTH_TOKEN_ACTIVITY_BATCH = int(os.getenv('AUTH_TOKEN_ACTIVITY_BATCH', '500'))
+
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:8000',
     'http://127.0.0.1:8000',
@@ -183,6 +291,8 @@ CORS_ALLOWED_ORIGINS = [
 
 # Email Configuration
 EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+# where the file backend writes messages (benchmarks/load_test.py uses it to capture email)
+EMAIL_FILE_PATH = os.getenv('EMAIL_FILE_PATH', BASE_DIR / 'correos')
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
@@ -190,3 +300,42 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 HOTLINE_EMAIL = os.getenv('HOTLINE_EMAIL', 'hotline@cofat.com')
+
+# Generated PDF reports (ticket_system.report_store)
+REPORTS_ROOT = os.getenv('REPORTS_ROOT', BASE_DIR / 'reportes_pdf')
+# internal nginx location that maps onto REPORTS_ROOT (used with SENDFILE_BACKEND='nginx')
+REPORTS_ACCEL_PREFIX = os.getenv('REPORTS_ACCEL_PREFIX', '/protected/reportes/')
+# retention enforced by `manage.py podar_reportes`; 0 disables the size limit
+REPORT_RETENTION_DAYS = int(os.getenv('REPORT_RETENTION_DAYS', '30'))
+REPORT_RETENTION_MAX_BYTES = int(os.getenv('REPORT_RETENTION_MAX_BYTES', str(1024 * 1024 * 1024)))
+
+# How file downloads leave the app: 'nginx' (X-Accel-Redirect), 'apache'
+# (X-Sendfile) or empty to stream them from Django with FileResponse
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', '')
+
+# Background PDF reports (ticket_system.report_jobs)
+# number of render processes; 0 renders inline in the request (tests, development)
+REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', '2'))
+# pending jobs accepted before new submissions are refused with 503
+REPORT_JOB_MAX_PENDING = int(os.getenv('REPORT_JOB_MAX_PENDING', '20'))
+# seconds after which a pending job is considered lost and marked as failed
+REPORT_JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', '600'))
+# upper bound for a single bulk ticket-PDF export
+REPORT_BATCH_MAX_TICKETS = int(os.getenv('REPORT_BATCH_MAX_TICKETS', '5000'))
+
+# Solution images (ticket_system.image_pipeline)
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv('IMAGE_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+# uploads above this many pixels are rejected before being decoded
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', '40000000'))
+# longest side of the stored image and of its thumbnail
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', '1600'))
+IMAGE_THUMB_DIMENSION = int(os.getenv('IMAGE_THUMB_DIMENSION', '320'))
+# encoder threads shared by all requests of a worker process; 0 encodes inline
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+IMAGE_PROCESS_TIMEOUT = int(os.getenv('IMAGE_PROCESS_TIMEOUT', '30'))
+
+# Resumable uploads (ticket_system.chunked_upload)
+UPLOAD_SESSIONS_ROOT = os.getenv('UPLOAD_SESSIONS_ROOT', BASE_DIR / 'subidas_tmp')
+UPLOAD_CHUNK_MAX_BYTES = int(os.getenv('UPLOAD_CHUNK_MAX_BYTES', str(2 * 1024 * 1024)))
+# idle sessions older than this are removed by `manage.py purgar_subidas`
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv('UPLOAD_SESSION_TTL_HOURS', '24'))
@@ -15,10 +15,11 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.contrib.auth import views as auth_views
 from django.conf import settings
-from django.conf.urls.static import static
+from ticket_system.media_views import servir_media
+from ticket_system.metrics import metricas
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,4 +27,6 @@ urlpatterns = [
     path('tickets/', include('ticket_system.urls')),
     path('login/', auth_views.LoginView.as_view(template_name='ticket_system/login.html'), name='login'),
     path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('metrics', metricas, name='metricas'),
+    re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", servir_media, name='media'),
+]
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tickets.settings')
 
 application = get_wsgi_application()
+
+from ticket_system import warmup  # noqa: E402
+
+warmup.al_iniciar()